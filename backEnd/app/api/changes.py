@@ -0,0 +1,68 @@
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+from fastapi.responses import StreamingResponse
+from app.core.changes import change_hub, fetch_changes, oldest_sequence
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+# Milliseconds EventSource waits before reconnecting
+RECONNECT_MS = 3000
+
+def _event(event: str, data: dict, seq: Optional[int] = None) -> str:
+    lines = [f"id: {seq}"] if seq is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data, default=str)}"]
+    return "\n".join(lines) + "\n\n"
+
+async def _replay(after: int, upto: int) -> Optional[list]:
+    """Logged changes in (after, upto], or None if they are pruned or too many to replay"""
+    async with AsyncSessionLocal() as db:
+        oldest = await oldest_sequence(db)
+        if after < upto and (oldest is None or oldest > after + 1):
+            return None
+        changes = await fetch_changes(db, after, settings.ITEM_CHANGES_REPLAY_LIMIT + 1, upto)
+    return changes if len(changes) <= settings.ITEM_CHANGES_REPLAY_LIMIT else None
+
+async def stream_changes(after: Optional[int]) -> AsyncIterator[str]:
+    """
+    Yield SSE events: the logged changes since ``after`` (if given), then live
+    ones. Each event id is its sequence number, which EventSource sends back
+    as Last-Event-ID when it reconnects.
+
+    A client too far behind to replay, or one that reconnects without a
+    cursor, first gets a ``reset`` event carrying the current sequence and
+    should reload the item list.
+    """
+    subscription = await change_hub.subscribe()
+    try:
+        yield f"retry: {RECONNECT_MS}\n\n"
+        # Subscribed first, so everything past this point arrives through the queue
+        last_seq = change_hub.last_seq
+        backlog = await _replay(after, last_seq) if after is not None else None
+        if backlog is None:
+            yield _event("reset", {"seq": last_seq}, last_seq)
+        else:
+            for change in backlog:
+                yield _event(change["op"], change, change["seq"])
+            last_seq = max(after, last_seq)
+
+        while not subscription.dropped:
+            try:
+                change = await asyncio.wait_for(
+                    subscription.queue.get(), settings.ITEM_CHANGES_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if change["seq"] > last_seq:
+                last_seq = change["seq"]
+                yield _event(change["op"], change, change["seq"])
+    finally:
+        change_hub.unsubscribe(subscription)
+
+def change_stream_response(after: Optional[int]) -> StreamingResponse:
+    return StreamingResponse(
+        stream_changes(after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,43 @@
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response, status
+from app.api.responses import copy_headers
+from app.core.versions import Validator
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison as required for If-None-Match (RFC 9110 13.1.2)"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def _not_modified_since(if_modified_since: str, last_modified: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(last_modified) <= since
+
+def not_modified(request: Request, response: Response, validator: Validator) -> Optional[Response]:
+    """
+    Attach ETag/Last-Modified validators to ``response`` and return a bodiless
+    304 response if the client's copy is still current, else None.
+    """
+    response.headers.update({
+        "ETag": validator.etag,
+        "Cache-Control": "private, no-cache",
+    })
+    if validator.last_modified is not None:
+        response.headers["Last-Modified"] = formatdate(validator.last_modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, validator.etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = bool(if_modified_since) and validator.last_modified is not None and \
+            _not_modified_since(if_modified_since, validator.last_modified)
+
+    if fresh:
+        return copy_headers(Response(status_code=status.HTTP_304_NOT_MODIFIED), response)
+    return None
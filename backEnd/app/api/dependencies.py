@@ -1,12 +1,17 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Tuple
 from datetime import datetime
 from app.db.session import get_db
 from app.models.token import Token
 from app.models.user import User
-from app.core.security import verify_token
+from app.core.config import settings
+from app.core.rate_limit import check_rate_limit
+from app.core.security import hash_token, verify_token
+from app.core.token_cache import revocation_cache
+from app.db.replicas import request_routing
 
 # Create HTTPBearer instance for token authentication
 security = HTTPBearer(
@@ -15,39 +20,75 @@ security = HTTPBearer(
     auto_error=True
 )
 
+async def _read_from_replica() -> None:
+    routing = request_routing.get()
+    if routing is not None:
+        routing.read_only = True
+
+# Route dependency letting the request's reads go to a replica (DATABASE_REPLICA_URLS)
+use_replica = Depends(_read_from_replica)
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+async def _verify_token_cached(db: AsyncSession, token: str, jti: str) -> Tuple[Token, User]:
+    """Check revocation against the in-process cache, touching the DB only on a miss"""
+    cached = revocation_cache.get(jti)
+    if cached is None:
+        db_token = await db.get(Token, jti)
+        if not db_token and db.sync_session.use_primary():
+            # Freshly issued tokens may not have reached the replica yet
+            db_token = await db.get(Token, jti)
+        if not db_token or db_token.token_hash != hash_token(token):
+            raise _unauthorized("Token is invalid or expired")
+        user = await db.get(User, db_token.user_id)
+        if not user:
+            raise _unauthorized("User not found")
+        cached = revocation_cache.put(db_token, user)
+        if not cached.is_valid():
+            raise _unauthorized("Token is invalid or expired")
+        return db_token, user
+
+    if not cached.is_valid():
+        raise _unauthorized("Token is invalid or expired")
+    return cached.attach(db)
+
 async def verify_token_db(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Tuple[Token, User]:
     """Verify token and return both token and associated user"""
     token = credentials.credentials
-    
-    # Check database token
-    db_token = db.query(Token).filter(Token.token == token).first()
-    if not db_token or db_token.is_revoked or db_token.expires_at < datetime.utcnow():
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token is invalid or expired",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
+
     # Verify JWT payload
     payload = verify_token(token)
     if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token signature",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("Invalid token signature")
+
+    jti = payload.get("jti")
+    if settings.TOKEN_VERIFY_MODE == "stateless" and jti:
+        return await _verify_token_cached(db, token, jti)
+
+    # Check database token
+    # The expiry bound also lets a partitioned tokens table skip expired partitions
+    token_query = select(Token).where(
+        Token.token_hash == hash_token(token), Token.expires_at >= datetime.utcnow()
+    )
+    db_token = await db.scalar(token_query)
+    if not db_token and db.sync_session.use_primary():
+        # Freshly issued tokens may not have reached the replica yet
+        db_token = await db.scalar(token_query)
+    if not db_token or db_token.is_revoked or db_token.expires_at < datetime.utcnow():
+        raise _unauthorized("Token is invalid or expired")
 
     # Get user
-    user = db.query(User).filter(User.id == db_token.user_id).first()
+    user = await db.scalar(select(User).where(User.id == db_token.user_id))
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("User not found")
 
     return db_token, user
 
@@ -56,4 +97,24 @@ async def get_current_user(
 ) -> User:
     """Get current user from verified token"""
     _, user = token_data
-    return user
\ No newline at end of file
+    return user
+async def get_admin_user(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """Require an authenticated user listed in ADMIN_USERNAMES"""
+    if current_user.username not in settings.ADMIN_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
+
+def user_rate_limit(name: str):
+    """
+    Route dependency enforcing ``name``'s RATE_LIMITS rules on an authenticated
+    route, with ``user`` rules counted against the user's id, which unlike the
+    username survives renames. Shares the request's verify_token_db result.
+    """
+    async def dependency(request: Request, current_user: User = Depends(get_current_user)) -> None:
+        await check_rate_limit(name, request, user_id=current_user.id)
+    return Depends(dependency)
@@ -1,3 +1,3 @@
-from . import items, users, auth
+from . import items, users, auth, admin, metrics
 
-__all__ = ["items", "users", "auth"]
\ No newline at end of file
+__all__ = ["items", "users", "auth", "admin", "metrics"]
\ No newline at end of file
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.api.dependencies import get_admin_user
+from app.core.profiling import profile_store
+from app.core.tasks import cleanup_stats
+from app.db.pool import pool_status
+from app.db.session import async_engine, engine, replica_router
+from app.models.user import User
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/tasks/token-cleanup")
+async def token_cleanup_status(admin: User = Depends(get_admin_user)):
+    """Counts from the background token cleanup job on this worker (admin only)"""
+    return cleanup_stats
+
+@router.get("/db/pool")
+async def db_pool_status(admin: User = Depends(get_admin_user)):
+    """Connection pool occupancy and checkout statistics for this worker (admin only)"""
+    pools = {
+        "async": pool_status(async_engine.sync_engine, "async"),
+        "sync": pool_status(engine, "sync"),
+    }
+    for replica in replica_router.replicas:
+        pools[replica.pool_name] = pool_status(replica.engine.sync_engine, replica.pool_name)
+    return pools
+
+@router.get("/db/replicas")
+async def db_replica_status(admin: User = Depends(get_admin_user)):
+    """Lag and rotation state of each read replica, as measured by this worker (admin only)"""
+    return replica_router.status()
+
+@router.get("/profiles")
+async def list_profiles(admin: User = Depends(get_admin_user)):
+    """Recently captured request profiles on this worker, newest first (admin only)"""
+    return profile_store.list()
+
+@router.get("/profiles/{profile_id}")
+async def read_profile(profile_id: int, admin: User = Depends(get_admin_user)):
+    """Call profile and SQL statements of one captured request (admin only)"""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+@router.delete("/profiles")
+async def clear_profiles(admin: User = Depends(get_admin_user)):
+    """Empty this worker's profile buffer (admin only)"""
+    profile_store.clear()
+    return {"message": "Profiles cleared"}
@@ -1,28 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 import uuid
-from app.core.oauth import oauth
-from app.core.security import create_access_token
+from app.core.oauth import get_oauth
+from app.core.security import create_access_token, hash_token
 from app.db.session import get_db
 from app.models.token import Token
 from app.models.user import User
 from app.api.dependencies import security
+from app.core.rate_limit import rate_limit
+from app.core.versions import table_versions
+from app.core.stats import count_new_user, record_sign_in
 
-router = APIRouter(prefix="/auth", tags=["social-auth"])
+router = APIRouter(prefix="/auth", tags=["social-auth"], dependencies=[rate_limit("oauth")])
 
 @router.get('/google/login')
 async def google_login(request: Request):
     """Initiate Google OAuth flow"""
     redirect_uri = request.url_for('auth_google')
-    return await oauth.google.authorize_redirect(request, redirect_uri)
+    return await get_oauth().google.authorize_redirect(request, redirect_uri)
 
 @router.get('/google/callback')
-async def auth_google(request: Request, db: Session = Depends(get_db)):
+async def auth_google(request: Request, db: AsyncSession = Depends(get_db)):
     """Handle Google OAuth callback"""
-    token = await oauth.google.authorize_access_token(request)
-    user_data = await oauth.google.parse_id_token(request, token)
+    token = await get_oauth().google.authorize_access_token(request)
+    user_data = await get_oauth().google.parse_id_token(request, token)
     
     return await handle_oauth_login(db, {
         'email': user_data.email,
@@ -33,13 +37,13 @@ async def auth_google(request: Request, db: Session = Depends(get_db)):
 async def github_login(request: Request):
     """Initiate GitHub OAuth flow"""
     redirect_uri = request.url_for('auth_github')
-    return await oauth.github.authorize_redirect(request, redirect_uri)
+    return await get_oauth().github.authorize_redirect(request, redirect_uri)
 
 @router.get('/github/callback')
-async def auth_github(request: Request, db: Session = Depends(get_db)):
+async def auth_github(request: Request, db: AsyncSession = Depends(get_db)):
     """Handle GitHub OAuth callback"""
-    token = await oauth.github.authorize_access_token(request)
-    resp = await oauth.github.get('user', token=token)
+    token = await get_oauth().github.authorize_access_token(request)
+    resp = await get_oauth().github.get('user', token=token)
     user_data = resp.json()
     
     return await handle_oauth_login(db, {
@@ -48,9 +52,9 @@ async def auth_github(request: Request, db: Session = Depends(get_db)):
     })
 
 # Update OAuth handlers to use JWT Bearer tokens
-async def handle_oauth_login(db: Session, user_data: dict):
+async def handle_oauth_login(db: AsyncSession, user_data: dict):
     """Helper function to handle OAuth user creation and token generation"""
-    user = db.query(User).filter(User.email == user_data['email']).first()
+    user = await db.scalar(select(User).where(User.email == user_data['email']))
     if not user:
         user = User(
             id=str(uuid.uuid4()),
@@ -59,20 +63,24 @@ async def handle_oauth_login(db: Session, user_data: dict):
             is_active=True
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await count_new_user(db, user)
+        await table_versions.bump(db, "users")
+        await db.commit()
+        await db.refresh(user)
     
-    access_token = create_access_token(data={"sub": user.username})
+    token_id = str(uuid.uuid4())
+    access_token = create_access_token(data={"sub": user.username, "jti": token_id})
     expires_at = datetime.utcnow() + timedelta(minutes=30)
     
     db_token = Token(
-        id=str(uuid.uuid4()),
-        token=access_token,
+        id=token_id,
+        token_hash=hash_token(access_token),
         user_id=user.id,
         expires_at=expires_at
     )
     db.add(db_token)
-    db.commit()
+    await record_sign_in(db, user.id)
+    await db.commit()
     
     return {
         "access_token": access_token,
@@ -1,58 +1,424 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Tuple
-from app.schemas.item import ItemCreate, ItemResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple
+from app.core.config import settings
+from app.schemas.item import (
+    ItemCreate, ItemResponse, ItemSearchResult, ItemBulkCreate, ItemBulkUpdate, ItemBulkDelete, BulkItemResponse
+)
 from app.models.item import Item
 from app.db.session import get_db
-from app.api.dependencies import verify_token_db
+from app.api.dependencies import use_replica, verify_token_db
+from app.api.pagination import decode_cursor, encode_cursor, fetch_page, prefix_pattern, set_next_cursor
+from app.api.export import ExportFormat, export_response
+from app.api.conditional import not_modified
+from app.api.responses import encode_json, encoded_body, encoded_json, trusted_json
+from app.api.formats import (
+    ENCODERS, FORMAT_NAMES, JSON, LIST_RESPONSES, negotiate_list_format, representation_validator
+)
+from app.api.changes import change_stream_response
+from app.core.changes import change_hub, record_changes
+from app.core.cache import item_cache
+from app.core.coalesce import item_flights
+from app.core.versions import table_versions
+from app.core.search import highlight, item_search, tokenize
+from app.core.stats import count_items, item_stats
 from app.models.user import User
 from app.models.token import Token
 
 router = APIRouter(prefix="/items", tags=["items"])
 
-@router.get("/", response_model=List[ItemResponse])
+@router.get("/", response_model=List[ItemResponse], responses=LIST_RESPONSES, dependencies=[use_replica])
 async def read_all_items(
+    request: Request,
+    response: Response,
+    limit: int = Query(settings.PAGE_DEFAULT_LIMIT, ge=1, le=settings.PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    name_prefix: Optional[str] = Query(None, min_length=1, max_length=255),
+    sort: Literal["id", "name"] = "id",
+    order: Literal["asc", "desc"] = "asc",
     token_data: Tuple[Token, User] = Depends(verify_token_db),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all items (requires authentication)"""
-    items = db.query(Item).all()
-    return [item.to_dict() for item in items]
+    """
+    List items a page at a time (requires authentication).
+    The next page is requested with the cursor returned in the X-Next-Cursor header.
+    Sorting by name skips items without a name.
+    Send ``Accept: application/msgpack`` or ``application/vnd.apache.arrow.stream``
+    for a column-wise binary page instead of JSON.
+    """
+    media_type = negotiate_list_format(request)
+    validator = await table_versions.validator(db, "items")
+    unchanged = not_modified(request, response, representation_validator(response, validator, media_type))
+    if unchanged:
+        return unchanged
 
-@router.get("/{item_id}", response_model=ItemResponse)
+    fmt = FORMAT_NAMES[media_type]
+    cache_key = f"list:{validator.version}:{fmt}:{sort}:{order}:{limit}:{name_prefix}:{cursor}"
+
+    async def fetch() -> Tuple[bytes, Optional[str]]:
+        entry, version = await item_cache.get(cache_key)
+        if entry is None:
+            # Binary formats encode plain row tuples column by column, without ORM objects
+            stmt = select(Item) if media_type == JSON else select(Item.id, Item.name, Item.description)
+            if name_prefix:
+                stmt = stmt.where(Item.name.like(prefix_pattern(name_prefix), escape="\\"))
+            if sort == "name":
+                stmt = stmt.where(Item.name.isnot(None))
+                columns = [Item.name, Item.id]
+            else:
+                columns = [Item.id]
+
+            rows, next_cursor = await fetch_page(
+                db, stmt, columns, sort, order, limit, cursor, columnar=media_type != JSON
+            )
+            if media_type == JSON:
+                body = encode_json([item.to_dict() for item in rows])
+            else:
+                body = ENCODERS[media_type](stmt, rows)
+            entry = await item_cache.set(cache_key, {"body": body, "next_cursor": next_cursor}, version)
+        return entry.value["body"], entry.value["next_cursor"]
+
+    # Concurrent requests for the same page share one fetch and one encoded body
+    body, next_cursor = await item_flights.do(cache_key, fetch)
+    set_next_cursor(request, response, next_cursor)
+    return encoded_body(body, media_type, response)
+
+@router.get("/export", dependencies=[use_replica])
+async def export_items(
+    request: Request,
+    format: ExportFormat = "ndjson",
+    token_data: Tuple[Token, User] = Depends(verify_token_db)
+):
+    """Stream every item as NDJSON or CSV (requires authentication)"""
+    stmt = select(Item.id, Item.name, Item.description).order_by(Item.id)
+    return export_response(request, stmt, format, "items")
+
+@router.get("/search", response_model=List[ItemSearchResult], dependencies=[use_replica])
+async def search_items(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=255, description="Words to look for in names and descriptions"),
+    limit: int = Query(settings.PAGE_DEFAULT_LIMIT, ge=1, le=settings.PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    token_data: Tuple[Token, User] = Depends(verify_token_db),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Full-text search over item names and descriptions, best matches first
+    (requires authentication). Highlights are HTML-escaped with matches in <mark>.
+    """
+    after = None
+    if cursor:
+        after = tuple(decode_cursor(cursor, "rank", "desc", [int, int]))
+
+    validator = await table_versions.validator(db, "items")
+    unchanged = not_modified(request, response, validator)
+    if unchanged:
+        return unchanged
+
+    cache_key = f"search:{validator.version}:{limit}:{cursor}:{q}"
+    entry, version = await item_cache.get(cache_key)
+    if entry is None:
+        hits = await item_search.search(db, q, limit + 1, after)
+        next_cursor = None
+        if len(hits) > limit:
+            hits = hits[:limit]
+            last_item, _, last_rank = hits[-1]
+            next_cursor = encode_cursor("rank", "desc", [last_rank, last_item["id"]])
+
+        terms = tokenize(q)
+        results = []
+        for item, score, _ in hits:
+            marked = {field: highlight(item[field], terms) for field in ("name", "description")}
+            results.append({
+                "id": item["id"],
+                "name": item["name"],
+                "description": item["description"],
+                "score": round(score, 6),
+                "highlights": {field: text for field, text in marked.items() if text},
+            })
+        entry = await item_cache.set(cache_key, {"items": results, "next_cursor": next_cursor}, version)
+
+    set_next_cursor(request, response, entry.value["next_cursor"])
+    return trusted_json(entry.value["items"], response)
+
+async def _insert_items(db: AsyncSession, rows: List[dict]) -> List[int]:
+    """Insert rows and return their ids in input order"""
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = await db.execute(insert(Item).returning(Item.id, sort_by_parameter_order=True), rows)
+        return list(result.scalars())
+    # MySQL has no RETURNING, and a multi-row INSERT's ids need not be consecutive
+    # (auto_increment_increment > 1, interleaved innodb_autoinc_lock_mode=2), so
+    # let the ORM insert row by row and read each row's own lastrowid
+    items = [Item(**row) for row in rows]
+    db.add_all(items)
+    await db.flush()
+    return [item.id for item in items]
+
+async def _apply_batch(
+    db: AsyncSession,
+    rows: List[Tuple[int, Any]],
+    run: Callable[[List[Any]], Awaitable[List[Any]]]
+) -> Tuple[Dict[int, Any], Dict[int, str]]:
+    """
+    Apply ``run`` to all rows as one statement inside a savepoint. If that fails,
+    replay row by row so the failures can be reported individually.
+    Returns the per-row outputs of ``run`` and the errors, both keyed by row index.
+    """
+    if not rows:
+        return {}, {}
+    try:
+        async with db.begin_nested():
+            outputs = await run([row for _, row in rows])
+        return dict(zip([index for index, _ in rows], outputs)), {}
+    except SQLAlchemyError:
+        outputs, errors = {}, {}
+        for index, row in rows:
+            try:
+                async with db.begin_nested():
+                    outputs.update(zip([index], await run([row])))
+            except SQLAlchemyError as e:
+                errors[index] = str(getattr(e, "orig", e))
+        return outputs, errors
+
+async def _finish_bulk(
+    db: AsyncSession,
+    mode: str,
+    results: List[dict],
+    log_changes: Callable[[], Awaitable[None]],
+    reindex: Callable[[], None]
+) -> dict:
+    """
+    Commit (or roll back an atomic batch with failures) and build the response.
+    ``log_changes`` writes the change feed entries into the transaction and
+    ``reindex`` applies the committed rows to the search index.
+    """
+    failed = sum(1 for result in results if result["status"] in ("not_found", "failed"))
+    if failed and mode == "atomic":
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Bulk operation aborted, no changes were applied", "results": results}
+        )
+    await log_changes()
+    await table_versions.bump(db, "items")
+    await db.commit()
+    change_hub.notify()
+    # Before invalidating, so a search can't cache results from the old index under the new version
+    reindex()
+    await item_cache.invalidate()
+    return {"mode": mode, "succeeded": len(results) - failed, "failed": failed, "results": results}
+
+async def _existing_item_ids(db: AsyncSession, ids: List[int]) -> set:
+    return set((await db.scalars(select(Item.id).where(Item.id.in_(ids)))).all())
+
+@router.post("/bulk", response_model=BulkItemResponse)
+async def create_items_bulk(
+    payload: ItemBulkCreate,
+    token_data: Tuple[Token, User] = Depends(verify_token_db),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create many items in one transaction (requires authentication)"""
+    rows = [(index, item.model_dump()) for index, item in enumerate(payload.items)]
+    try:
+        ids, errors = await _apply_batch(db, rows, lambda batch: _insert_items(db, batch))
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    results = [
+        {"index": index, "status": "failed", "error": errors[index]} if index in errors
+        else {"index": index, "id": ids[index], "status": "created"}
+        for index, _ in rows
+    ]
+
+    created = [{"id": ids[index], **values} for index, values in rows if index not in errors]
+
+    async def log_changes():
+        await record_changes(db, "create", created)
+        await count_items(db, created=len(created))
+
+    def reindex():
+        for item in created:
+            item_search.upsert(item["id"], item)
+
+    return await _finish_bulk(db, payload.mode, results, log_changes, reindex)
+
+@router.patch("/bulk", response_model=BulkItemResponse)
+async def update_items_bulk(
+    payload: ItemBulkUpdate,
+    token_data: Tuple[Token, User] = Depends(verify_token_db),
+    db: AsyncSession = Depends(get_db)
+):
+    """Partially update many items in one transaction (requires authentication)"""
+    existing = await _existing_item_ids(db, [patch.id for patch in payload.items])
+    rows = [
+        (index, patch.model_dump(exclude_unset=True))
+        for index, patch in enumerate(payload.items) if patch.id in existing
+    ]
+
+    async def run(batch: List[dict]) -> List[Any]:
+        # ORM bulk UPDATE by primary key, sent as an executemany
+        changes = [values for values in batch if len(values) > 1]
+        if changes:
+            await db.execute(update(Item), changes)
+        return []
+
+    try:
+        _, errors = await _apply_batch(db, rows, run)
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    results = []
+    for index, patch in enumerate(payload.items):
+        if patch.id not in existing:
+            results.append({"index": index, "id": patch.id, "status": "not_found"})
+        elif index in errors:
+            results.append({"index": index, "id": patch.id, "status": "failed", "error": errors[index]})
+        else:
+            results.append({"index": index, "id": patch.id, "status": "updated"})
+
+    changed_ids = [values["id"] for index, values in rows if index not in errors and len(values) > 1]
+
+    async def log_changes():
+        if changed_ids:
+            items = await db.scalars(select(Item).where(Item.id.in_(changed_ids)))
+            await record_changes(db, "update", [item.to_dict() for item in items])
+
+    def reindex():
+        for index, values in rows:
+            if index not in errors:
+                item_search.upsert(values["id"], values)
+
+    return await _finish_bulk(db, payload.mode, results, log_changes, reindex)
+
+@router.delete("/bulk", response_model=BulkItemResponse)
+async def delete_items_bulk(
+    payload: ItemBulkDelete,
+    token_data: Tuple[Token, User] = Depends(verify_token_db),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete many items in one transaction (requires authentication)"""
+    existing = await _existing_item_ids(db, payload.ids)
+    rows = [(index, item_id) for index, item_id in enumerate(payload.ids) if item_id in existing]
+
+    async def run(batch: List[int]) -> List[Any]:
+        await db.execute(delete(Item).where(Item.id.in_(batch)))
+        return []
+
+    try:
+        _, errors = await _apply_batch(db, rows, run)
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    results = []
+    for index, item_id in enumerate(payload.ids):
+        if item_id not in existing:
+            results.append({"index": index, "id": item_id, "status": "not_found"})
+        elif index in errors:
+            results.append({"index": index, "id": item_id, "status": "failed", "error": errors[index]})
+        else:
+            results.append({"index": index, "id": item_id, "status": "deleted"})
+    deleted = [item_id for index, item_id in rows if index not in errors]
+
+    async def log_changes():
+        await record_changes(db, "delete", [{"id": item_id} for item_id in deleted])
+        await count_items(db, deleted=len(deleted))
+
+    return await _finish_bulk(db, payload.mode, results, log_changes, lambda: item_search.remove(deleted))
+
+@router.get("/stats", dependencies=[use_replica])
+async def read_item_stats(
+    period: Literal["day", "week", "month"] = "day",
+    limit: int = Query(30, ge=1, le=366, description="Number of periods in the histogram"),
+    token_data: Tuple[Token, User] = Depends(verify_token_db),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Item total and items created per period, newest period first (requires
+    authentication). Read from counters kept up to date by every item write.
+    """
+    return await item_stats(db, period, limit)
+
+@router.get(
+    "/changes",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events stream"}}
+)
+async def item_changes(
+    after: Optional[int] = Query(None, ge=0, description="Replay changes after this sequence number"),
+    last_event_id: Optional[int] = Header(None, ge=0, description="Sent by EventSource when reconnecting"),
+    token_data: Tuple[Token, User] = Depends(verify_token_db)
+):
+    """
+    Stream item create/update/delete events as Server-Sent Events (requires
+    authentication). Each event's id is a sequence number; resume with
+    ``after`` or Last-Event-ID to replay what was missed. A ``reset`` event
+    means the client should reload the list.
+    """
+    return change_stream_response(last_event_id if last_event_id is not None else after)
+
+@router.get("/{item_id}", response_model=ItemResponse, dependencies=[use_replica])
 async def read_item(
     item_id: int,
+    request: Request,
+    response: Response,
     token_data: Tuple[Token, User] = Depends(verify_token_db),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get specific item (requires authentication)"""
-    item = db.query(Item).filter(Item.id == item_id).first()
-    if item is None:
-        raise HTTPException(status_code=404, detail="Item not found")
-    return item.to_dict()
+    validator = await table_versions.validator(db, "items")
+    unchanged = not_modified(request, response, validator)
+    if unchanged:
+        return unchanged
+    cache_key = f"item:{validator.version}:{item_id}"
+
+    async def fetch() -> bytes:
+        entry, version = await item_cache.get(cache_key)
+        if entry is None:
+            item = await db.get(Item, item_id)
+            if item is None:
+                raise HTTPException(status_code=404, detail="Item not found")
+            entry = await item_cache.set(cache_key, item.to_dict(), version)
+        return encode_json(entry.value)
+
+    body = await item_flights.do(cache_key, fetch)
+    return encoded_json(body, response)
 
 @router.post("/", response_model=ItemResponse)
 async def create_item(
     item: ItemCreate,
     token_data: Tuple[Token, User] = Depends(verify_token_db),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new item (requires authentication)"""
     new_item = Item(name=item.name, description=item.description)
     db.add(new_item)
-    db.commit()
-    db.refresh(new_item)
-    return new_item.to_dict()
+    await db.flush()
+    await record_changes(db, "create", [new_item.to_dict()])
+    await count_items(db, created=1)
+    await table_versions.bump(db, "items")
+    await db.commit()
+    change_hub.notify()
+    await db.refresh(new_item)
+    item_search.upsert(new_item.id, new_item.to_dict())
+    await item_cache.invalidate()
+    return trusted_json(new_item.to_dict())
 
 @router.put("/{item_id}", response_model=ItemResponse)
 async def update_item(
     item_id: int,
     item: ItemCreate,
     token_data: Tuple[Token, User] = Depends(verify_token_db),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update item (requires authentication)"""
-    db_item = db.query(Item).filter(Item.id == item_id).first()
+    db_item = await db.get(Item, item_id)
     if db_item is None:
         raise HTTPException(status_code=404, detail="Item not found")
     
@@ -60,30 +426,41 @@ async def update_item(
     db_item.description = item.description
     
     try:
-        db.commit()
-        db.refresh(db_item)
-        return db_item.to_dict()
+        await record_changes(db, "update", [db_item.to_dict()])
+        await table_versions.bump(db, "items")
+        await db.commit()
+        change_hub.notify()
+        await db.refresh(db_item)
+        item_search.upsert(db_item.id, db_item.to_dict())
+        await item_cache.invalidate()
+        return trusted_json(db_item.to_dict())
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{item_id}")
 async def delete_item(
     item_id: int,
     token_data: Tuple[Token, User] = Depends(verify_token_db),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete item (requires authentication)"""
     try:
-        item = db.query(Item).filter(Item.id == item_id).first()
+        item = await db.get(Item, item_id)
         if item is None:
             raise HTTPException(status_code=404, detail="Item not found")
         
-        db.delete(item)
-        db.commit()
+        await db.delete(item)
+        await record_changes(db, "delete", [{"id": item_id}])
+        await count_items(db, deleted=1)
+        await table_versions.bump(db, "items")
+        await db.commit()
+        change_hub.notify()
+        item_search.remove([item_id])
+        await item_cache.invalidate()
         return {"message": "Item deleted successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Failed to delete item: {str(e)}"
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional, Tuple
 from datetime import datetime, timedelta
 import uuid
 
@@ -9,8 +9,18 @@ from app.schemas.user import UserCreate, UserResponse, UserLogin, UserUpdate
 from app.models.user import User
 from app.models.token import Token
 from app.db.session import get_db
-from app.core.security import get_password_hash, create_access_token, authenticate_user
-from app.api.dependencies import verify_token_db
+from app.core.security import get_password_hash_async, create_access_token, authenticate_user, hash_token
+from app.core.token_cache import revocation_cache
+from app.core.rate_limit import rate_limit
+from app.api.dependencies import use_replica, user_rate_limit, verify_token_db
+from app.api.pagination import fetch_page, prefix_pattern, set_next_cursor
+from app.api.export import ExportFormat, export_response
+from app.api.responses import encoded_body, trusted_json
+from app.api.formats import ENCODERS, JSON, LIST_RESPONSES, negotiate_list_format, representation_validator
+from app.api.conditional import not_modified
+from app.core.versions import table_versions
+from app.core.stats import count_new_user, record_sign_in, user_stats
+from app.core.config import settings
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -20,10 +30,12 @@ router = APIRouter(prefix="/users", tags=["users"])
     status_code=status.HTTP_201_CREATED,
     responses={
         400: {"description": "Username or email already exists"},
-        422: {"description": "Validation error"}
-    }
+        422: {"description": "Validation error"},
+        429: {"description": "Too many registrations from this address"}
+    },
+    dependencies=[rate_limit("register")]
 )
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Create new user with the following requirements:
     - Username: 3-50 characters, alphanumeric with _ and -
@@ -32,10 +44,10 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     """
     try:
         # Check existing user
-        existing = db.query(User).filter(
+        existing = await db.scalar(select(User).where(
             or_(User.email == user.email.lower(),
                 User.username == user.username.lower())
-        ).first()
+        ))
 
         if existing:
             if existing.email == user.email.lower():
@@ -49,7 +61,7 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
             )
 
         # Create new user
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash_async(user.password)
         db_user = User(
             id=str(uuid.uuid4()),
             username=user.username.lower(),
@@ -59,27 +71,36 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
         )
         
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await count_new_user(db, db_user)
+        await table_versions.bump(db, "users")
+        await db.commit()
+        await db.refresh(db_user)
         return db_user.to_dict()
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating user: {str(e)}"
         )
 
-@router.post("/login", responses={401: {"description": "Invalid credentials"}})
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+@router.post(
+    "/login",
+    responses={
+        401: {"description": "Invalid credentials"},
+        429: {"description": "Too many login attempts"}
+    },
+    dependencies=[rate_limit("login")]
+)
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     """
     Login with username/email and password.
     Returns JWT token if credentials are valid.
     """
     try:
-        user = authenticate_user(db, user_credentials.login.lower(), user_credentials.password)
+        user = await authenticate_user(db, user_credentials.login.lower(), user_credentials.password)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -87,18 +108,20 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        access_token = create_access_token(data={"sub": user.username})
+        token_id = str(uuid.uuid4())
+        access_token = create_access_token(data={"sub": user.username, "jti": token_id})
         expires_at = datetime.utcnow() + timedelta(minutes=30)
         
         # Create new token
         db_token = Token(
-            id=str(uuid.uuid4()),
-            token=access_token,
+            id=token_id,
+            token_hash=hash_token(access_token),
             user_id=user.id,
             expires_at=expires_at
         )
         db.add(db_token)
-        db.commit()
+        await record_sign_in(db, user.id)
+        await db.commit()
         
         return {
             "access_token": access_token,
@@ -110,53 +133,116 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Login error: {str(e)}"
         )
 
-@router.get("/", response_model=List[UserResponse])
+@router.get("/", response_model=List[UserResponse], responses=LIST_RESPONSES, dependencies=[use_replica])
 async def read_users(
+    request: Request,
+    response: Response,
+    limit: int = Query(settings.PAGE_DEFAULT_LIMIT, ge=1, le=settings.PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    username_prefix: Optional[str] = Query(None, min_length=1, max_length=255),
+    sort: Literal["id", "username"] = "id",
+    order: Literal["asc", "desc"] = "asc",
     token_data: Tuple[Token, User] = Depends(verify_token_db),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all users (requires authentication)"""
+    """
+    Get active users a page at a time (requires authentication).
+    Send ``Accept: application/msgpack`` or ``application/vnd.apache.arrow.stream``
+    for a column-wise binary page instead of JSON.
+    """
+    media_type = negotiate_list_format(request)
     try:
-        users = db.query(User).filter(User.is_active == True).all()
-        return [user.to_dict() for user in users]
+        validator = await table_versions.validator(db, "users")
+        unchanged = not_modified(request, response, representation_validator(response, validator, media_type))
+        if unchanged:
+            return unchanged
+
+        if media_type == JSON:
+            stmt = select(User)
+        else:
+            stmt = select(User.id, User.username, User.email, User.is_active)
+        stmt = stmt.where(User.is_active == True)
+        if username_prefix:
+            stmt = stmt.where(User.username.like(prefix_pattern(username_prefix.lower()), escape="\\"))
+        columns = [User.username, User.id] if sort == "username" else [User.id]
+
+        users, next_cursor = await fetch_page(
+            db, stmt, columns, sort, order, limit, cursor, columnar=media_type != JSON
+        )
+        set_next_cursor(request, response, next_cursor)
+        if media_type != JSON:
+            return encoded_body(ENCODERS[media_type](stmt, users), media_type, response)
+        return trusted_json([user.to_dict() for user in users], response)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching users: {str(e)}"
         )
 
+@router.get("/export", dependencies=[use_replica])
+async def export_users(
+    request: Request,
+    format: ExportFormat = "ndjson",
+    token_data: Tuple[Token, User] = Depends(verify_token_db)
+):
+    """Stream every user (without password hashes) as NDJSON or CSV (requires authentication)"""
+    stmt = select(User.id, User.username, User.email, User.is_active).order_by(User.id)
+    return export_response(request, stmt, format, "users")
+
+@router.get("/stats", dependencies=[use_replica])
+async def read_user_stats(
+    period: Literal["day", "week", "month"] = "day",
+    limit: int = Query(30, ge=1, le=366, description="Number of periods in the histograms"),
+    token_data: Tuple[Token, User] = Depends(verify_token_db),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    User totals, users created per period and distinct users who signed in
+    per period, newest period first (requires authentication). Read from
+    counters kept up to date by registration and sign-in.
+    """
+    return await user_stats(db, period, limit)
+
 @router.get("/me", response_model=UserResponse)
 async def read_current_user(
     token_data: Tuple[Token, User] = Depends(verify_token_db)
 ):
     """Get current authenticated user's information"""
     _, user = token_data
-    return user.to_dict()
+    return trusted_json(user.to_dict())
 
-@router.get("/{user_id}", response_model=UserResponse)
+@router.get("/{user_id}", response_model=UserResponse, dependencies=[use_replica])
 async def read_user(
     user_id: str,
+    request: Request,
+    response: Response,
     token_data: Tuple[Token, User] = Depends(verify_token_db),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get specific user by ID (requires authentication)"""
     try:
-        user = db.query(User).filter(
+        validator = await table_versions.validator(db, "users")
+        unchanged = not_modified(request, response, validator)
+        if unchanged:
+            return unchanged
+        user = await db.scalar(select(User).where(
             User.id == user_id,
             User.is_active == True
-        ).first()
+        ))
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
-        return user.to_dict()
+        return trusted_json(user.to_dict(), response)
     except HTTPException:
         raise
     except Exception as e:
@@ -168,38 +254,40 @@ async def read_user(
 @router.post("/logout")
 async def logout(
     token_data: Tuple[Token, User] = Depends(verify_token_db),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Logout current user by revoking their token"""
     try:
         token, _ = token_data
         token.is_revoked = True
-        db.commit()
+        await db.commit()
+        revocation_cache.revoke(token.id)
         return {"message": "Successfully logged out"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error during logout: {str(e)}"
         )
 
-@router.post("/token/refresh")
+@router.post("/token/refresh", dependencies=[user_rate_limit("account")])
 async def refresh_token(
     token_data: Tuple[Token, User] = Depends(verify_token_db),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Refresh token (requires authentication)"""
     try:
         old_token, user = token_data
         
         # First create new token
-        new_access_token = create_access_token(data={"sub": user.username})
+        new_token_id = str(uuid.uuid4())
+        new_access_token = create_access_token(data={"sub": user.username, "jti": new_token_id})
         expires_at = datetime.utcnow() + timedelta(minutes=30)
         
         # Create new token record in database
         new_db_token = Token(
-            id=str(uuid.uuid4()),
-            token=new_access_token,
+            id=new_token_id,
+            token_hash=hash_token(new_access_token),
             user_id=user.id,
             expires_at=expires_at,
             is_revoked=False
@@ -208,9 +296,14 @@ async def refresh_token(
         # Add new token and revoke old token
         db.add(new_db_token)
         old_token.is_revoked = True
+        await record_sign_in(db, user.id)
         
         # Commit both changes in one transaction
-        db.commit()
+        await db.commit()
+
+        # Keep the revocation cache in step so other requests skip the DB
+        revocation_cache.revoke(old_token.id)
+        revocation_cache.put(new_db_token, user)
         
         return {
             "access_token": new_access_token,
@@ -219,17 +312,17 @@ async def refresh_token(
             "user": user.to_dict()  # Added user info in response
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error refreshing token: {str(e)}"
         )
 
-@router.put("/update", response_model=UserResponse)
+@router.put("/update", response_model=UserResponse, dependencies=[user_rate_limit("account")])
 async def update_current_user(
     user_update: UserUpdate,
     token_data: Tuple[Token, User] = Depends(verify_token_db),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update current user's information"""
     try:
@@ -237,9 +330,9 @@ async def update_current_user(
         
         # Check if username is being updated and if it's already taken
         if user_update.username and user_update.username != current_user.username:
-            existing_user = db.query(User).filter(
+            existing_user = await db.scalar(select(User).where(
                 User.username == user_update.username.lower()
-            ).first()
+            ))
             if existing_user:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -249,9 +342,9 @@ async def update_current_user(
 
         # Check if email is being updated and if it's already taken
         if user_update.email and user_update.email != current_user.email:
-            existing_user = db.query(User).filter(
+            existing_user = await db.scalar(select(User).where(
                 User.email == user_update.email.lower()
-            ).first()
+            ))
             if existing_user:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -261,14 +354,16 @@ async def update_current_user(
 
         # Update password if provided
         if user_update.password:
-            current_user.password = get_password_hash(user_update.password)
+            current_user.password = await get_password_hash_async(user_update.password)
 
         try:
-            db.commit()
-            db.refresh(current_user)
-            return current_user.to_dict()
+            await table_versions.bump(db, "users")
+            await db.commit()
+            await db.refresh(current_user)
+            revocation_cache.evict_user(current_user.id)
+            return trusted_json(current_user.to_dict())
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Database error: {str(e)}"
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, Literal, Sequence
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+from app.core.compression import choose_encoding
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def _encode_batch(rows: Sequence, fieldnames: Sequence[str], fmt: ExportFormat) -> bytes:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+    return "".join(
+        json.dumps(dict(zip(fieldnames, row)), default=str) + "\n" for row in rows
+    ).encode()
+
+async def stream_rows(stmt: Select, fmt: ExportFormat, compress: bool) -> AsyncIterator[bytes]:
+    """
+    Yield encoded rows straight off a server-side cursor.
+
+    Runs in its own session because the request's session is closed before a
+    streaming body is sent.
+    """
+    fieldnames = [column.key for column in stmt.selected_columns]
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def emit(chunk: bytes) -> bytes:
+        return compressor.compress(chunk) if compressor else chunk
+
+    if fmt == "csv":
+        yield emit(_encode_batch([fieldnames], fieldnames, fmt))
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            chunk = emit(_encode_batch(rows, fieldnames, fmt))
+            if chunk:
+                yield chunk
+
+    if compressor:
+        yield compressor.flush()
+
+def export_response(request: Request, stmt: Select, fmt: ExportFormat, filename: str) -> StreamingResponse:
+    """Stream ``stmt`` as NDJSON or CSV, gzip-encoded when the client accepts it"""
+    compress = choose_encoding(request.headers.get("accept-encoding", ""), ("gzip",)) == "gzip"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(
+        stream_rows(stmt, fmt, compress),
+        media_type=MEDIA_TYPES[fmt],
+        headers=headers
+    )
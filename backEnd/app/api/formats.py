@@ -0,0 +1,105 @@
+"""
+Column-wise binary encodings for the list endpoints, picked by the Accept header.
+
+- ``application/msgpack``: a map of column name to the array of its values
+- ``application/vnd.apache.arrow.stream``: an Arrow IPC stream holding one
+  record batch
+
+Both are built from the query's row tuples one column at a time, skipping
+the per-row dicts (``to_dict()``) of the JSON path. Each is offered only when
+its package (``msgpack``, ``pyarrow``) is installed; JSON stays the default.
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy.sql import Select
+from app.core.compression import parse_accept_encoding
+from app.core.versions import Validator
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Short names used in cache keys and ETags
+FORMAT_NAMES = {JSON: "json", MSGPACK: "msgpack", ARROW: "arrow"}
+
+# OpenAPI ``responses`` entry documenting the binary list formats
+LIST_RESPONSES = {200: {"content": {MSGPACK: {}, ARROW: {}}}}
+
+def _columns(rows: Sequence[Sequence], width: int) -> List[list]:
+    return [list(column) for column in zip(*rows)] if rows else [[] for _ in range(width)]
+
+def encode_msgpack(stmt: Select, rows: Sequence[Sequence]) -> bytes:
+    names = [column.key for column in stmt.selected_columns]
+    return msgpack.packb(dict(zip(names, _columns(rows, len(names)))))
+
+def _arrow_type(column):
+    # Typed from the column rather than the values, so empty pages keep the schema
+    return {
+        int: pyarrow.int64(),
+        bool: pyarrow.bool_(),
+        float: pyarrow.float64(),
+        datetime: pyarrow.timestamp("us"),
+    }.get(column.type.python_type, pyarrow.string())
+
+def encode_arrow(stmt: Select, rows: Sequence[Sequence]) -> bytes:
+    selected = list(stmt.selected_columns)
+    schema = pyarrow.schema([(column.key, _arrow_type(column)) for column in selected])
+    arrays = [
+        pyarrow.array(values, type=field.type)
+        for values, field in zip(_columns(rows, len(selected)), schema)
+    ]
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+    return sink.getvalue().to_pybytes()
+
+# Media type -> column-wise encoder, for the packages that are installed
+ENCODERS: Dict[str, Callable[[Select, Sequence[Sequence]], bytes]] = {}
+if msgpack is not None:
+    ENCODERS[MSGPACK] = encode_msgpack
+if pyarrow is not None:
+    ENCODERS[ARROW] = encode_arrow
+
+def negotiate_list_format(request: Request) -> str:
+    """
+    The offered media type the client's Accept header ranks highest; JSON
+    when it doesn't say or ranks several equally. 406 if none is acceptable,
+    e.g. ``Accept: text/html`` without a ``*/*`` fallback.
+    """
+    accept = request.headers.get("accept")
+    if not accept:
+        return JSON
+    # Same "value;q=weight" list syntax as Accept-Encoding
+    weights = parse_accept_encoding(accept)
+    best, best_q = None, 0.0
+    for media_type in [JSON, *ENCODERS]:
+        main_type = media_type.split("/")[0]
+        q = weights.get(media_type, weights.get(f"{main_type}/*", weights.get("*/*", 0.0)))
+        if q > best_q:
+            best, best_q = media_type, q
+    if best is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Available media types: {', '.join([JSON, *ENCODERS])}"
+        )
+    return best
+
+def representation_validator(response: Response, validator: Validator, media_type: str) -> Validator:
+    """
+    Mark ``response`` as varying by Accept and return the validator of the
+    ``media_type`` representation, whose ETag differs from the JSON one.
+    """
+    response.headers["Vary"] = "Accept"
+    return validator if media_type == JSON else validator.variant(FORMAT_NAMES[media_type])
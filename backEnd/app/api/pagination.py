@@ -0,0 +1,90 @@
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+
+def encode_cursor(sort: str, order: str, values: Sequence[Any]) -> str:
+    """Pack the sort key of the last row into an opaque, URL-safe cursor"""
+    raw = json.dumps({"s": sort, "o": order, "k": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _is_a(value: Any, python_type: type) -> bool:
+    # JSON booleans would otherwise pass as ints
+    return isinstance(value, python_type) and not isinstance(value, bool)
+
+def decode_cursor(cursor: str, sort: str, order: str, types: Optional[Sequence[type]] = None) -> List[Any]:
+    """
+    Unpack a cursor, rejecting ones that were issued for a different sort or,
+    given the sort columns' Python ``types``, whose key values don't match them.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = data["k"]
+        valid = data["s"] == sort and data["o"] == order and isinstance(values, list)
+        if valid and types is not None:
+            valid = len(values) == len(types) and all(map(_is_a, values, types))
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        valid = False
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+def prefix_pattern(prefix: str) -> str:
+    """LIKE pattern for a literal prefix, so it can use a B-tree index range"""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+def keyset_after(columns: Sequence[ColumnElement], values: Sequence[Any], descending: bool) -> ColumnElement:
+    """Rows strictly after ``values`` in (columns...) order, expanded so MySQL can range-scan"""
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [c == v for c, v in zip(columns[:i], values[:i])]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+async def fetch_page(
+    db: AsyncSession,
+    stmt: Select,
+    columns: Sequence[ColumnElement],
+    sort: str,
+    order: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    columnar: bool = False
+) -> Tuple[list, Optional[str]]:
+    """
+    Run a keyset-paginated query, returning one page of rows and the next
+    cursor. Rows are the first column's values (e.g. ORM objects), or whole
+    row tuples with ``columnar``.
+    """
+    descending = order == "desc"
+    if cursor:
+        values = decode_cursor(cursor, sort, order, [c.type.python_type for c in columns])
+        stmt = stmt.where(keyset_after(columns, values, descending))
+
+    stmt = stmt.order_by(*[c.desc() if descending else c.asc() for c in columns]).limit(limit + 1)
+    result = await db.execute(stmt)
+    rows = result.all() if columnar else result.scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, order, [getattr(rows[-1], c.key) for c in columns])
+    return rows, next_cursor
+
+def set_next_cursor(request: Request, response: Response, next_cursor: Optional[str]) -> None:
+    """Expose the next cursor via ``X-Next-Cursor`` and an RFC 8288 ``Link`` header"""
+    if next_cursor:
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
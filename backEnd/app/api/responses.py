@@ -0,0 +1,47 @@
+"""
+orjson responses for handlers whose payload is already in its final shape.
+
+Handlers keep ``response_model`` for the OpenAPI schema, but a dict built by
+``to_dict()`` from an ORM row already has exactly that shape. Returned as-is,
+FastAPI would validate it against the model, dump it back to a dict and only
+then encode it; ``trusted_json`` skips straight to a single orjson encode.
+"""
+from typing import Any, Optional
+import orjson
+from fastapi import Response, status
+from fastapi.responses import ORJSONResponse
+
+def copy_headers(target: Response, response: Optional[Response]) -> Response:
+    """
+    Add the headers set on the handler's injected ``response`` to ``target``.
+    Copied from raw_headers, which keeps repeated headers such as several
+    Set-Cookie that a dict of the headers would collapse into one.
+    """
+    if response is not None:
+        target.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers
+            if name not in (b"content-length", b"content-type")
+        )
+    return target
+
+def trusted_json(
+    content: Any,
+    response: Optional[Response] = None,
+    status_code: int = status.HTTP_200_OK
+) -> ORJSONResponse:
+    """
+    Encode ``content`` without response_model validation. Pass the handler's
+    injected ``response`` so headers set on it (cursors, validators) are kept.
+    """
+    return copy_headers(ORJSONResponse(content, status_code=status_code), response)
+
+def encode_json(content: Any) -> bytes:
+    """The body ``trusted_json`` would send, for callers that reuse it across responses"""
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+def encoded_json(body: bytes, response: Optional[Response] = None) -> Response:
+    """Send a body already produced by ``encode_json``"""
+    return encoded_body(body, "application/json", response)
+
+def encoded_body(body: bytes, media_type: str, response: Optional[Response] = None) -> Response:
+    return copy_headers(Response(body, media_type=media_type), response)
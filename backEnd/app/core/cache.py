@@ -0,0 +1,136 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+
+class CacheBackend(ABC):
+    """
+    Minimal key/value store interface used by the read-through caches.
+    Methods are async so that a network store (e.g. Redis) can implement it.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Any: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int: ...
+
+    @abstractmethod
+    async def clear(self) -> None: ...
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU store with per-entry TTL"""
+
+    def __init__(self, maxsize: int = 10000, default_ttl: Optional[int] = None):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        with self._lock:
+            value, _ = self._entries.get(key, (0, None))
+            self._entries[key] = (value + 1, None)
+            self._entries.move_to_end(key)
+            return value + 1
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+# Backend name (ITEM_CACHE_BACKEND) -> factory taking (maxsize, ttl)
+CACHE_BACKENDS: Dict[str, Callable[[int, int], CacheBackend]] = {
+    "memory": MemoryCacheBackend,
+}
+
+def register_cache_backend(name: str, factory: Callable[[int, int], CacheBackend]) -> None:
+    CACHE_BACKENDS[name] = factory
+
+def create_cache_backend(name: str, maxsize: int, ttl: int) -> CacheBackend:
+    if name not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend '{name}'")
+    return CACHE_BACKENDS[name](maxsize, ttl)
+
+@dataclass
+class CacheEntry:
+    """A cached representation"""
+    value: Any
+
+class VersionedCache:
+    """
+    Read-through cache for one table, namespaced by a version number.
+
+    Every write bumps the version, which makes all earlier entries unreachable
+    (they age out of the LRU). Readers pass the version they saw *before*
+    querying the DB, so a read racing a write can never store stale data under
+    the new version.
+    """
+
+    def __init__(self, namespace: str, backend: CacheBackend, enabled: bool = True):
+        self.namespace = namespace
+        self.backend = backend
+        self.enabled = enabled
+
+    async def version(self) -> int:
+        return await self.backend.get(f"{self.namespace}:version") or 0
+
+    async def get(self, key: str) -> Tuple[Optional[CacheEntry], int]:
+        """Return the cached entry (if any) and the current version"""
+        if not self.enabled:
+            return None, 0
+        version = await self.version()
+        return await self.backend.get(f"{self.namespace}:{version}:{key}"), version
+
+    async def set(self, key: str, value: Any, version: int) -> CacheEntry:
+        entry = CacheEntry(value)
+        if self.enabled:
+            await self.backend.set(f"{self.namespace}:{version}:{key}", entry)
+        return entry
+
+    async def invalidate(self) -> None:
+        if self.enabled:
+            await self.backend.incr(f"{self.namespace}:version")
+
+item_cache = VersionedCache(
+    "items",
+    create_cache_backend(
+        settings.ITEM_CACHE_BACKEND,
+        settings.ITEM_CACHE_SIZE,
+        settings.ITEM_CACHE_TTL_SECONDS
+    ),
+    enabled=settings.ITEM_CACHE_ENABLED
+)
@@ -0,0 +1,148 @@
+"""
+Item change feed: a changelog table plus a per-worker fan-out hub.
+
+Item writes call ``record_changes`` inside their transaction, so an event
+exists exactly when its change committed. Each worker runs one poller that
+reads new log rows (every ITEM_CHANGES_POLL_SECONDS, or as soon as this
+worker commits a change) and copies them into an in-memory queue per
+subscriber. Idle subscribers therefore cost a queue each, not a database
+connection; the database sees one query per poll per worker however many
+clients are listening.
+
+Sequence numbers are auto-increment values, which concurrent transactions
+may commit out of order. When the poller finds a hole in the sequence it
+holds back later rows for up to GAP_WAIT_SECONDS, in case the missing one is
+still being committed, before skipping past it (rolled-back transactions
+leave permanent holes).
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Set
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.metrics import ITEM_CHANGE_SUBSCRIBERS, request_db_stats
+from app.db.session import AsyncSessionLocal
+from app.models.item_change import ItemChange
+
+logger = logging.getLogger(__name__)
+
+GAP_WAIT_SECONDS = 5.0
+
+async def record_changes(db: AsyncSession, op: str, items: Iterable[dict]) -> None:
+    """
+    Log ``op`` ("create", "update" or "delete") for each item dict in the
+    caller's transaction. Deletes only need the ``id`` key.
+    """
+    rows = [
+        {"item_id": item["id"], "op": op, "data": None if op == "delete" else item}
+        for item in items
+    ]
+    if rows:
+        await db.execute(insert(ItemChange), rows)
+
+async def latest_sequence(db: AsyncSession) -> int:
+    return await db.scalar(select(func.max(ItemChange.seq))) or 0
+
+async def oldest_sequence(db: AsyncSession) -> Optional[int]:
+    return await db.scalar(select(func.min(ItemChange.seq)))
+
+async def fetch_changes(db: AsyncSession, after: int, limit: int, upto: Optional[int] = None) -> List[dict]:
+    stmt = select(ItemChange).where(ItemChange.seq > after)
+    if upto is not None:
+        stmt = stmt.where(ItemChange.seq <= upto)
+    changes = await db.scalars(stmt.order_by(ItemChange.seq).limit(limit))
+    return [change.to_dict() for change in changes]
+
+@dataclass(eq=False)
+class Subscription:
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(settings.ITEM_CHANGES_QUEUE_SIZE))
+    # Set when the queue overflowed; the stream should end so the client resumes from the log
+    dropped: bool = False
+
+class ChangeHub:
+    """Polls the change log once per worker and fans new entries out to subscribers"""
+
+    def __init__(self, poll_seconds: float, batch_size: int = 500):
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        # Highest sequence number handed to subscribers
+        self.last_seq = 0
+        self._subscribers: Set[Subscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._start_lock = asyncio.Lock()
+        self._gap_since: Optional[float] = None
+
+    async def subscribe(self) -> Subscription:
+        subscription = Subscription()
+        self._subscribers.add(subscription)
+        ITEM_CHANGE_SUBSCRIBERS.inc()
+        try:
+            await self._ensure_running()
+        except BaseException:
+            self.unsubscribe(subscription)
+            raise
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.discard(subscription)
+            ITEM_CHANGE_SUBSCRIBERS.dec()
+
+    def notify(self) -> None:
+        """Poll now instead of at the next interval; called after this worker commits a change"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _ensure_running(self) -> None:
+        async with self._start_lock:
+            if self._task is not None and not self._task.done():
+                return
+            # Nobody was listening, so there is nothing to catch up on
+            async with AsyncSessionLocal() as db:
+                self.last_seq = await latest_sequence(db)
+            self._gap_since = None
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        # The task inherits the first subscriber's request context; keep its queries off that request
+        request_db_stats.set(None)
+        while self._subscribers:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._poll()
+            except Exception:
+                logger.exception("Item change feed poll failed")
+
+    async def _poll(self) -> None:
+        async with AsyncSessionLocal() as db:
+            changes = await fetch_changes(db, self.last_seq, self.batch_size)
+        for change in changes:
+            if change["seq"] != self.last_seq + 1:
+                if self._gap_since is None:
+                    self._gap_since = time.monotonic()
+                if time.monotonic() - self._gap_since < GAP_WAIT_SECONDS:
+                    return
+            self._gap_since = None
+            self.last_seq = change["seq"]
+            self._publish(change)
+        if len(changes) == self.batch_size:
+            self._wakeup.set()
+
+    def _publish(self, change: dict) -> None:
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(change)
+            except asyncio.QueueFull:
+                subscription.dropped = True
+                self.unsubscribe(subscription)
+
+change_hub = ChangeHub(settings.ITEM_CHANGES_POLL_SECONDS)
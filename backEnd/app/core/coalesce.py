@@ -0,0 +1,72 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+The first request for a key (the leader) runs the fetch; requests arriving
+with the same key while it is in flight wait for its result instead of
+running their own query, and receive the same value (or the same
+exception). A follower that waits longer than ``max_wait`` stops waiting and
+fetches for itself, so one slow query cannot stall a growing queue behind
+it. If the leader is cancelled (its client disconnected) its followers fetch
+for themselves too.
+
+Keys must capture everything the result depends on, including the table
+version, so a fetch started before a write is never shared with a request
+that arrived after it. Coalescing is per worker and keeps nothing once a
+flight lands; the read caches hold results beyond that.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from app.core.config import settings
+from app.core.metrics import COALESCED_REQUESTS
+
+class _Abandoned(Exception):
+    """Set on a flight whose leader was cancelled"""
+
+class SingleFlight:
+    def __init__(self, name: str, max_wait: float, enabled: bool = True):
+        # Label of the coalesced_requests_total metric
+        self.name = name
+        self.max_wait = max_wait
+        self.enabled = enabled
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return ``fetch()``, sharing one call among concurrent callers with the same key"""
+        if not self.enabled:
+            return await fetch()
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(flight), self.max_wait)
+            except (asyncio.TimeoutError, _Abandoned):
+                COALESCED_REQUESTS.labels(self.name, "timeout").inc()
+                return await fetch()
+            except Exception:
+                COALESCED_REQUESTS.labels(self.name, "shared").inc()
+                raise
+            COALESCED_REQUESTS.labels(self.name, "shared").inc()
+            return result
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        COALESCED_REQUESTS.labels(self.name, "leader").inc()
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            flight.set_exception(_Abandoned())
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+            # Mark the exception retrieved so a flight nobody joined doesn't log a warning
+            flight.exception()
+
+item_flights = SingleFlight(
+    "items", settings.ITEM_COALESCE_MAX_WAIT_SECONDS, enabled=settings.ITEM_COALESCE_ENABLED
+)
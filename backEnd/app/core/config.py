@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 from dotenv import load_dotenv
 
@@ -12,16 +12,160 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     API_V1_STR: str = "/api/v1"
     
+    # Server settings (used by serve.py)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    # 0 starts one worker per CPU available to the process
+    SERVER_WORKERS: int = 0
+    # "auto" picks uvloop/httptools when installed
+    SERVER_LOOP: str = "auto"
+    SERVER_HTTP: str = "auto"
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_BACKLOG: int = 2048
+    # Seconds in-flight requests get to finish after SIGTERM
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    # Import the app once in the master so forked workers share its memory
+    SERVER_PRELOAD: bool = False
+
     # Database settings
     DATABASE_URL: str
+    # Derived from DATABASE_URL (e.g. mysql+aiomysql, sqlite+aiosqlite) when unset
+    ASYNC_DATABASE_URL: Optional[str] = None
     DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    # Recycle connections before MySQL's wait_timeout closes them server-side
+    DB_POOL_RECYCLE: int = 1800
+    # Ping on every checkout; with DB_POOL_RECYCLE below wait_timeout this can be disabled
+    DB_POOL_PRE_PING: bool = True
+    # Pool for the sync engine used by startup and background jobs
+    DB_SYNC_POOL_SIZE: int = 2
+    # Read replicas, as sync URLs like DATABASE_URL. GET endpoints that opt in read
+    # from them unless the client wrote recently; writes always go to DATABASE_URL
+    DATABASE_REPLICA_URLS: List[str] = []
+    # Replicas further behind the primary than this are taken out of rotation
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_CHECK_SECONDS: float = 1.0
+    # Create/upgrade tables when a worker starts. Turn off on production workers
+    # when `python -m app.db.migrations` runs as a separate deploy step
+    DB_SCHEMA_SYNC_ON_STARTUP: bool = True
     
     # Security settings
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
     MIN_PASSWORD_LENGTH: int = 8  # Added this line
+
+    # Password hashing settings
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    # Hash/verify calls allowed to wait for a worker before requests get a 429
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
+
+    # Token verification settings
+    # "db" checks every request against the tokens table, "stateless" trusts the
+    # signed JWT and only hits the database when the revocation cache misses
+    TOKEN_VERIFY_MODE: str = "db"
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 60
     
+    # Background token cleanup
+    TOKEN_CLEANUP_ENABLED: bool = True
+    TOKEN_CLEANUP_INTERVAL_SECONDS: int = 300
+    TOKEN_CLEANUP_BATCH_SIZE: int = 1000
+    TOKEN_CLEANUP_MAX_BATCHES: int = 100
+    # "table" purges expired tokens with batched deletes; "partitioned" range-partitions
+    # tokens by expiry ("day" or "hour" each) and the cleanup job drops expired partitions
+    TOKEN_STORAGE: str = "table"
+    TOKEN_PARTITION_INTERVAL: str = "day"
+    # Partitions kept ready beyond the current one
+    TOKEN_PARTITIONS_AHEAD: int = 3
+
+    # Serve Prometheus metrics at /metrics
+    METRICS_ENABLED: bool = True
+
+    # Request profiling (read through /admin/profiles)
+    PROFILING_ENABLED: bool = False
+    # Capture requests slower than this with their SQL and a stack sample, and profile
+    # the next request to the same path; 0 disables the latency trigger
+    PROFILING_SLOW_THRESHOLD_MS: int = 500
+    # Fraction of requests run under cProfile
+    PROFILING_SAMPLE_RATE: float = 0.0
+    # Values accepted in the X-Profile request header
+    PROFILING_TOKENS: List[str] = []
+    PROFILING_BUFFER_SIZE: int = 50
+    PROFILING_TOP_FUNCTIONS: int = 40
+
+    # Usernames allowed to call the /admin endpoints
+    ADMIN_USERNAMES: List[str] = []
+
+    # Rate limiting, see app/core/rate_limit.py
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORE: str = "memory"
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    # Buckets kept per worker by the memory store
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # Route name -> rules as "<ip|login|user>:<count>/<second|minute|hour|day>"
+    RATE_LIMITS: Dict[str, List[str]] = {
+        "login": ["ip:20/minute", "login:10/minute"],
+        "register": ["ip:10/minute"],
+        "oauth": ["ip:20/minute"],
+        "account": ["user:30/minute"],
+    }
+
+    # Pagination settings
+    PAGE_DEFAULT_LIMIT: int = 50
+    PAGE_MAX_LIMIT: int = 500
+
+    # Rows fetched per server-side cursor batch by the export endpoints
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Item read cache settings
+    ITEM_CACHE_ENABLED: bool = True
+    ITEM_CACHE_BACKEND: str = "memory"
+    ITEM_CACHE_SIZE: int = 10000
+    ITEM_CACHE_TTL_SECONDS: int = 30
+    # Concurrent identical item reads share one fetch and one encoded body; a request
+    # waits at most this long for another's fetch before running its own
+    ITEM_COALESCE_ENABLED: bool = True
+    ITEM_COALESCE_MAX_WAIT_SECONDS: float = 2.0
+
+    # Item search: "auto" uses MySQL FULLTEXT on MySQL and an in-process index elsewhere
+    ITEM_SEARCH_BACKEND: str = "auto"
+    # Reload the in-process index this often to pick up other workers' writes; 0 never
+    ITEM_SEARCH_REBUILD_SECONDS: int = 300
+
+    # Seconds each worker reuses a table's change counter (the ETag source) before
+    # re-reading it; its own writes are visible immediately
+    TABLE_VERSION_CACHE_SECONDS: float = 1.0
+
+    # Response compression: brotli (when installed) or gzip, as the client accepts
+    COMPRESSION_ENABLED: bool = True
+    # Smaller bodies are sent as-is
+    COMPRESSION_MINIMUM_SIZE: int = 1000
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Item change feed (GET /items/changes)
+    # How often each worker reads the change log for writes served by other workers
+    ITEM_CHANGES_POLL_SECONDS: float = 1.0
+    # Comment lines sent on idle streams so proxies keep them open
+    ITEM_CHANGES_HEARTBEAT_SECONDS: int = 15
+    # Events buffered per subscriber; a slower client is disconnected and resumes from the log
+    ITEM_CHANGES_QUEUE_SIZE: int = 1000
+    # Most events replayed on resume; further behind, the client is told to reload
+    ITEM_CHANGES_REPLAY_LIMIT: int = 1000
+    ITEM_CHANGES_RETENTION_HOURS: int = 24
+    ITEM_CHANGES_PRUNE_INTERVAL_SECONDS: int = 3600
+    ITEM_CHANGES_PRUNE_BATCH_SIZE: int = 1000
+    ITEM_CHANGES_PRUNE_MAX_BATCHES: int = 100
+
+    # Recount the /items/stats and /users/stats counters this often to correct drift; 0 never
+    STATS_RECONCILE_INTERVAL_SECONDS: int = 3600
+
+    # Maximum rows accepted by a single bulk item request
+    BULK_MAX_ITEMS: int = 1000
+
     # OAuth2 settings
     GOOGLE_CLIENT_ID: Optional[str] = None
     GOOGLE_CLIENT_SECRET: Optional[str] = None
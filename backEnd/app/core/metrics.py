@@ -0,0 +1,161 @@
+"""
+Prometheus metrics: HTTP request latency and concurrency, DB query counts and
+time per request, bcrypt/JWT timings and event loop lag.
+
+Set PROMETHEUS_MULTIPROC_DIR when running several workers so /metrics
+aggregates all of them.
+"""
+import asyncio
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled", ["method"],
+    multiprocess_mode="livesum"
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Time spent executing a single SQL statement",
+    buckets=LATENCY_BUCKETS
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request", ["route"],
+    buckets=QUERY_COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "Total SQL execution time per HTTP request", ["route"],
+    buckets=LATENCY_BUCKETS
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    "password_hash_duration_seconds", "bcrypt CPU time per operation", ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_seconds", "Time a bcrypt call waited for a pool worker",
+    buckets=LATENCY_BUCKETS
+)
+JWT_LATENCY = Histogram(
+    "jwt_duration_seconds", "JWT encode/decode time", ["operation"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+)
+RATE_LIMITED = Counter(
+    "rate_limited_requests_total", "Requests rejected with 429 by a rate limit", ["limit", "key"]
+)
+# outcome: leader (ran the fetch), shared (used a leader's result), timeout (gave up waiting)
+COALESCED_REQUESTS = Counter(
+    "coalesced_requests_total", "Reads passed through single-flight coalescing", ["flight", "outcome"]
+)
+ITEM_CHANGE_SUBSCRIBERS = Gauge(
+    "item_change_subscribers", "Clients connected to the item change feed",
+    multiprocess_mode="livesum"
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "Delay of a periodic event loop tick beyond its schedule",
+    buckets=LATENCY_BUCKETS
+)
+
+@dataclass
+class RequestDBStats:
+    queries: int = 0
+    seconds: float = 0.0
+    # (statement, seconds) pairs, only collected when a profiler asks for them
+    statements: Optional[List[Tuple[str, float]]] = None
+
+# Set by the metrics/profiling middleware for the duration of each HTTP request
+request_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement and attribute it to the current request, if any"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_QUERY_LATENCY.observe(elapsed)
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+            if stats.statements is not None:
+                stats.statements.append((statement, elapsed))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("query_start") if context.connection else None
+        if starts:
+            starts.pop()
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and DB usage per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        stats = RequestDBStats()
+        token = request_db_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.labels(method).inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_PROGRESS.labels(method).dec()
+            request_db_stats.reset(token)
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.seconds)
+
+async def monitor_event_loop(interval: float = 0.5) -> None:
+    """Measure how late the loop wakes a sleeping task; blocking code shows up here"""
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - scheduled))
+
+def render_metrics() -> tuple:
+    """Prometheus text exposition of every metric, aggregated across workers if configured"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,26 +1,39 @@
-from authlib.integrations.starlette_client import OAuth
+"""
+Social login clients, registered on first use.
+
+Importing authlib's Starlette integration costs a few hundred milliseconds and
+most workers never serve an OAuth redirect, so nothing is imported or
+registered until a login route asks for a client. Provider metadata (Google's
+OpenID configuration) is fetched by authlib on the client's first request.
+"""
+from functools import lru_cache
 from app.core.config import settings
 
-oauth = OAuth()
+@lru_cache(maxsize=None)
+def get_oauth():
+    from authlib.integrations.starlette_client import OAuth
+
+    oauth = OAuth()
 
-# Configure Google OAuth
-oauth.register(
-    name='google',
-    client_id=settings.GOOGLE_CLIENT_ID,
-    client_secret=settings.GOOGLE_CLIENT_SECRET,
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={'scope': 'openid email profile'}
-)
+    # Configure Google OAuth
+    oauth.register(
+        name='google',
+        client_id=settings.GOOGLE_CLIENT_ID,
+        client_secret=settings.GOOGLE_CLIENT_SECRET,
+        server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+        client_kwargs={'scope': 'openid email profile'}
+    )
 
-# Configure GitHub OAuth
-oauth.register(
-    name='github',
-    client_id=settings.GITHUB_CLIENT_ID,
-    client_secret=settings.GITHUB_CLIENT_SECRET,
-    access_token_url='https://github.com/login/oauth/access_token',
-    access_token_params=None,
-    authorize_url='https://github.com/login/oauth/authorize',
-    authorize_params=None,
-    api_base_url='https://api.github.com/',
-    client_kwargs={'scope': 'user:email'},
-)
\ No newline at end of file
+    # Configure GitHub OAuth
+    oauth.register(
+        name='github',
+        client_id=settings.GITHUB_CLIENT_ID,
+        client_secret=settings.GITHUB_CLIENT_SECRET,
+        access_token_url='https://github.com/login/oauth/access_token',
+        access_token_params=None,
+        authorize_url='https://github.com/login/oauth/authorize',
+        authorize_params=None,
+        api_base_url='https://api.github.com/',
+        client_kwargs={'scope': 'user:email'},
+    )
+    return oauth
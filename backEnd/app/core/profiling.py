@@ -0,0 +1,199 @@
+"""
+Opt-in per-request profiling (PROFILING_ENABLED).
+
+cProfile slows down everything it traces, so it only runs for requests that
+ask for it: those sending ``X-Profile: <token>`` with a token from
+PROFILING_TOKENS and the PROFILING_SAMPLE_RATE fraction of traffic. Every
+other request is only timed. One slower than PROFILING_SLOW_THRESHOLD_MS is
+captured with its SQL and a sample of its stack taken when it crossed the
+threshold, and the next request to the same path gets a full call profile.
+Captures are kept in a bounded ring buffer read through the admin endpoints.
+
+cProfile traces the whole thread, so one request is profiled at a time per
+worker and the profile also shows other coroutines that ran on the event loop
+meanwhile. Requests that qualify while the profiler is busy are still recorded
+with their SQL, just without a call profile. The stack sample shows where the
+request was suspended (usually an await on the database); a request that
+blocks the event loop is sampled at its next await instead.
+"""
+import asyncio
+import cProfile
+import hmac
+import io
+import itertools
+import pstats
+import random
+import threading
+import time
+import traceback
+from collections import deque
+from typing import List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.metrics import RequestDBStats, request_db_stats
+
+MAX_STATEMENT_LENGTH = 2000
+STACK_SAMPLE_DEPTH = 30
+# Paths waiting for a follow-up profile, bounding memory under many distinct slow paths
+MAX_ARMED_PATHS = 1000
+
+class ProfileStore:
+    """Fixed-size ring buffer of captured request profiles"""
+
+    def __init__(self, maxsize: int):
+        self._profiles = deque(maxlen=maxsize)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, profile: dict) -> dict:
+        with self._lock:
+            profile["id"] = next(self._ids)
+            self._profiles.append(profile)
+        return profile
+
+    def list(self) -> List[dict]:
+        """Newest first, without the bulky profile and SQL bodies"""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [
+            {key: value for key, value in profile.items() if key not in ("profile", "sql")}
+            for profile in reversed(profiles)
+        ]
+
+    def get(self, profile_id: int) -> Optional[dict]:
+        with self._lock:
+            return next((p for p in self._profiles if p["id"] == profile_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+profile_store = ProfileStore(settings.PROFILING_BUFFER_SIZE)
+
+def _format_profile(profiler: cProfile.Profile) -> str:
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats("cumulative").print_stats(settings.PROFILING_TOP_FUNCTIONS)
+    return stream.getvalue()
+
+def _header_trigger(scope) -> bool:
+    if not settings.PROFILING_TOKENS:
+        return False
+    for name, value in scope.get("headers", []):
+        if name == b"x-profile":
+            supplied = value.decode("latin-1")
+            return any(hmac.compare_digest(supplied, token) for token in settings.PROFILING_TOKENS)
+    return False
+
+def _stack_sample(task: asyncio.Task) -> str:
+    """Where ``task`` is suspended, innermost frame last, like a traceback"""
+    # Task.get_stack() only returns the outer frame of a suspended coroutine, so
+    # follow the chain of awaits down to the future it is waiting on
+    frames = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is not None:
+            frames.append(traceback.FrameSummary(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return "".join(traceback.format_list(frames[-STACK_SAMPLE_DEPTH:]))
+
+class ProfilingMiddleware:
+    """ASGI middleware capturing call profiles and SQL for flagged, sampled or slow requests"""
+
+    def __init__(self, app):
+        self.app = app
+        self._profiler_busy = False
+        # (method, path) of slow requests whose next occurrence gets a call profile
+        self._armed: Set[Tuple[str, str]] = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["method"], scope["path"])
+        if _header_trigger(scope):
+            trigger = "header"
+        elif settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            trigger = "sampled"
+        elif key in self._armed:
+            trigger = "after_slow"
+        else:
+            trigger = None
+
+        # Share the metrics middleware's per-request stats when it is installed
+        stats = request_db_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestDBStats()
+            token = request_db_stats.set(stats)
+        stats.statements = []
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profiler = None
+        if trigger and not self._profiler_busy:
+            try:
+                profiler = cProfile.Profile()
+                profiler.enable()
+                self._profiler_busy = True
+                self._armed.discard(key)
+            except ValueError:
+                # Another profiler (e.g. a debugger) already owns the thread
+                profiler = None
+
+        # Untraced requests get a timer that samples their stack if they turn out slow
+        stack = None
+        sampler = None
+        if profiler is None and settings.PROFILING_SLOW_THRESHOLD_MS:
+            task = asyncio.current_task()
+
+            def sample():
+                nonlocal stack
+                stack = _stack_sample(task)
+
+            sampler = asyncio.get_running_loop().call_later(settings.PROFILING_SLOW_THRESHOLD_MS / 1000, sample)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if sampler is not None:
+                sampler.cancel()
+            if profiler is not None:
+                profiler.disable()
+                self._profiler_busy = False
+            if token is not None:
+                request_db_stats.reset(token)
+
+            if trigger is None and settings.PROFILING_SLOW_THRESHOLD_MS and \
+                    elapsed_ms >= settings.PROFILING_SLOW_THRESHOLD_MS:
+                trigger = "slow"
+                if len(self._armed) < MAX_ARMED_PATHS:
+                    self._armed.add(key)
+            if trigger:
+                profile_store.add({
+                    "timestamp": time.time(),
+                    "trigger": trigger,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": getattr(scope.get("route"), "path", None),
+                    "status": status_code,
+                    "duration_ms": round(elapsed_ms, 3),
+                    "sql_count": len(stats.statements),
+                    "sql_ms": round(sum(seconds for _, seconds in stats.statements) * 1000, 3),
+                    "sql": [
+                        {"statement": statement[:MAX_STATEMENT_LENGTH], "duration_ms": round(seconds * 1000, 3)}
+                        for statement, seconds in stats.statements
+                    ],
+                    "profile": _format_profile(profiler) if profiler is not None else None,
+                    "stack": stack,
+                })
+            stats.statements = None
@@ -0,0 +1,177 @@
+"""
+Token-bucket rate limiting for expensive or abusable routes.
+
+Routes opt in with ``dependencies=[rate_limit("<name>")]``; the rules for each
+name come from the RATE_LIMITS setting, e.g. ``"login": ["ip:20/minute",
+"login:10/minute"]``. A rule allows bursts of up to <count> requests and
+refills at <count> per <period>. Buckets are keyed by
+
+- ``ip``: the client address (uvicorn's --forwarded-allow-ips decides whether
+  proxy headers are trusted),
+- ``login``: the ``login`` field of the JSON body, lower-cased,
+- ``user``: the id of the authenticated user. Routes with ``user`` rules use
+  ``user_rate_limit`` from app.api.dependencies, which verifies the bearer
+  token first; plain ``rate_limit`` skips these rules.
+
+The check runs as a route dependency, before the handler touches bcrypt.
+Buckets live in process memory by default, so each worker enforces its own
+share; set RATE_LIMIT_STORE=redis (needs the ``redis`` package) to
+share them across workers and hosts.
+"""
+import math
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from app.core.config import settings
+from app.core.metrics import RATE_LIMITED
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+RULE_PATTERN = re.compile(r"^(ip|login|user):(\d+)/(second|minute|hour|day)$")
+MAX_IDENTITY_LENGTH = 255
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    key: str
+    capacity: int
+    # Tokens added back per second
+    rate: float
+
+def parse_rule(rule: str) -> RateLimitRule:
+    match = RULE_PATTERN.match(rule.strip())
+    if not match:
+        raise ValueError(f"Invalid rate limit rule '{rule}', expected e.g. 'ip:20/minute'")
+    key, count, period = match.groups()
+    return RateLimitRule(key, int(count), int(count) / PERIODS[period])
+
+class RateLimitStore(ABC):
+    """Bucket storage; a shared store makes limits hold across workers"""
+
+    @abstractmethod
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        """Take one token from the bucket; return 0 if granted, else seconds until one is available"""
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Per-process buckets, least recently used ones dropped beyond ``maxsize``"""
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+# Refill and take atomically on the server, timed by the Redis clock so that
+# every worker sees the same bucket state
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+class RedisRateLimitStore(RateLimitStore):
+    """Buckets shared through Redis (RATE_LIMIT_REDIS_URL)"""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_STORE=redis requires the 'redis' package") from e
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        return float(await self._script(keys=[f"ratelimit:{key}"], args=[capacity, rate]))
+
+# Store name (RATE_LIMIT_STORE) -> factory
+RATE_LIMIT_STORES: Dict[str, Callable[[], RateLimitStore]] = {
+    "memory": lambda: MemoryRateLimitStore(settings.RATE_LIMIT_MAX_KEYS),
+    "redis": lambda: RedisRateLimitStore(settings.RATE_LIMIT_REDIS_URL),
+}
+
+def register_rate_limit_store(name: str, factory: Callable[[], RateLimitStore]) -> None:
+    RATE_LIMIT_STORES[name] = factory
+
+@lru_cache(maxsize=None)
+def get_rate_limit_store() -> RateLimitStore:
+    if settings.RATE_LIMIT_STORE not in RATE_LIMIT_STORES:
+        raise ValueError(f"Unknown rate limit store '{settings.RATE_LIMIT_STORE}'")
+    return RATE_LIMIT_STORES[settings.RATE_LIMIT_STORE]()
+
+@lru_cache(maxsize=None)
+def rules_for(name: str) -> List[RateLimitRule]:
+    return [parse_rule(rule) for rule in settings.RATE_LIMITS.get(name, [])]
+
+async def _identity(key: str, request: Request, user_id: Optional[str]) -> Optional[str]:
+    if key == "ip":
+        return request.client.host if request.client else None
+    if key == "login":
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        login = body.get("login") if isinstance(body, dict) else None
+        return login.lower()[:MAX_IDENTITY_LENGTH] if isinstance(login, str) else None
+    if key == "user":
+        return user_id
+    return None
+
+async def check_rate_limit(name: str, request: Request, user_id: Optional[str] = None) -> None:
+    """
+    Raise 429 with Retry-After if any of ``name``'s buckets for this request is
+    empty. ``user`` rules apply when the caller passes the authenticated ``user_id``.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    store = get_rate_limit_store()
+    for rule in rules_for(name):
+        identity = await _identity(rule.key, request, user_id)
+        if identity is None:
+            continue
+        wait = await store.take(f"{name}:{rule.key}:{identity}", rule.capacity, rule.rate)
+        if wait > 0:
+            RATE_LIMITED.labels(name, rule.key).inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+def rate_limit(name: str):
+    """Route dependency enforcing the RATE_LIMITS rules configured under ``name``"""
+    async def dependency(request: Request) -> None:
+        await check_rate_limit(name, request)
+    return Depends(dependency)
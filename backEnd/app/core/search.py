@@ -0,0 +1,263 @@
+"""
+Ranked full-text search over item names and descriptions.
+
+On MySQL the search runs against an InnoDB FULLTEXT index, which the database
+keeps current itself. Other backends (SQLite in development) use an in-process
+inverted index scored with BM25. It is built from the table on first use and
+then updated incrementally by the item write endpoints; because each worker
+holds its own copy, it is also rebuilt in the background every
+ITEM_SEARCH_REBUILD_SECONDS to pick up writes served by other workers.
+
+Results are ordered by rank, the score in millionths rounded down, then by
+item id. Paging compares these integers rather than float scores, which a
+backend may not reproduce bit for bit from one query to the next.
+"""
+import asyncio
+import heapq
+import html
+import logging
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import BigInteger, and_, cast, func, or_, select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.session import ASYNC_DATABASE_URL, AsyncSessionLocal
+from app.models.item import Item
+
+logger = logging.getLogger(__name__)
+
+WORD = re.compile(r"\w+")
+# A name match counts this many times as much as a description match
+NAME_WEIGHT = 2
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Ranks are scores in units of 1 / RANK_SCALE
+RANK_SCALE = 1_000_000
+
+# (rank, item id) of the last hit on the previous page
+SearchPosition = Tuple[int, int]
+# (item, score, rank)
+SearchHit = Tuple[dict, float, int]
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return WORD.findall(text.lower()) if text else []
+
+def highlight(text: Optional[str], terms: Iterable[str]) -> Optional[str]:
+    """HTML-escape ``text`` and wrap whole-word matches of ``terms`` in <mark>, or None if nothing matched"""
+    terms = sorted(set(terms), key=len, reverse=True)
+    if not text or not terms:
+        return None
+    pattern = re.compile(
+        r"(?<!\w)(" + "|".join(re.escape(term) for term in terms) + r")(?!\w)", re.IGNORECASE
+    )
+    parts = pattern.split(text)
+    if len(parts) == 1:
+        return None
+    # split() with one group alternates plain text and matches
+    return "".join(
+        f"<mark>{html.escape(part)}</mark>" if i % 2 else html.escape(part)
+        for i, part in enumerate(parts)
+    )
+
+class ItemSearch(ABC):
+    """Search backend interface; the write hooks are no-ops where the database indexes itself"""
+
+    async def start(self) -> None:
+        """Prepare the backend; called from the startup hook"""
+
+    @abstractmethod
+    async def search(
+        self, db: AsyncSession, query: str, limit: int, after: Optional[SearchPosition] = None
+    ) -> List[SearchHit]:
+        """Up to ``limit`` (item dict, score, rank) hits, best first, positioned after ``after``"""
+
+    def upsert(self, item_id: int, fields: dict) -> None:
+        pass
+
+    def remove(self, item_ids: Iterable[int]) -> None:
+        pass
+
+class FullTextSearch(ItemSearch):
+    """
+    MySQL natural-language FULLTEXT search. Words shorter than
+    innodb_ft_min_token_size (3 by default) and stopwords are not indexed.
+    """
+
+    def statement(self, query: str, limit: int, after: Optional[SearchPosition] = None):
+        score = mysql.match(Item.name, Item.description, against=query).in_natural_language_mode()
+        rank = cast(func.floor(score * RANK_SCALE), BigInteger)
+        stmt = select(
+            Item.id, Item.name, Item.description, score.label("score"), rank.label("rank")
+        ).where(score > 0)
+        if after:
+            stmt = stmt.where(or_(rank < after[0], and_(rank == after[0], Item.id > after[1])))
+        return stmt.order_by(rank.desc(), Item.id.asc()).limit(limit)
+
+    async def search(self, db, query, limit, after=None):
+        rows = (await db.execute(self.statement(query, limit, after))).all()
+        return [
+            ({"id": row.id, "name": row.name, "description": row.description}, row.score, row.rank)
+            for row in rows
+        ]
+
+class _IndexData:
+    """Postings plus the stored fields needed for scoring, removal and highlights"""
+
+    def __init__(self):
+        self.docs: Dict[int, dict] = {}
+        self.lengths: Dict[int, int] = {}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.total_length = 0
+
+    def upsert(self, item_id: int, fields: dict) -> None:
+        doc = {**self.docs.get(item_id, {"id": item_id, "name": None, "description": None}), **fields}
+        self.remove(item_id)
+        weights = Counter()
+        for term in tokenize(doc["name"]):
+            weights[term] += NAME_WEIGHT
+        for term in tokenize(doc["description"]):
+            weights[term] += 1
+        for term, weight in weights.items():
+            self.postings.setdefault(term, {})[item_id] = weight
+        self.docs[item_id] = doc
+        self.lengths[item_id] = sum(weights.values())
+        self.total_length += self.lengths[item_id]
+
+    def remove(self, item_id: int) -> None:
+        doc = self.docs.pop(item_id, None)
+        if doc is None:
+            return
+        self.total_length -= self.lengths.pop(item_id)
+        for term in set(tokenize(doc["name"])) | set(tokenize(doc["description"])):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(item_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def scores(self, terms: List[str]) -> Dict[int, float]:
+        count = len(self.docs)
+        if not count:
+            return {}
+        average_length = self.total_length / count or 1
+        scores: Dict[int, float] = {}
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for item_id, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[item_id] / average_length)
+                scores[item_id] = scores.get(item_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+class InvertedIndexSearch(ItemSearch):
+    """In-process BM25 index over items, maintained by the write endpoints"""
+
+    def __init__(self, rebuild_seconds: int = 0, batch_size: int = 1000):
+        self.rebuild_seconds = rebuild_seconds
+        self.batch_size = batch_size
+        self._data: Optional[_IndexData] = None
+        self._built_at = 0.0
+        self._build_lock = asyncio.Lock()
+        self._rebuild_task: Optional[asyncio.Task] = None
+        # Writes seen while a build is reading the table, replayed onto the new index
+        self._pending: Optional[List[Tuple[str, int, Optional[dict]]]] = None
+
+    def upsert(self, item_id: int, fields: dict) -> None:
+        if self._data is not None:
+            self._data.upsert(item_id, fields)
+        if self._pending is not None:
+            self._pending.append(("upsert", item_id, fields))
+
+    def remove(self, item_ids: Iterable[int]) -> None:
+        for item_id in item_ids:
+            if self._data is not None:
+                self._data.remove(item_id)
+            if self._pending is not None:
+                self._pending.append(("remove", item_id, None))
+
+    async def start(self) -> None:
+        await self.rebuild()
+
+    async def rebuild(self) -> None:
+        """Reload the whole index from the items table, in batches"""
+        async with self._build_lock:
+            await self._load()
+
+    async def _load(self) -> None:
+        self._pending = []
+        try:
+            data = _IndexData()
+            async with AsyncSessionLocal() as db:
+                # Builds often start inside a replica-routed search; the index must match the primary
+                db.sync_session.use_primary()
+                result = await db.stream(
+                    select(Item.id, Item.name, Item.description)
+                    .execution_options(yield_per=self.batch_size)
+                )
+                async for batch in result.partitions():
+                    for row in batch:
+                        data.upsert(row.id, {"name": row.name, "description": row.description})
+            for op, item_id, fields in self._pending:
+                if op == "upsert":
+                    data.upsert(item_id, fields)
+                else:
+                    data.remove(item_id)
+            self._data = data
+            self._built_at = time.monotonic()
+        finally:
+            self._pending = None
+        logger.info("Item search index built with %d items", len(data.docs))
+
+    async def _background_rebuild(self) -> None:
+        try:
+            await self.rebuild()
+        except Exception:
+            logger.exception("Item search index rebuild failed")
+
+    async def _ensure_index(self) -> _IndexData:
+        if self._data is None:
+            # Only before the startup build finishes, or where the startup hook doesn't run
+            async with self._build_lock:
+                if self._data is None:
+                    await self._load()
+        elif self.rebuild_seconds and time.monotonic() - self._built_at > self.rebuild_seconds:
+            if self._rebuild_task is None or self._rebuild_task.done():
+                # Keep answering from the current index while the new one loads
+                self._rebuild_task = asyncio.create_task(self._background_rebuild())
+        return self._data
+
+    async def search(self, db, query, limit, after=None):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        data = await self._ensure_index()
+        ranked = (
+            (-math.floor(score * RANK_SCALE), item_id, score) for item_id, score in data.scores(terms).items()
+        )
+        if after is not None:
+            ranked = (hit for hit in ranked if hit[:2] > (-after[0], after[1]))
+        return [
+            (data.docs[item_id], score, -negative_rank)
+            for negative_rank, item_id, score in heapq.nsmallest(limit, ranked)
+        ]
+
+def create_item_search() -> ItemSearch:
+    backend = settings.ITEM_SEARCH_BACKEND
+    if backend == "auto":
+        backend = "fulltext" if make_url(ASYNC_DATABASE_URL).get_backend_name() == "mysql" else "memory"
+    if backend == "fulltext":
+        return FullTextSearch()
+    if backend == "memory":
+        return InvertedIndexSearch(settings.ITEM_SEARCH_REBUILD_SECONDS, settings.EXPORT_BATCH_SIZE)
+    raise ValueError(f"Unknown item search backend '{settings.ITEM_SEARCH_BACKEND}'")
+
+item_search = create_item_search()
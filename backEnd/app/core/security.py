@@ -1,20 +1,103 @@
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 from authlib.jose import jwt
 from authlib.jose.errors import JoseError
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from app.core.config import settings
-from sqlalchemy.orm import Session
+from app.core.metrics import JWT_LATENCY, PASSWORD_HASH_LATENCY, PASSWORD_HASH_QUEUE_WAIT
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 
+T = TypeVar("T")
+
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with PASSWORD_HASH_LATENCY.labels("verify").time():
+        return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with PASSWORD_HASH_LATENCY.labels("hash").time():
+        return pwd_context.hash(password)
+
+class PasswordHasherPool:
+    """
+    Runs bcrypt off the event loop in a bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism.
+    At most ``workers + queue_limit`` calls may be pending; beyond that callers
+    get a 429 instead of piling up behind the pool. The threads start with the
+    first call after construction or ``shutdown``, so the app can be started
+    again in the same process.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.capacity = workers + queue_limit
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many password operations in progress, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def timed():
+            PASSWORD_HASH_QUEUE_WAIT.observe(time.perf_counter() - submitted)
+            return func(*args)
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), timed)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHasherPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT
+)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT token with proper header and claims"""
@@ -31,32 +114,38 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     })
     
     # Using authlib.jose jwt encode
-    return jwt.encode(
-        {"alg": "HS256", "typ": "JWT"},
-        to_encode,
-        settings.SECRET_KEY
-    ).decode()
+    with JWT_LATENCY.labels("encode").time():
+        return jwt.encode(
+            {"alg": "HS256", "typ": "JWT"},
+            to_encode,
+            settings.SECRET_KEY
+        ).decode()
+
+def hash_token(token: str) -> str:
+    """Fixed-size lookup key for a JWT, so the DB never indexes the full token"""
+    return hashlib.sha256(token.encode()).hexdigest()
 
 def verify_token(token: str) -> Optional[dict]:
     try:
         # Using authlib.jose jwt decode
-        claims = jwt.decode(token, settings.SECRET_KEY)
-        claims.validate()  # Validate expiration and other claims
+        with JWT_LATENCY.labels("decode").time():
+            claims = jwt.decode(token, settings.SECRET_KEY)
+            claims.validate()  # Validate expiration and other claims
         return claims
     except JoseError:
         return None
 
-def authenticate_user(db: Session, login: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, login: str, password: str) -> Optional[User]:
     """Authenticate a user with username/email and password"""
     # Try to find user by username or email
-    user = db.query(User).filter(
+    user = await db.scalar(select(User).where(
         (User.username == login) | (User.email == login)
-    ).first()
+    ))
     
     if not user:
         return None
     
-    if not verify_password(password, user.password):
+    if not await verify_password_async(password, user.password):
         return None
     
     return user
\ No newline at end of file
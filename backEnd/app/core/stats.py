@@ -0,0 +1,195 @@
+"""
+Item and user statistics kept in the ``stat_counters`` summary table.
+
+Handlers that create or delete rows adjust the counters in their own
+transaction, so /items/stats and /users/stats read a handful of counter rows
+instead of counting the tables:
+
+- ``items`` / ``users``: running totals
+- ``users.active``: users with ``is_active`` set
+- ``items.created`` / ``users.created``: rows created per day; weeks and
+  months are summed from the days
+- ``users.signed_in.<day|week|month>``: distinct users who signed in or
+  refreshed a token during each period, counted on their first sign-in of
+  the period by comparing with ``users.last_login_at``
+
+Counters can drift when rows change outside these handlers or concurrent
+sign-ins race. ``reconcile_stats`` recounts the totals and the current
+periods' sign-ins from the tables. Creation histograms record events and are
+not recounted.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.item import Item
+from app.models.stat_counter import StatCounter
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Period key of running totals
+TOTAL = ""
+
+def _day_start(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _week_start(moment: datetime) -> datetime:
+    return _day_start(moment) - timedelta(days=moment.weekday())
+
+def _month_start(moment: datetime) -> datetime:
+    return _day_start(moment).replace(day=1)
+
+def _previous_month(start: datetime) -> datetime:
+    return (start - timedelta(days=1)).replace(day=1)
+
+def _week_key(moment: date) -> str:
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+# Period -> (start of the period containing a moment, start of the period before, key)
+PERIODS: Dict[str, Tuple[Callable[[datetime], datetime], Callable[[datetime], datetime], Callable[[date], str]]] = {
+    "day": (_day_start, lambda start: start - timedelta(days=1), lambda moment: moment.strftime("%Y-%m-%d")),
+    "week": (_week_start, lambda start: start - timedelta(weeks=1), _week_key),
+    "month": (_month_start, _previous_month, lambda moment: moment.strftime("%Y-%m")),
+}
+
+def _period_starts(period: str, now: datetime, limit: int) -> List[datetime]:
+    """Starts of the last ``limit`` periods, newest first"""
+    start_of, previous, _ = PERIODS[period]
+    starts = [start_of(now)]
+    while len(starts) < limit:
+        starts.append(previous(starts[-1]))
+    return starts
+
+async def add_counts(db: AsyncSession, deltas: Dict[Tuple[str, str], int]) -> None:
+    """Add each delta to its (name, period) counter inside the caller's transaction"""
+    for (name, period), delta in deltas.items():
+        if not delta:
+            continue
+        condition = (StatCounter.name == name) & (StatCounter.period == period)
+        result = await db.execute(update(StatCounter).where(condition).values(value=StatCounter.value + delta))
+        if result.rowcount:
+            continue
+        try:
+            async with db.begin_nested():
+                db.add(StatCounter(name=name, period=period, value=delta))
+        except IntegrityError:
+            # Another transaction created the row first
+            await db.execute(update(StatCounter).where(condition).values(value=StatCounter.value + delta))
+
+async def count_items(db: AsyncSession, created: int = 0, deleted: int = 0) -> None:
+    today = PERIODS["day"][2](datetime.utcnow())
+    await add_counts(db, {("items", TOTAL): created - deleted, ("items.created", today): created})
+
+async def count_new_user(db: AsyncSession, user: User) -> None:
+    today = PERIODS["day"][2](datetime.utcnow())
+    await add_counts(db, {
+        ("users", TOTAL): 1,
+        ("users.active", TOTAL): 1 if user.is_active else 0,
+        ("users.created", today): 1,
+    })
+
+async def record_sign_in(db: AsyncSession, user_id: str) -> None:
+    """Stamp ``last_login_at`` and count the user in each period they hadn't signed in yet"""
+    now = datetime.utcnow()
+    previous = await db.scalar(select(User.last_login_at).where(User.id == user_id))
+    await db.execute(update(User).where(User.id == user_id).values(last_login_at=now))
+    await add_counts(db, {
+        (f"users.signed_in.{period}", key(now)): 1
+        for period, (start_of, _, key) in PERIODS.items()
+        if previous is None or previous < start_of(now)
+    })
+
+async def _counters(db: AsyncSession, names: List[str], periods: List[str]) -> Dict[Tuple[str, str], int]:
+    rows = await db.execute(
+        select(StatCounter.name, StatCounter.period, StatCounter.value)
+        .where(StatCounter.name.in_(names), StatCounter.period.in_(periods))
+    )
+    return {(name, period): value for name, period, value in rows}
+
+async def _created_histogram(db: AsyncSession, name: str, period: str, starts: List[datetime]) -> List[dict]:
+    """Per-day creation counts summed into ``period`` buckets, newest first"""
+    _, _, key = PERIODS[period]
+    # Day keys sort chronologically, so the range is one index scan
+    rows = await db.execute(
+        select(StatCounter.period, StatCounter.value)
+        .where(StatCounter.name == name, StatCounter.period >= PERIODS["day"][2](starts[-1]))
+    )
+    buckets = {key(start): 0 for start in starts}
+    for day, value in rows:
+        bucket = key(datetime.strptime(day, "%Y-%m-%d"))
+        if bucket in buckets:
+            buckets[bucket] += value
+    return [{"period": bucket, "count": count} for bucket, count in buckets.items()]
+
+async def item_stats(db: AsyncSession, period: str, limit: int) -> dict:
+    starts = _period_starts(period, datetime.utcnow(), limit)
+    totals = await _counters(db, ["items"], [TOTAL])
+    return {
+        "total": totals.get(("items", TOTAL), 0),
+        "period": period,
+        "created": await _created_histogram(db, "items.created", period, starts),
+    }
+
+async def user_stats(db: AsyncSession, period: str, limit: int) -> dict:
+    starts = _period_starts(period, datetime.utcnow(), limit)
+    _, _, key = PERIODS[period]
+    totals = await _counters(db, ["users", "users.active"], [TOTAL])
+    signed_in = await _counters(db, [f"users.signed_in.{period}"], [key(start) for start in starts])
+    return {
+        "total": totals.get(("users", TOTAL), 0),
+        "active": totals.get(("users.active", TOTAL), 0),
+        "period": period,
+        "created": await _created_histogram(db, "users.created", period, starts),
+        "active_users": [
+            {"period": key(start), "count": signed_in.get((f"users.signed_in.{period}", key(start)), 0)}
+            for start in starts
+        ],
+    }
+
+def _set_counter(db: Session, name: str, period: str, value: int) -> None:
+    condition = (StatCounter.name == name) & (StatCounter.period == period)
+    if not db.execute(update(StatCounter).where(condition).values(value=value)).rowcount:
+        db.add(StatCounter(name=name, period=period, value=value))
+
+def reconcile_stats(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Recount the totals and the current periods' sign-ins, correcting any
+    counter that drifted. Returns the corrections as counter -> difference.
+    """
+    now = now or datetime.utcnow()
+    recounts = {
+        ("items", TOTAL): select(func.count()).select_from(Item),
+        ("users", TOTAL): select(func.count()).select_from(User),
+        ("users.active", TOTAL): select(func.count()).select_from(User).where(User.is_active == True),
+    }
+    for period, (start_of, _, key) in PERIODS.items():
+        recounts[(f"users.signed_in.{period}", key(now))] = (
+            select(func.count()).select_from(User).where(User.last_login_at >= start_of(now))
+        )
+
+    corrections = {}
+    for (name, period), recount in recounts.items():
+        try:
+            # Lock the counter before counting: writers that already adjusted it have
+            # committed and are counted, the rest wait and adjust it after this commit
+            stored = db.scalar(
+                select(StatCounter.value)
+                .where(StatCounter.name == name, StatCounter.period == period)
+                .with_for_update()
+            ) or 0
+            actual = db.scalar(recount)
+            if actual != stored:
+                _set_counter(db, name, period, actual)
+                corrections[f"{name}:{period}" if period else name] = actual - stored
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    if corrections:
+        logger.warning("Corrected statistics counters: %s", corrections)
+    return corrections
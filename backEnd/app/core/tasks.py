@@ -1,10 +1,171 @@
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict
+from apscheduler.schedulers.background import BackgroundScheduler
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.partitions import token_partitions
+from app.core.stats import reconcile_stats
+from app.db.session import SessionLocal
+from app.models.item_change import ItemChange
+from app.models.scheduler_lock import SchedulerLock
 from app.models.token import Token
-from datetime import datetime
-
-def cleanup_expired_tokens(db: Session):
-    """Remove expired and revoked tokens from the database"""
-    db.query(Token).filter(
-        (Token.expires_at < datetime.utcnow()) | (Token.is_revoked == True)
-    ).delete()
-    db.commit()
\ No newline at end of file
+
+logger = logging.getLogger(__name__)
+
+def _new_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Identifies this worker process when competing for job leases
+WORKER_ID = _new_worker_id()
+
+TOKEN_CLEANUP_LOCK = "token_cleanup"
+ITEM_CHANGES_PRUNE_LOCK = "item_changes_prune"
+STATS_RECONCILE_LOCK = "stats_reconcile"
+
+scheduler = BackgroundScheduler(timezone="UTC")
+
+cleanup_stats = {
+    "worker_id": WORKER_ID,
+    "is_leader": False,
+    "runs": 0,
+    "last_run_at": None,
+    "last_deleted": {"expired": 0, "revoked": 0},
+    "total_deleted": {"expired": 0, "revoked": 0},
+}
+
+def _reset_worker_id() -> None:
+    global WORKER_ID
+    WORKER_ID = _new_worker_id()
+    cleanup_stats["worker_id"] = WORKER_ID
+
+# Workers forked from a preloaded master would otherwise share one identity
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_worker_id)
+
+def cleanup_expired_tokens(db: Session) -> Dict[str, int]:
+    """
+    Remove expired and revoked tokens from the database. With partitioned
+    token storage, expired tokens go with their partitions, which are counted
+    instead of rows.
+    """
+    if settings.TOKEN_STORAGE == "partitioned":
+        counts = token_partitions.maintain(db.get_bind())
+        counts.update(Token.cleanup_tokens(
+            db,
+            batch_size=settings.TOKEN_CLEANUP_BATCH_SIZE,
+            max_batches=settings.TOKEN_CLEANUP_MAX_BATCHES,
+            expired=False
+        ))
+        return counts
+    return Token.cleanup_tokens(
+        db,
+        batch_size=settings.TOKEN_CLEANUP_BATCH_SIZE,
+        max_batches=settings.TOKEN_CLEANUP_MAX_BATCHES
+    )
+
+def run_token_cleanup() -> None:
+    """Scheduled job: purge tokens if this worker holds the cleanup lease"""
+    db = SessionLocal()
+    try:
+        # Lease outlives one interval so a dead leader is replaced on the next tick
+        lease = settings.TOKEN_CLEANUP_INTERVAL_SECONDS * 2
+        cleanup_stats["is_leader"] = SchedulerLock.acquire(db, TOKEN_CLEANUP_LOCK, WORKER_ID, lease)
+        if not cleanup_stats["is_leader"]:
+            return
+
+        counts = cleanup_expired_tokens(db)
+        cleanup_stats["runs"] += 1
+        cleanup_stats["last_run_at"] = datetime.utcnow().isoformat()
+        cleanup_stats["last_deleted"] = counts
+        for kind, count in counts.items():
+            cleanup_stats["total_deleted"][kind] = cleanup_stats["total_deleted"].get(kind, 0) + count
+    except Exception:
+        logger.exception("Token cleanup failed")
+    finally:
+        db.close()
+
+def run_item_changes_prune() -> None:
+    """Scheduled job: drop change feed entries older than ITEM_CHANGES_RETENTION_HOURS"""
+    db = SessionLocal()
+    try:
+        lease = settings.ITEM_CHANGES_PRUNE_INTERVAL_SECONDS * 2
+        if not SchedulerLock.acquire(db, ITEM_CHANGES_PRUNE_LOCK, WORKER_ID, lease):
+            return
+        cutoff = datetime.utcnow() - timedelta(hours=settings.ITEM_CHANGES_RETENTION_HOURS)
+        deleted = ItemChange.prune(
+            db,
+            cutoff,
+            batch_size=settings.ITEM_CHANGES_PRUNE_BATCH_SIZE,
+            max_batches=settings.ITEM_CHANGES_PRUNE_MAX_BATCHES
+        )
+        if deleted:
+            logger.info("Pruned %d item change feed entries", deleted)
+    except Exception:
+        db.rollback()
+        logger.exception("Item change feed prune failed")
+    finally:
+        db.close()
+
+def run_stats_reconcile() -> None:
+    """Scheduled job: recount the statistics counters and correct any drift"""
+    db = SessionLocal()
+    try:
+        lease = settings.STATS_RECONCILE_INTERVAL_SECONDS * 2
+        if not SchedulerLock.acquire(db, STATS_RECONCILE_LOCK, WORKER_ID, lease):
+            return
+        reconcile_stats(db)
+    except Exception:
+        db.rollback()
+        logger.exception("Statistics reconcile failed")
+    finally:
+        db.close()
+
+def start_scheduler() -> None:
+    if scheduler.running:
+        return
+    if settings.TOKEN_CLEANUP_ENABLED:
+        scheduler.add_job(
+            run_token_cleanup,
+            "interval",
+            seconds=settings.TOKEN_CLEANUP_INTERVAL_SECONDS,
+            id=TOKEN_CLEANUP_LOCK,
+            max_instances=1,
+            coalesce=True,
+            next_run_time=datetime.utcnow()
+        )
+    scheduler.add_job(
+        run_item_changes_prune,
+        "interval",
+        seconds=settings.ITEM_CHANGES_PRUNE_INTERVAL_SECONDS,
+        id=ITEM_CHANGES_PRUNE_LOCK,
+        max_instances=1,
+        coalesce=True
+    )
+    if settings.STATS_RECONCILE_INTERVAL_SECONDS:
+        scheduler.add_job(
+            run_stats_reconcile,
+            "interval",
+            seconds=settings.STATS_RECONCILE_INTERVAL_SECONDS,
+            id=STATS_RECONCILE_LOCK,
+            max_instances=1,
+            coalesce=True
+        )
+    scheduler.start()
+
+def shutdown_scheduler() -> None:
+    if not scheduler.running:
+        return
+    scheduler.shutdown(wait=False)
+    # Hand every job this worker leads to another worker now rather than when the lease lapses
+    db = SessionLocal()
+    try:
+        SchedulerLock.release_all(db, WORKER_ID)
+    except Exception:
+        logger.exception("Releasing scheduler leases failed")
+    finally:
+        db.close()
+    cleanup_stats["is_leader"] = False
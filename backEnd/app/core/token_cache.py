@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app.core.config import settings
+from app.models.token import Token
+from app.models.user import User
+
+def _column_values(obj) -> Dict[str, Any]:
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+@dataclass
+class CachedToken:
+    """
+    Snapshot of a token row and its owner, enough to authenticate without the DB.
+    Every column is kept so the rebuilt instances are as complete as loaded ones;
+    an attribute left unloaded would lazy-load, which an AsyncSession can't do.
+    """
+    token_id: str
+    user_id: str
+    expires_at: datetime
+    is_revoked: bool
+    token_columns: Dict[str, Any]
+    user_columns: Dict[str, Any]
+    cached_at: float
+
+    def is_valid(self) -> bool:
+        return not self.is_revoked and self.expires_at >= datetime.utcnow()
+
+    def attach(self, db: AsyncSession) -> Tuple[Token, User]:
+        """Rebuild Token/User instances and attach them to the session without a SELECT"""
+        token = Token(**{**self.token_columns, "is_revoked": self.is_revoked})
+        user = User(**self.user_columns)
+        for obj in (token, user):
+            make_transient_to_detached(obj)
+            db.add(obj)
+        return token, user
+
+class RevocationCache:
+    """
+    Bounded LRU of token states keyed by token id (the JWT ``jti`` claim).
+
+    Valid entries expire after ``ttl`` seconds so that revocations made by other
+    workers are picked up; revoked entries are kept until the token itself expires.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedToken]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, jti: str) -> Optional[CachedToken]:
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is None:
+                return None
+            if not entry.is_revoked and time.monotonic() - entry.cached_at > self.ttl:
+                del self._entries[jti]
+                return None
+            self._entries.move_to_end(jti)
+            return entry
+
+    def put(self, token: Token, user: User) -> CachedToken:
+        entry = CachedToken(
+            token_id=token.id,
+            user_id=user.id,
+            expires_at=token.expires_at,
+            is_revoked=bool(token.is_revoked),
+            token_columns=_column_values(token),
+            user_columns=_column_values(user),
+            cached_at=time.monotonic()
+        )
+        with self._lock:
+            self._entries[token.id] = entry
+            self._entries.move_to_end(token.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def revoke(self, jti: str) -> None:
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is not None:
+                entry.is_revoked = True
+
+    def evict_user(self, user_id: str) -> None:
+        """Drop every entry belonging to a user, e.g. after their profile changed"""
+        with self._lock:
+            for jti in [k for k, v in self._entries.items() if v.user_id == user_id]:
+                del self._entries[jti]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+revocation_cache = RevocationCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS
+)
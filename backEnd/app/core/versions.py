@@ -0,0 +1,100 @@
+"""
+Per-table change counters used as cheap HTTP validators.
+
+Every transaction that writes to a table bumps its row in ``table_versions``
+just before committing, so the counter changes atomically with the data. Read
+endpoints turn the counter into a weak ETag and can answer 304 before running
+their query. Each worker caches the counters for TABLE_VERSION_CACHE_SECONDS;
+its own writes take effect as soon as they commit, other workers' writes
+within that window. Counters read from a replica are cached separately from the
+primary's, so a lagging replica never lends its version to a primary read.
+"""
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.table_version import TableVersion
+
+# Session.info key of the tables bumped in the session's open transaction
+BUMPED_TABLES = "bumped_tables"
+
+@dataclass(frozen=True)
+class Validator:
+    version: int
+    etag: str
+    last_modified: Optional[float]
+
+    def variant(self, name: str) -> "Validator":
+        """Validator of another representation (e.g. media type) of the same data"""
+        return replace(self, etag=f'{self.etag[:-1]}-{name}"')
+
+class TableVersions:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        # (read source, table) -> (version, updated_at, read at)
+        self._cache: Dict[Tuple[str, str], Tuple[int, Optional[datetime], float]] = {}
+        # table -> invalidations so far; a read that overlapped one is not cached
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, db: AsyncSession, table: str) -> Tuple[int, Optional[datetime]]:
+        """Current (version, last write time) of ``table``; (0, None) if never written"""
+        key = (db.sync_session.read_source(), table)
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[2] < self.ttl:
+            return cached[0], cached[1]
+        generation = self._generations.get(table, 0)
+        row = (await db.execute(
+            select(TableVersion.version, TableVersion.updated_at).where(TableVersion.name == table)
+        )).first()
+        version, updated_at = row if row else (0, None)
+        if self._generations.get(table, 0) == generation:
+            self._cache[key] = (version, updated_at, time.monotonic())
+        return version, updated_at
+
+    def invalidate(self, table: str) -> None:
+        """Forget ``table``'s cached counters; runs when a transaction that bumped it commits"""
+        self._generations[table] = self._generations.get(table, 0) + 1
+        for key in [key for key in self._cache if key[1] == table]:
+            del self._cache[key]
+
+    async def bump(self, db: AsyncSession, table: str) -> None:
+        """
+        Increment ``table``'s counter inside the caller's transaction; call right
+        before commit. This worker's cached counter is dropped once it commits.
+        """
+        db.sync_session.info.setdefault(BUMPED_TABLES, set()).add(table)
+        values = {"version": TableVersion.version + 1, "updated_at": datetime.utcnow()}
+        result = await db.execute(update(TableVersion).where(TableVersion.name == table).values(**values))
+        if result.rowcount:
+            return
+        try:
+            async with db.begin_nested():
+                db.add(TableVersion(name=table, version=1, updated_at=values["updated_at"]))
+        except IntegrityError:
+            # Another transaction created the row first
+            await db.execute(update(TableVersion).where(TableVersion.name == table).values(**values))
+
+    async def validator(self, db: AsyncSession, table: str) -> Validator:
+        version, updated_at = await self.get(db, table)
+        last_modified = updated_at.replace(tzinfo=timezone.utc).timestamp() if updated_at else None
+        return Validator(version=version, etag=f'W/"{table}-{version}"', last_modified=last_modified)
+
+table_versions = TableVersions(settings.TABLE_VERSION_CACHE_SECONDS)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    # Savepoints fire after_commit too; the bumps are only visible once the outer transaction commits
+    if session.in_nested_transaction():
+        return
+    for table in session.info.pop(BUMPED_TABLES, ()):
+        table_versions.invalidate(table)
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_rolled_back(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(BUMPED_TABLES, None)
@@ -0,0 +1,133 @@
+"""
+Schema creation and in-place upgrades for databases created by earlier
+versions of the app. Every step is idempotent. It runs from the startup hook in
+main.py unless DB_SCHEMA_SYNC_ON_STARTUP is off, in which case deploy it as a
+separate step:
+
+    python -m app.db.migrations
+"""
+from typing import Optional
+from sqlalchemy import Column, Index, MetaData, String, Table, inspect, text
+from sqlalchemy.engine import Engine, Inspector
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.security import hash_token
+from app.core.stats import reconcile_stats
+from app.db.base_class import Base
+from app.db.partitions import token_partitions
+
+BACKFILL_BATCH_SIZE = 1000
+ITEM_FULLTEXT_INDEX = "ix_items_name_description_fulltext"
+
+def migrate_token_hashes(engine: Engine, inspector: Optional[Inspector] = None) -> int:
+    """
+    Move token lookups from the raw 500-char JWT to its SHA-256 digest:
+    add ``tokens.token_hash``, backfill it in batches (clearing the raw token as
+    it goes) and drop the old unique index on ``tokens.token``.
+    Returns the number of rows backfilled.
+    """
+    inspector = inspector or inspect(engine)
+    if not inspector.has_table("tokens"):
+        return 0
+
+    if "token_hash" not in {column["name"] for column in inspector.get_columns("tokens")}:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE tokens ADD COLUMN token_hash CHAR(64)"))
+        print("Added column tokens.token_hash")
+
+    backfilled = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT id, token FROM tokens WHERE token_hash IS NULL AND token IS NOT NULL LIMIT :n"
+            ), {"n": BACKFILL_BATCH_SIZE}).all()
+            if not rows:
+                break
+            conn.execute(
+                text("UPDATE tokens SET token_hash = :token_hash, token = NULL WHERE id = :row_id"),
+                [{"token_hash": hash_token(token), "row_id": row_id} for row_id, token in rows]
+            )
+            backfilled += len(rows)
+    if backfilled:
+        print(f"Backfilled token_hash for {backfilled} tokens")
+
+    if "ix_tokens_token" in {index["name"] for index in inspector.get_indexes("tokens")}:
+        # Detached table so the legacy index never ends up in the app's metadata
+        legacy = Table("tokens", MetaData(), Column("token", String(500)))
+        with engine.begin() as conn:
+            Index("ix_tokens_token", legacy.c.token).drop(bind=conn)
+        print("Dropped legacy index ix_tokens_token")
+
+    return backfilled
+
+def add_user_last_login(engine: Engine, inspector: Optional[Inspector] = None) -> None:
+    """``users.last_login_at``, which the active user statistics are counted from"""
+    inspector = inspector or inspect(engine)
+    if "last_login_at" in {column["name"] for column in inspector.get_columns("users")}:
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE users ADD COLUMN last_login_at DATETIME NULL"))
+    print("Added column users.last_login_at")
+
+def add_item_fulltext_index(engine: Engine, inspector: Optional[Inspector] = None) -> None:
+    """
+    FULLTEXT index over item names and descriptions backing /items/search on
+    MySQL. Kept out of the model so other databases don't get a plain
+    composite index in its place.
+    """
+    if engine.dialect.name != "mysql":
+        return
+    inspector = inspector or inspect(engine)
+    if ITEM_FULLTEXT_INDEX in {index["name"] for index in inspector.get_indexes("items")}:
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE items ADD FULLTEXT INDEX {ITEM_FULLTEXT_INDEX} (name, description)"))
+    print(f"Created index {ITEM_FULLTEXT_INDEX}")
+
+def sync_schema(engine: Engine) -> None:
+    """
+    Create missing tables, upgrade existing ones and add indexes declared since
+    they were created, sharing one inspector so each table is reflected once.
+    """
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    missing = [table for table in Base.metadata.sorted_tables if table.name not in existing]
+    if missing:
+        Base.metadata.create_all(bind=engine, tables=missing, checkfirst=False)
+        print(f"Created tables: {', '.join(table.name for table in missing)}")
+
+    if "tokens" in existing:
+        migrate_token_hashes(engine, inspector)
+    if "users" in existing:
+        add_user_last_login(engine, inspector)
+    add_item_fulltext_index(engine, inspector)
+    if "stat_counters" not in existing and existing & {"items", "users"}:
+        # Count the rows that predate the statistics counters
+        with Session(engine) as db:
+            reconcile_stats(db)
+        print("Initialized statistics counters")
+    if settings.TOKEN_STORAGE == "partitioned":
+        if token_partitions.setup(engine):
+            print("Partitioned table tokens by expires_at")
+    elif "tokens" in existing and token_partitions.active(engine):
+        # The model would expect a unique token hash and a foreign key the table no longer has
+        raise RuntimeError(
+            "The tokens table is partitioned but TOKEN_STORAGE is 'table'; "
+            "set TOKEN_STORAGE=partitioned or rebuild the table"
+        )
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        index_names = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in index_names:
+                index.create(bind=engine)
+                print(f"Created index {index.name}")
+
+if __name__ == "__main__":
+    import app.models  # noqa: F401  registers every table on Base.metadata
+    from app.db.session import engine
+
+    sync_schema(engine)
+    print("Database schema is up to date")
@@ -0,0 +1,210 @@
+"""
+Range partitioning of the tokens table by ``expires_at``
+(TOKEN_STORAGE="partitioned").
+
+Tokens are split into one partition per TOKEN_PARTITION_INTERVAL ("day" or
+"hour"), named after the period they start (``p20261018`` or
+``p2026101807``), plus a ``pmax`` catch-all. Once a partition's upper bound
+has passed every token in it has expired, so the cleanup job drops it whole
+instead of deleting its rows, and creates TOKEN_PARTITIONS_AHEAD partitions
+past the current one so new tokens never pile up in ``pmax``.
+
+On MySQL these are native ``RANGE COLUMNS`` partitions. Lookups by id or
+token hash keep working across them; partitioning does mean the primary key
+becomes (id, expires_at), the token hash index is no longer unique and the
+foreign key to users is dropped, as MySQL requires. The Token model declares
+the same layout while TOKEN_STORAGE is "partitioned", so new tables are created
+that way. Converting an existing table rebuilds it, so run
+``python -m app.db.migrations`` as a deploy step. There is no conversion back;
+sync_schema refuses to start on a partitioned table with TOKEN_STORAGE="table".
+
+SQLite has no partitions. There the layout is kept in a ``token_partitions``
+catalogue table and dropping a partition deletes its range of rows, so the
+maintenance routine can be exercised locally; the O(1) drop is MySQL only.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import Column, DateTime, MetaData, String, Table, delete, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from app.core.config import settings
+from app.models.token import Token
+
+MAXVALUE_PARTITION = "pmax"
+
+# Interval name -> (partition width, partition name format)
+INTERVALS = {
+    "day": (timedelta(days=1), "p%Y%m%d"),
+    "hour": (timedelta(hours=1), "p%Y%m%d%H"),
+}
+
+@dataclass
+class Partition:
+    name: str
+    # Exclusive upper bound on expires_at; None for the catch-all
+    less_than: Optional[datetime]
+
+class PartitionBackend(ABC):
+    """Dialect-specific partition DDL for the tokens table"""
+
+    @abstractmethod
+    def list(self, conn: Connection) -> List[Partition]:
+        """Current partitions in bound order, catch-all last; empty if the table isn't partitioned"""
+
+    @abstractmethod
+    def create(self, engine: Engine, partitions: List[Partition]) -> None:
+        """Partition the table with ``partitions`` (plus the catch-all)"""
+
+    @abstractmethod
+    def add(self, conn: Connection, partitions: List[Partition]) -> None: ...
+
+    @abstractmethod
+    def drop(self, conn: Connection, partitions: List[Partition]) -> None: ...
+
+class MySQLPartitionBackend(PartitionBackend):
+    def list(self, conn):
+        rows = conn.execute(text(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM INFORMATION_SCHEMA.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'tokens' AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        )).all()
+        return [
+            Partition(name, None if bound == "MAXVALUE" else datetime.fromisoformat(bound.strip("'")))
+            for name, bound in rows
+        ]
+
+    def create(self, engine, partitions):
+        foreign_keys = [fk["name"] for fk in inspect(engine).get_foreign_keys("tokens") if fk.get("name")]
+        with engine.begin() as conn:
+            # Partition keys must be part of every unique key and may not be NULL
+            conn.execute(text("UPDATE tokens SET expires_at = UTC_TIMESTAMP() WHERE expires_at IS NULL"))
+            conn.execute(text(
+                "ALTER TABLE tokens "
+                + "".join(f"DROP FOREIGN KEY {name}, " for name in foreign_keys)
+                + "MODIFY expires_at DATETIME NOT NULL, "
+                "DROP PRIMARY KEY, ADD PRIMARY KEY (id, expires_at), "
+                "DROP INDEX ix_tokens_token_hash, ADD INDEX ix_tokens_token_hash (token_hash)"
+            ))
+            conn.execute(text(
+                f"ALTER TABLE tokens PARTITION BY RANGE COLUMNS(expires_at) ({self._definitions(partitions)})"
+            ))
+
+    def add(self, conn, partitions):
+        # Splitting the catch-all only moves the (normally no) rows it holds
+        conn.execute(text(
+            f"ALTER TABLE tokens REORGANIZE PARTITION {MAXVALUE_PARTITION} "
+            f"INTO ({self._definitions(partitions)})"
+        ))
+
+    def drop(self, conn, partitions):
+        conn.execute(text(f"ALTER TABLE tokens DROP PARTITION {', '.join(p.name for p in partitions)}"))
+
+    @staticmethod
+    def _definitions(partitions: List[Partition]) -> str:
+        definitions = [
+            f"PARTITION {p.name} VALUES LESS THAN ('{p.less_than:%Y-%m-%d %H:%M:%S}')" for p in partitions
+        ]
+        definitions.append(f"PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+        return ", ".join(definitions)
+
+# Emulated partition layout, kept off Base.metadata so no other database gets it
+sqlite_catalogue = Table(
+    "token_partitions", MetaData(),
+    Column("name", String(20), primary_key=True),
+    Column("less_than", DateTime, nullable=False),
+)
+
+class SQLitePartitionBackend(PartitionBackend):
+    def list(self, conn):
+        if not inspect(conn).has_table(sqlite_catalogue.name):
+            return []
+        rows = conn.execute(select(sqlite_catalogue).order_by(sqlite_catalogue.c.less_than)).all()
+        return [Partition(row.name, row.less_than) for row in rows] + [Partition(MAXVALUE_PARTITION, None)]
+
+    def create(self, engine, partitions):
+        with engine.begin() as conn:
+            sqlite_catalogue.create(bind=conn, checkfirst=True)
+            self.add(conn, partitions)
+
+    def add(self, conn, partitions):
+        conn.execute(sqlite_catalogue.insert(), [
+            {"name": p.name, "less_than": p.less_than} for p in partitions
+        ])
+
+    def drop(self, conn, partitions):
+        # Partitions are dropped oldest first, so everything below the bound belongs to them
+        conn.execute(delete(Token).where(Token.expires_at < max(p.less_than for p in partitions)))
+        conn.execute(sqlite_catalogue.delete().where(
+            sqlite_catalogue.c.name.in_([p.name for p in partitions])
+        ))
+
+# Dialect name -> backend factory
+PARTITION_BACKENDS: Dict[str, Callable[[], PartitionBackend]] = {
+    "mysql": MySQLPartitionBackend,
+    "sqlite": SQLitePartitionBackend,
+}
+
+def get_partition_backend(engine: Engine) -> PartitionBackend:
+    if engine.dialect.name not in PARTITION_BACKENDS:
+        raise ValueError(f"Token partitioning is not supported on {engine.dialect.name}")
+    return PARTITION_BACKENDS[engine.dialect.name]()
+
+class TokenPartitions:
+    """Creates, extends and prunes the partitions of the tokens table"""
+
+    def __init__(self, interval: str, ahead: int):
+        if interval not in INTERVALS:
+            raise ValueError(f"Unknown token partition interval '{interval}'")
+        self.width, self.name_format = INTERVALS[interval]
+        self.ahead = ahead
+
+    def _period_start(self, moment: datetime) -> datetime:
+        if self.width >= timedelta(days=1):
+            return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        return moment.replace(minute=0, second=0, microsecond=0)
+
+    def _wanted(self, now: datetime) -> List[Partition]:
+        """The previous and current periods plus ``ahead`` more"""
+        start = self._period_start(now) - self.width
+        return [
+            Partition((start + self.width * i).strftime(self.name_format), start + self.width * (i + 1))
+            for i in range(self.ahead + 2)
+        ]
+
+    def active(self, engine: Engine) -> bool:
+        """Whether the tokens table is partitioned"""
+        if engine.dialect.name not in PARTITION_BACKENDS:
+            return False
+        with engine.connect() as conn:
+            return bool(get_partition_backend(engine).list(conn))
+
+    def setup(self, engine: Engine, now: Optional[datetime] = None) -> bool:
+        """Partition the tokens table if it isn't yet; True if it was converted"""
+        backend = get_partition_backend(engine)
+        if self.active(engine):
+            return False
+        # The first partition also takes every token that expired before it
+        backend.create(engine, self._wanted(now or datetime.utcnow()))
+        return True
+
+    def maintain(self, engine: Engine, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Create missing future partitions and drop fully expired ones"""
+        now = now or datetime.utcnow()
+        backend = get_partition_backend(engine)
+        with engine.connect() as conn:
+            bounded = [p for p in backend.list(conn) if p.less_than is not None]
+        if not bounded:
+            raise RuntimeError("The tokens table is not partitioned; run python -m app.db.migrations")
+
+        last_bound = bounded[-1].less_than
+        created = [p for p in self._wanted(now) if p.less_than > last_bound]
+        expired = [p for p in bounded if p.less_than <= now]
+        with engine.begin() as conn:
+            if created:
+                backend.add(conn, created)
+            if expired:
+                backend.drop(conn, expired)
+        return {"partitions_created": len(created), "partitions_dropped": len(expired)}
+
+token_partitions = TokenPartitions(settings.TOKEN_PARTITION_INTERVAL, settings.TOKEN_PARTITIONS_AHEAD)
@@ -0,0 +1,160 @@
+"""
+Connection pool configuration and statistics.
+
+Statistics come from the public pool events (connect, checkout, checkin,
+invalidate). They count checkouts, time how long each connection is held and
+record how often a checkout took the pool's last free connection, which is
+when the next request starts waiting. No event marks the start of a
+checkout, so the wait is timed around ``Engine.raw_connection()``, which every
+Connection (sync, or async through the greenlet bridge) gets its connection
+from. It includes opening a new connection and the pre-ping.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Sequence
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+from app.core.config import settings
+
+def _p99_ms(window: Sequence[float]) -> float:
+    values = sorted(window)
+    return round(values[int(0.99 * (len(values) - 1))] * 1000, 3) if values else 0.0
+
+class PoolStats:
+    """Counters for one pool, plus windows of recent checkout waits and hold times"""
+
+    def __init__(self, window: int = 1000):
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.saturated_checkouts = 0
+        self.peak_checked_out = 0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self.checkins = 0
+        self.recent_holds = deque(maxlen=window)
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.checkout_timeouts = 0
+        self.recent_waits = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe_checkout(self, checked_out: int, saturated: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            if saturated:
+                self.saturated_checkouts += 1
+
+    def observe_checkin(self, held: float) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.hold_total += held
+            self.hold_max = max(self.hold_max, held)
+            self.recent_holds.append(held)
+
+    def observe_wait(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.recent_waits.append(waited)
+            if timed_out:
+                self.checkout_timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "saturated_checkouts": self.saturated_checkouts,
+                "peak_checked_out": self.peak_checked_out,
+                "checkout_timeouts": self.checkout_timeouts,
+                "wait_ms_mean": round(self.wait_total / self.waits * 1000, 3) if self.waits else 0.0,
+                "wait_ms_p99": _p99_ms(self.recent_waits),
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+                "hold_ms_mean": round(self.hold_total / self.checkins * 1000, 3) if self.checkins else 0.0,
+                "hold_ms_p99": _p99_ms(self.recent_holds),
+                "hold_ms_max": round(self.hold_max * 1000, 3),
+            }
+
+# Keyed by pool name; listeners on a pool carry over to the pool Engine.dispose() recreates
+POOL_STATS: Dict[str, PoolStats] = {}
+
+def pool_options(url: str, name: str, pool_size: int, is_async: bool = False) -> dict:
+    """create_engine() keyword arguments for a pool sized and tuned from Settings"""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite keeps a single connection per thread; nothing to size
+        return options
+    options.update(
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+def instrument_pool(engine: Engine, name: str) -> None:
+    stats = POOL_STATS.setdefault(name, PoolStats())
+
+    def on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        # Read through the engine: dispose() swaps in a new pool with these listeners
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            checked_out = pool.checkedout()
+            stats.observe_checkout(checked_out, checked_out >= pool.size() + settings.DB_MAX_OVERFLOW)
+        else:
+            stats.observe_checkout(1, False)
+
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            stats.observe_checkin(time.perf_counter() - checked_out_at)
+
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.invalidations += 1
+
+    pool_connect = engine.raw_connection
+
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            connection = pool_connect()
+        except exc.TimeoutError:
+            stats.observe_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        stats.observe_wait(time.perf_counter() - started)
+        return connection
+
+    # Set on the engine, so it outlives the pools dispose() replaces
+    engine.raw_connection = timed_raw_connection
+    event.listen(engine.pool, "connect", on_connect)
+    event.listen(engine.pool, "checkout", on_checkout)
+    event.listen(engine.pool, "checkin", on_checkin)
+    event.listen(engine.pool, "invalidate", on_invalidate)
+
+def pool_status(engine: Engine, name: str) -> dict:
+    """Current occupancy of the engine's pool plus its accumulated statistics"""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+    status.update(POOL_STATS.setdefault(name, PoolStats()).snapshot())
+    return status
@@ -0,0 +1,271 @@
+"""
+Read-replica routing with lag-aware read-your-writes.
+
+``RoutingSession`` sends every write to the primary. Reads go to a replica
+only inside requests whose route opts in (``use_replica``), and only while
+the session has not written anything itself.
+
+Each worker measures replica lag with a heartbeat. Every
+DB_REPLICA_CHECK_SECONDS it writes the current time to the primary's
+``replica_heartbeats`` table and reads the copy on each replica. A replica's
+lag is the age of the oldest heartbeat it has not applied yet; past
+DB_REPLICA_MAX_LAG_SECONDS, or when it cannot be reached, the replica leaves
+the rotation until it catches up.
+
+A SQLite primary only has the heartbeat read. SQLite allows one writer per
+file, and a request transaction that has already read cannot wait for the
+lock, so a background write would fail concurrent requests with "database is
+locked". Local stand-in replicas are measured against heartbeats written by
+whatever copies the primary to them, and count as current without any.
+
+Read-your-writes: a request that writes is answered with a ``last_write``
+cookie and an ``X-Last-Write`` header holding the write time. A client that
+sends either one back only reads from replicas whose lag is smaller than the
+time since that write, and from the primary otherwise.
+"""
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from http.cookies import CookieError, SimpleCookie
+from typing import List, Optional
+from sqlalchemy import Select, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers, MutableHeaders
+from app.models.replica_heartbeat import ReplicaHeartbeat
+
+logger = logging.getLogger(__name__)
+
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+HEARTBEAT_NAME = "primary"
+
+@dataclass
+class RequestRouting:
+    """Per-request routing state, shared by every session the request opens"""
+    # Client's last write (unix time) if recent enough to matter
+    last_write: Optional[float] = None
+    # Set by use_replica on read-only routes
+    read_only: bool = False
+    # Set once any session in the request sent a write to the primary
+    wrote: bool = False
+
+request_routing: ContextVar[Optional[RequestRouting]] = ContextVar("request_routing", default=None)
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine, pool_name: str):
+        self.name = name
+        self.engine = engine
+        # Key of the pool's checkout statistics in app.db.pool
+        self.pool_name = pool_name
+        self.lag: Optional[float] = None
+        self.healthy = False
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": round(self.lag, 3) if self.lag is not None else None,
+            "error": self.error,
+            "checked_at": self.checked_at,
+        }
+
+class ReplicaRouter:
+    """Tracks replica lag and picks the replica a read may use"""
+
+    def __init__(self, replicas: List[Replica], max_lag: float):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        # Heartbeats known to be on the primary, oldest first
+        self._beats: deque = deque(maxlen=1000)
+
+    def choose(self, last_write: Optional[float] = None) -> Optional[Replica]:
+        """A random replica in rotation that has applied ``last_write``, or None for the primary"""
+        candidates = [replica for replica in self.replicas if replica.healthy]
+        if last_write is not None:
+            # A replica has applied every write older than its lag
+            since = time.time() - last_write
+            candidates = [replica for replica in candidates if replica.lag < since]
+        return random.choice(candidates) if candidates else None
+
+    async def _beat(self, primary: AsyncEngine) -> None:
+        """Write the current time to the primary's heartbeat row"""
+        now = time.time()
+        async with primary.begin() as conn:
+            result = await conn.execute(
+                update(ReplicaHeartbeat).where(ReplicaHeartbeat.name == HEARTBEAT_NAME).values(beat_at=now)
+            )
+            if not result.rowcount:
+                try:
+                    async with conn.begin_nested():
+                        await conn.execute(ReplicaHeartbeat.__table__.insert().values(
+                            name=HEARTBEAT_NAME, beat_at=now
+                        ))
+                except IntegrityError:
+                    # Another worker wrote the first heartbeat
+                    pass
+        self._beats.append(now)
+
+    async def check(self, primary: AsyncEngine) -> None:
+        """Write a heartbeat to the primary (except on SQLite) and re-measure every replica's lag"""
+        # The last beat from any worker is one more write the replicas must apply.
+        # Read outside the write transaction so it holds no lock while reading.
+        async with primary.connect() as conn:
+            previous = await conn.scalar(
+                select(ReplicaHeartbeat.beat_at).where(ReplicaHeartbeat.name == HEARTBEAT_NAME)
+            )
+        if previous is not None and (not self._beats or previous > self._beats[-1]):
+            self._beats.append(previous)
+        if primary.dialect.name != "sqlite":
+            await self._beat(primary)
+
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    seen = await conn.scalar(
+                        select(ReplicaHeartbeat.beat_at).where(ReplicaHeartbeat.name == HEARTBEAT_NAME)
+                    )
+                pending = [beat for beat in self._beats if seen is None or beat > seen]
+                replica.lag = time.time() - pending[0] if pending else 0.0
+                replica.error = None
+            except Exception as e:
+                replica.lag = None
+                replica.error = str(e)
+            replica.checked_at = time.time()
+            healthy = replica.lag is not None and replica.lag <= self.max_lag
+            if healthy != replica.healthy:
+                logger.warning(
+                    "Replica %s %s rotation (lag %s, error %s)",
+                    replica.name, "back in" if healthy else "taken out of", replica.lag, replica.error
+                )
+            replica.healthy = healthy
+
+    async def monitor(self, primary: AsyncEngine, interval: float) -> None:
+        while True:
+            try:
+                await self.check(primary)
+            except Exception:
+                logger.exception("Replica lag check failed")
+                for replica in self.replicas:
+                    replica.healthy = False
+            await asyncio.sleep(interval)
+
+    def status(self) -> List[dict]:
+        return [replica.status() for replica in self.replicas]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+def replica_name(url: str) -> str:
+    """Host/database of a replica URL, without credentials"""
+    parsed = make_url(url)
+    return f"{parsed.host or 'local'}/{parsed.database or ''}".rstrip("/")
+
+class RoutingSession(Session):
+    """
+    Session that reads from a replica on opted-in routes. The read target is
+    chosen once per session; after the first write the session stays on the
+    primary so it reads its own changes.
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaRouter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self._read_replica: Optional[Replica] = None
+        self._read_chosen = False
+
+    def _choose_read_replica(self) -> Optional[Replica]:
+        if not self._read_chosen:
+            self._read_chosen = True
+            routing = request_routing.get()
+            if self.replicas and routing is not None and routing.read_only:
+                self._read_replica = self.replicas.choose(routing.last_write)
+        return self._read_replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if isinstance(clause, Select) and not self._flushing:
+            replica = self._choose_read_replica()
+            return replica.engine.sync_engine if replica else primary
+        # Writes, and anything that isn't a plain SELECT
+        routing = request_routing.get()
+        if routing is not None and (self._flushing or clause is not None):
+            routing.wrote = True
+        self.use_primary()
+        return primary
+
+    def use_primary(self) -> bool:
+        """Send this session's remaining reads to the primary; True if it was reading from a replica"""
+        was_on_replica = self._read_replica is not None
+        self._read_replica = None
+        self._read_chosen = True
+        return was_on_replica
+
+    def read_source(self) -> str:
+        """Name of the database this session reads from"""
+        replica = self._choose_read_replica()
+        return replica.name if replica else "primary"
+
+def _last_write_marker(headers: Headers, window: float) -> Optional[float]:
+    values = [headers.get(LAST_WRITE_HEADER)]
+    try:
+        cookie = SimpleCookie(headers.get("cookie", ""))
+        if LAST_WRITE_COOKIE in cookie:
+            values.append(cookie[LAST_WRITE_COOKIE].value)
+    except CookieError:
+        pass
+    now = time.time()
+    marks = []
+    for value in values:
+        try:
+            marks.append(min(float(value), now))
+        except (TypeError, ValueError):
+            continue
+    last_write = max(marks, default=None)
+    # Any replica in rotation has applied writes older than the lag limit
+    return last_write if last_write is not None and now - last_write < window else None
+
+class ReplicaRoutingMiddleware:
+    """
+    ASGI middleware carrying the client's last-write marker in and out.
+    Requests pass straight through while ``router`` has no replicas.
+    """
+
+    def __init__(self, app, router: ReplicaRouter):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.router.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        max_lag = self.router.max_lag
+        routing = RequestRouting(last_write=_last_write_marker(Headers(scope=scope), max_lag))
+        token = request_routing.set(routing)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and routing.wrote:
+                marker = f"{time.time():.3f}"
+                headers = MutableHeaders(scope=message)
+                headers[LAST_WRITE_HEADER] = marker
+                headers.append(
+                    "Set-Cookie",
+                    f"{LAST_WRITE_COOKIE}={marker}; Max-Age={math.ceil(max_lag)}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_routing.reset(token)
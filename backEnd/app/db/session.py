@@ -1,17 +1,94 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.db.pool import instrument_pool, pool_options
+from app.db.replicas import Replica, ReplicaRouter, RoutingSession, replica_name
 
+# Async drivers used when ASYNC_DATABASE_URL is not set explicitly
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def get_async_database_url(url: str) -> str:
+    """Swap the sync DBAPI driver in a database URL for its asyncio counterpart"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}', set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+# Sync engine, used for schema management and background jobs
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True
+    **pool_options(settings.DATABASE_URL, "sync", settings.DB_SYNC_POOL_SIZE)
 )
+instrument_pool(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
+# Async engine, used by the request handlers so queries don't block the event loop
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **pool_options(ASYNC_DATABASE_URL, "async", settings.DB_POOL_SIZE, is_async=True)
+)
+instrument_pool(async_engine.sync_engine, "async")
+
+# Read replicas (DATABASE_REPLICA_URLS), measured and picked by replica_router
+replica_router = ReplicaRouter([], settings.DB_REPLICA_MAX_LAG_SECONDS)
+for _index, _url in enumerate(settings.DATABASE_REPLICA_URLS, 1):
+    _async_url = get_async_database_url(_url)
+    _pool_name = f"replica{_index}"
+    _replica = Replica(
+        replica_name(_url),
+        create_async_engine(_async_url, **pool_options(_async_url, _pool_name, settings.DB_POOL_SIZE, is_async=True)),
+        _pool_name
+    )
+    instrument_pool(_replica.engine.sync_engine, _pool_name)
+    replica_router.replicas.append(_replica)
+
+for _engine in (engine, async_engine.sync_engine, *(r.engine.sync_engine for r in replica_router.replicas)):
+    instrument_engine(_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    replicas=replica_router,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+def _enable_sqlite_savepoints(sync_engine) -> None:
+    """
+    pysqlite/aiosqlite defer BEGIN until the first DML statement, which breaks
+    SAVEPOINT. Take over transaction control so nested transactions work.
+    """
+    @event.listens_for(sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+for _engine in (engine, async_engine.sync_engine, *(r.engine.sync_engine for r in replica_router.replicas)):
+    if _engine.dialect.name == "sqlite":
+        _enable_sqlite_savepoints(_engine)
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
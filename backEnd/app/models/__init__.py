@@ -1,5 +1,10 @@
 from .item import Item
 from .user import User
 from .token import Token
+from .scheduler_lock import SchedulerLock
+from .table_version import TableVersion
+from .item_change import ItemChange
+from .replica_heartbeat import ReplicaHeartbeat
+from .stat_counter import StatCounter
 
-__all__ = ["Item", "User", "Token"]
\ No newline at end of file
+__all__ = ["Item", "User", "Token", "SchedulerLock", "TableVersion", "ItemChange", "ReplicaHeartbeat", "StatCounter"]
\ No newline at end of file
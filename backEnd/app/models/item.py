@@ -1,6 +1,5 @@
-from sqlalchemy import Column, Integer, String, inspect
+from sqlalchemy import Column, Integer, String
 from app.db.base_class import Base
-from app.db.session import engine
 
 class Item(Base):
     __tablename__ = "items"
@@ -15,12 +14,3 @@ class Item(Base):
             "name": self.name,
             "description": self.description
         }
-
-    @classmethod
-    def create_table_if_not_exists(cls):
-        inspector = inspect(engine)
-        if not inspector.has_table(cls.__tablename__):
-            Base.metadata.create_all(bind=engine, tables=[cls.__table__])
-            print(f"Table {cls.__tablename__} created")
-        else:
-            print(f"Table {cls.__tablename__} already exists")
\ No newline at end of file
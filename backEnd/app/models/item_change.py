@@ -0,0 +1,54 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, JSON, String, delete, select
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from app.db.base_class import Base
+
+class ItemChange(Base):
+    """
+    Change feed entry written in the same transaction as the item change.
+    ``seq`` orders the feed and is the resume cursor clients send back.
+    """
+    __tablename__ = "item_changes"
+
+    # SQLite only auto-increments INTEGER PRIMARY KEY columns
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    item_id = Column(Integer, nullable=False)
+    op = Column(String(10), nullable=False)
+    # The item after the change; NULL for deletes
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def to_dict(self):
+        return {
+            "seq": self.seq,
+            "op": self.op,
+            "id": self.item_id,
+            "item": self.data
+        }
+
+    @classmethod
+    def prune(
+        cls,
+        db: Session,
+        before: datetime,
+        batch_size: int = 1000,
+        max_batches: Optional[int] = None
+    ) -> int:
+        """
+        Delete entries older than ``before`` in short batches, at most
+        ``max_batches`` of them; return how many went
+        """
+        deleted = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            seqs = db.scalars(select(cls.seq).where(cls.created_at < before).limit(batch_size)).all()
+            if not seqs:
+                break
+            result = db.execute(
+                delete(cls).where(cls.seq.in_(seqs)).execution_options(synchronize_session=False)
+            )
+            db.commit()
+            deleted += result.rowcount
+            batches += 1
+        return deleted
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Double, String
+from app.db.base_class import Base
+
+class ReplicaHeartbeat(Base):
+    """Timestamp written to the primary by every worker; how old the copy on a replica is gives its lag"""
+    __tablename__ = "replica_heartbeats"
+
+    name = Column(String(100), primary_key=True)
+    # Unix time; a float keeps sub-second precision on every backend
+    beat_at = Column(Double, nullable=False)
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, String, DateTime, delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from app.db.base_class import Base
+
+class SchedulerLock(Base):
+    """Lease row used to elect the single worker that runs a periodic job"""
+    __tablename__ = "scheduler_locks"
+
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(100), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    @classmethod
+    def acquire(cls, db: Session, name: str, owner: str, ttl_seconds: int) -> bool:
+        """
+        Take or renew the lease on ``name``. Succeeds if nobody holds it, the
+        caller already holds it, or the previous holder's lease has lapsed.
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        result = db.execute(
+            update(cls)
+            .where(cls.name == name, or_(cls.owner == owner, cls.expires_at < now))
+            .values(owner=owner, expires_at=expires_at)
+        )
+        if result.rowcount:
+            db.commit()
+            return True
+
+        try:
+            db.add(cls(name=name, owner=owner, expires_at=expires_at))
+            db.commit()
+            return True
+        except IntegrityError:
+            # Another worker holds a live lease
+            db.rollback()
+            return False
+
+    @classmethod
+    def release(cls, db: Session, name: str, owner: str) -> None:
+        db.execute(delete(cls).where(cls.name == name, cls.owner == owner))
+        db.commit()
+
+    @classmethod
+    def release_all(cls, db: Session, owner: str) -> None:
+        """Give up every lease ``owner`` holds, e.g. on a clean shutdown"""
+        db.execute(delete(cls).where(cls.owner == owner))
+        db.commit()
@@ -0,0 +1,14 @@
+from sqlalchemy import BigInteger, Column, String
+from app.db.base_class import Base
+
+class StatCounter(Base):
+    """
+    Summary counter kept in step with the data by the handlers that change it.
+    ``period`` is empty for running totals and a day, ISO week or month key
+    (``2026-10-18``, ``2026-W42``, ``2026-10``) for per-period counts.
+    """
+    __tablename__ = "stat_counters"
+
+    name = Column(String(50), primary_key=True)
+    period = Column(String(20), primary_key=True, default="")
+    value = Column(BigInteger, nullable=False, default=0)
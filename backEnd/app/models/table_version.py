@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, Integer, String
+from datetime import datetime
+from app.db.base_class import Base
+
+class TableVersion(Base):
+    """Change counter per table, bumped in every transaction that writes to it"""
+    __tablename__ = "table_versions"
+
+    name = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
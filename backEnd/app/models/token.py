@@ -1,41 +1,81 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, inspect
+from sqlalchemy import CHAR, Column, String, DateTime, Boolean, ForeignKey, Index, delete, select
 from sqlalchemy.orm import relationship, Session
 from datetime import datetime
+from typing import Dict, Optional
+from app.core.config import settings
 from app.db.base_class import Base
-from app.db.session import engine
+
+# Partitioned by expires_at (see app/db/partitions.py), which MySQL only allows
+# when expires_at is part of every unique key and the table has no foreign keys
+PARTITIONED = settings.TOKEN_STORAGE == "partitioned"
 
 class Token(Base):
     __tablename__ = "tokens"
 
     id = Column(String(100), primary_key=True, index=True)
-    token = Column(String(500), unique=True, index=True)
-    user_id = Column(String(100), ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    # SHA-256 hex digest of the JWT, the lookup key for verify_token_db
+    token_hash = Column(CHAR(64), unique=not PARTITIONED, index=True)
+    # Legacy raw JWT, no longer written; cleared by migrate_token_hashes
+    token = Column(String(500), nullable=True)
+    user_id = Column(
+        String(100),
+        *([] if PARTITIONED else [ForeignKey("users.id", ondelete="CASCADE")]),
+        index=True
+    )
     created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime)
+    expires_at = Column(DateTime, primary_key=PARTITIONED, nullable=not PARTITIONED)
     is_revoked = Column(Boolean, default=False)
     
     # Add relationship to User model
-    user = relationship("User", back_populates="tokens")
+    user = relationship("User", back_populates="tokens", primaryjoin="User.id == foreign(Token.user_id)")
 
-    @classmethod
-    def create_table_if_not_exists(cls):
-        inspector = inspect(engine)
-        if not inspector.has_table(cls.__tablename__):
-            Base.metadata.create_all(bind=engine, tables=[cls.__table__])
-            print(f"Table {cls.__tablename__} created")
-        else:
-            print(f"Table {cls.__tablename__} already exists")
+    __table_args__ = (
+        # Lets expiry scans range over expires_at without touching the table rows
+        Index("ix_tokens_expires_at_is_revoked", "expires_at", "is_revoked"),
+    )
+    # Tokens are still identified by id alone, whatever the table's primary key
+    __mapper_args__ = {"primary_key": [id]}
 
     @classmethod
-    def cleanup_tokens(cls, db: Session):
-        """Remove expired and revoked tokens from the database"""
+    def cleanup_tokens(
+        cls,
+        db: Session,
+        batch_size: int = 1000,
+        max_batches: Optional[int] = None,
+        expired: bool = True
+    ) -> Dict[str, int]:
+        """
+        Remove expired and revoked tokens from the database.
+        Rows are deleted in batches of ``batch_size``, each in its own short
+        transaction, so a large purge never holds long locks on the table.
+        Expired and revoked tokens each get up to ``max_batches`` batches, so a
+        backlog of one never starves the other.
+        Pass ``expired=False`` when expired rows go with their partitions.
+        """
+        now = datetime.utcnow()
+        conditions = {
+            "expired": cls.expires_at < now,
+            # Bounded by expires_at so this also ranges over the composite index
+            "revoked": (cls.expires_at >= now) & (cls.is_revoked == True),
+        }
+        if not expired:
+            del conditions["expired"]
+        counts = {kind: 0 for kind in conditions}
         try:
-            deleted = db.query(cls).filter(
-                (cls.expires_at < datetime.utcnow()) | 
-                (cls.is_revoked == True)
-            ).delete()
-            db.commit()
-            print(f"Cleaned up {deleted} tokens")
+            for kind, condition in conditions.items():
+                batches = 0
+                while max_batches is None or batches < max_batches:
+                    ids = db.scalars(select(cls.id).where(condition).limit(batch_size)).all()
+                    if not ids:
+                        break
+                    result = db.execute(
+                        delete(cls).where(cls.id.in_(ids)).execution_options(synchronize_session=False)
+                    )
+                    db.commit()
+                    counts[kind] += result.rowcount
+                    batches += 1
+            print(f"Cleaned up {sum(counts.values())} tokens")
         except Exception as e:
             db.rollback()
-            print(f"Error cleaning up tokens: {e}")
\ No newline at end of file
+            print(f"Error cleaning up tokens: {e}")
+        return counts
\ No newline at end of file
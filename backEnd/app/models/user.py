@@ -1,7 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, inspect
+from sqlalchemy import Column, DateTime, Integer, String, Boolean
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
-from app.db.session import engine
 
 class User(Base):
     __tablename__ = "users"
@@ -11,9 +10,15 @@ class User(Base):
     email = Column(String(255), unique=True, index=True)
     password = Column(String(255))
     is_active = Column(Boolean, default=True)
+    # Last sign-in or token refresh, which counts the user as active in that period
+    last_login_at = Column(DateTime, nullable=True)
     
     # Add this line to establish bidirectional relationship
-    tokens = relationship("Token", back_populates="user", cascade="all, delete-orphan")
+    tokens = relationship(
+        "Token", back_populates="user", cascade="all, delete-orphan",
+        # Spelled out because partitioned token tables have no foreign key
+        primaryjoin="User.id == foreign(Token.user_id)"
+    )
 
     def to_dict(self):
         return {
@@ -22,12 +27,3 @@ class User(Base):
             "email": self.email,
             "is_active": self.is_active
         }
-
-    @classmethod
-    def create_table_if_not_exists(cls):
-        inspector = inspect(engine)
-        if not inspector.has_table(cls.__tablename__):
-            Base.metadata.create_all(bind=engine, tables=[cls.__table__])
-            print(f"Table {cls.__tablename__} created")
-        else:
-            print(f"Table {cls.__tablename__} already exists")
\ No newline at end of file
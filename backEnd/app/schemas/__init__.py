@@ -1,5 +1,8 @@
 from .user import UserBase, UserCreate, UserResponse, UserLogin
-from .item import ItemCreate, ItemResponse
+from .item import (
+    ItemCreate, ItemResponse, ItemSearchResult, ItemPatch, ItemBulkCreate, ItemBulkUpdate,
+    ItemBulkDelete, BulkItemResult, BulkItemResponse
+)
 
 __all__ = [
     "UserBase",
@@ -7,5 +10,12 @@ __all__ = [
     "UserResponse",
     "UserLogin",
     "ItemCreate",
-    "ItemResponse"
+    "ItemResponse",
+    "ItemSearchResult",
+    "ItemPatch",
+    "ItemBulkCreate",
+    "ItemBulkUpdate",
+    "ItemBulkDelete",
+    "BulkItemResult",
+    "BulkItemResponse"
 ]
\ No newline at end of file
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, validator
+from typing import Dict, List, Literal, Optional
+from app.core.config import settings
 
 class ItemBase(BaseModel):
     name: str
@@ -12,4 +13,48 @@ class ItemResponse(ItemBase):
     id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ItemSearchResult(ItemResponse):
+    score: float
+    # HTML-escaped field text with matched words wrapped in <mark>, for fields that matched
+    highlights: Dict[str, str]
+
+BulkMode = Literal["atomic", "best_effort"]
+
+class ItemPatch(BaseModel):
+    """Fields left out are unchanged; only the description can be cleared with null"""
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+
+    @validator('name')
+    def name_not_null(cls, v):
+        # Only runs for fields that were sent
+        if v is None:
+            raise ValueError('name cannot be null')
+        return v
+
+class ItemBulkCreate(BaseModel):
+    items: List[ItemCreate] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+    mode: BulkMode = "atomic"
+
+class ItemBulkUpdate(BaseModel):
+    items: List[ItemPatch] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+    mode: BulkMode = "atomic"
+
+class ItemBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+    mode: BulkMode = "atomic"
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: Literal["created", "updated", "deleted", "not_found", "failed"]
+    error: Optional[str] = None
+
+class BulkItemResponse(BaseModel):
+    mode: BulkMode
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
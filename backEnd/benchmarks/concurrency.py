@@ -0,0 +1,70 @@
+"""
+Concurrent-request throughput benchmark.
+
+Boots the API, seeds a user and some items, then drives ``--concurrency``
+simultaneous clients against authenticated item reads. Comparing two trees
+shows whether database calls block the event loop, e.g. before/after the
+async session change:
+
+    git worktree add /tmp/api-before <old-commit>
+    python -m benchmarks.concurrency --app-dir /tmp/api-before/backEnd -o before.json
+    python -m benchmarks.concurrency -o after.json
+
+Point DATABASE_URL at MySQL to include real network latency; SQLite is the default.
+"""
+import argparse
+import asyncio
+import random
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import (
+    API_PREFIX, BACKEND_DIR, register_and_login, running_server, seed_items, summarize, write_results
+)
+
+async def drive(base_url: str, headers: dict, item_ids: list, concurrency: int, total: int) -> dict:
+    latencies, errors = [], 0
+    remaining = total
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            path = random.choice([f"{API_PREFIX}/items/{random.choice(item_ids)}", f"{API_PREFIX}/users/me"])
+            start = time.perf_counter()
+            resp = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed, errors)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", type=Path, default=BACKEND_DIR, help="backEnd directory to benchmark")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    with running_server(args.app_dir) as base_url:
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            headers = register_and_login(client)
+            item_ids = seed_items(client, headers, args.items)
+        results = asyncio.run(drive(base_url, headers, item_ids, args.concurrency, args.requests))
+
+    write_results(args.output, "concurrency", {
+        "concurrency": args.concurrency,
+        "results": results,
+    }, app_dir=args.app_dir)
+
+if __name__ == "__main__":
+    main()
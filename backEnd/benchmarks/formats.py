@@ -0,0 +1,104 @@
+"""
+List response formats compared on a large page.
+
+Encodes the same ``--rows`` items (default 100000) every way GET /items/ can
+answer and reports, per format, the best encode time, the client's decode
+time and the payload size raw and gzipped (what the compression middleware
+sends):
+
+- ``json``: ORM objects through ``to_dict()`` and orjson, the JSON path.
+- ``msgpack``: the row tuples encoded column-wise by ``app.api.formats``.
+- ``arrow``: the same, as an Arrow IPC stream. Decoding stops at the Arrow
+  table, which is what a columnar consumer works with.
+
+Formats whose package is not installed are skipped.
+
+    python -m benchmarks.formats --rows 100000
+"""
+import argparse
+import gzip
+import os
+import time
+from typing import Callable, List, Tuple
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+
+import orjson
+from sqlalchemy import select
+
+from app.api.formats import ARROW, ENCODERS, MSGPACK, msgpack, pyarrow
+from app.api.responses import encode_json
+from app.models.item import Item
+from benchmarks.common import write_results
+from benchmarks.serialization import make_items
+
+STMT = select(Item.id, Item.name, Item.description)
+
+def best_ms(run: Callable[[], object], repeat: int) -> Tuple[float, object]:
+    """Best wall time of ``repeat`` runs after a warm-up, and the last result"""
+    result = run()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 2), result
+
+def decode_json(body: bytes) -> List[dict]:
+    return orjson.loads(body)
+
+def decode_msgpack(body: bytes):
+    return msgpack.unpackb(body)
+
+def decode_arrow(body: bytes):
+    return pyarrow.ipc.open_stream(body).read_all()
+
+def as_rows(decoded) -> List[dict]:
+    """Decoded payload as row dicts, to check every format carries the same data"""
+    if isinstance(decoded, list):
+        return decoded
+    if isinstance(decoded, dict):
+        return [dict(zip(decoded, values)) for values in zip(*decoded.values())]
+    return decoded.to_pylist()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    items = make_items(args.rows)
+    # What the DB hands the binary paths: plain row tuples
+    rows = [(item.id, item.name, item.description) for item in items]
+
+    formats = {"json": (lambda: encode_json([item.to_dict() for item in items]), decode_json)}
+    if MSGPACK in ENCODERS:
+        formats["msgpack"] = (lambda: ENCODERS[MSGPACK](STMT, rows), decode_msgpack)
+    if ARROW in ENCODERS:
+        formats["arrow"] = (lambda: ENCODERS[ARROW](STMT, rows), decode_arrow)
+
+    results = {}
+    expected = None
+    for name, (encode, decode) in formats.items():
+        encode_ms, body = best_ms(encode, args.repeat)
+        decode_ms, decoded = best_ms(lambda: decode(body), args.repeat)
+        decoded_rows = as_rows(decoded)
+        expected = expected if expected is not None else decoded_rows
+        assert decoded_rows == expected, f"{name} changed the payload"
+        results[name] = {
+            "encode_ms": encode_ms,
+            "decode_ms": decode_ms,
+            "bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body, compresslevel=6)),
+        }
+
+    for name, result in results.items():
+        result["encode_vs_json"] = round(result["encode_ms"] / results["json"]["encode_ms"], 3)
+        result["size_vs_json"] = round(result["bytes"] / results["json"]["bytes"], 3)
+
+    write_results(args.output, "formats", {"rows": args.rows, "results": results})
+
+if __name__ == "__main__":
+    main()
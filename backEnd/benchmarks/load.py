@@ -0,0 +1,283 @@
+"""
+Scenario load test for the whole API.
+
+Boots ``main:app`` against a throwaway SQLite database, a local MySQL
+container (``--mysql``, needs Docker) or the DATABASE_URL you export, seeds
+``--users`` users and ``--items`` items, then runs each scenario for
+``--duration`` seconds with ``--concurrency`` simultaneous clients:
+
+- ``login_storm``: password logins (``login``, bcrypt bound)
+- ``reads``: authenticated item and profile reads (``verify_token_db``)
+- ``scan``: keyset-paginated walks over the whole item list (``read_all_items``)
+- ``writes``: item create/update/delete bursts
+- ``refresh``: token rotation (``refresh_token``)
+- ``mixed``: a blend of all of the above
+
+Each scenario reports RPS and p50/p95/p99 latency overall and per operation,
+plus SQL statements and DB time per request read from the server's /metrics.
+Save runs with ``-o`` and compare two of them:
+
+    python -m benchmarks.load --scenario reads scan -o after.json
+    python -m benchmarks.load --compare before.json after.json
+
+Runs are reproducible for a given ``--seed``, apart from timing. Failed
+requests are counted per status code (0 for dropped connections). SQLite
+rejects concurrent read-then-write transactions with "database is locked",
+so judge the write-heavy scenarios against MySQL.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy.engine import make_url
+
+from benchmarks.common import (
+    API_PREFIX, BACKEND_DIR, DEFAULT_PASSWORD, db_stats_by_route, mysql_container, register_and_login,
+    running_server, seed_items_bulk, seed_users, summarize, write_results
+)
+
+SCAN_PAGE_SIZE = 100
+
+class Client:
+    """One simulated user: its own token, scan position and random stream"""
+
+    def __init__(self, http: httpx.AsyncClient, username: str, headers: Dict[str, str], rng: random.Random,
+                 item_ids: List[int], created: List[int]):
+        self.http = http
+        self.username = username
+        self.headers = headers
+        self.rng = rng
+        self.item_ids = item_ids
+        # Items created during the run, shared so deletes never hit seeded rows
+        self.created = created
+        self.scan_cursor: Optional[str] = None
+
+    async def login(self) -> httpx.Response:
+        resp = await self.http.post(
+            f"{API_PREFIX}/users/login", json={"login": self.username, "password": DEFAULT_PASSWORD}
+        )
+        if resp.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        return resp
+
+    async def refresh(self) -> httpx.Response:
+        resp = await self.http.post(f"{API_PREFIX}/users/token/refresh", headers=self.headers)
+        if resp.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        return resp
+
+    async def me(self) -> httpx.Response:
+        return await self.http.get(f"{API_PREFIX}/users/me", headers=self.headers)
+
+    async def item_get(self) -> httpx.Response:
+        return await self.http.get(f"{API_PREFIX}/items/{self.rng.choice(self.item_ids)}", headers=self.headers)
+
+    async def list_items(self) -> httpx.Response:
+        return await self.http.get(f"{API_PREFIX}/items/", params={"limit": 50}, headers=self.headers)
+
+    async def scan(self) -> httpx.Response:
+        """Fetch the next page of a full walk, starting over after the last one"""
+        params = {"limit": SCAN_PAGE_SIZE}
+        if self.scan_cursor:
+            params["cursor"] = self.scan_cursor
+        resp = await self.http.get(f"{API_PREFIX}/items/", params=params, headers=self.headers)
+        self.scan_cursor = resp.headers.get("x-next-cursor")
+        return resp
+
+    async def create(self) -> httpx.Response:
+        resp = await self.http.post(f"{API_PREFIX}/items/", headers=self.headers, json={
+            "name": f"load-{self.rng.getrandbits(32):08x}",
+            "description": "created by the load benchmark",
+        })
+        if resp.status_code == 200:
+            self.created.append(resp.json()["id"])
+        return resp
+
+    async def update(self) -> httpx.Response:
+        item_id = self.rng.choice(self.item_ids)
+        return await self.http.put(f"{API_PREFIX}/items/{item_id}", headers=self.headers, json={
+            "name": f"item-{item_id:07d}",
+            "description": f"updated {self.rng.getrandbits(32):08x}",
+        })
+
+    async def delete(self) -> httpx.Response:
+        return await self.http.delete(f"{API_PREFIX}/items/{self.created.pop()}", headers=self.headers)
+
+# Operation -> (Client method, route template it is counted under in /metrics)
+OPERATIONS: Dict[str, Tuple[Callable, str]] = {
+    "login": (Client.login, f"{API_PREFIX}/users/login"),
+    "refresh": (Client.refresh, f"{API_PREFIX}/users/token/refresh"),
+    "me": (Client.me, f"{API_PREFIX}/users/me"),
+    "item_get": (Client.item_get, f"{API_PREFIX}/items/{{item_id}}"),
+    "list_items": (Client.list_items, f"{API_PREFIX}/items/"),
+    "scan": (Client.scan, f"{API_PREFIX}/items/"),
+    "create": (Client.create, f"{API_PREFIX}/items/"),
+    "update": (Client.update, f"{API_PREFIX}/items/{{item_id}}"),
+    "delete": (Client.delete, f"{API_PREFIX}/items/{{item_id}}"),
+}
+
+# Scenario -> operation weights
+SCENARIOS: Dict[str, Dict[str, int]] = {
+    "login_storm": {"login": 1},
+    "reads": {"item_get": 6, "me": 2, "list_items": 2},
+    "scan": {"scan": 1},
+    "writes": {"create": 5, "update": 3, "delete": 2},
+    "refresh": {"refresh": 1},
+    "mixed": {
+        "item_get": 40, "list_items": 15, "scan": 10, "me": 10,
+        "create": 8, "update": 7, "delete": 3, "login": 4, "refresh": 3,
+    },
+}
+
+async def drive(base_url: str, users: List[Tuple[str, Dict[str, str]]], item_ids: List[int],
+                weights: Dict[str, int], args, seconds: float) -> Tuple[Dict[str, list], float]:
+    """Run the weighted mix for ``seconds``; return (operation -> [(latency, status)], elapsed)"""
+    operations, op_weights = list(weights), list(weights.values())
+    samples: Dict[str, list] = {name: [] for name in operations}
+    created: List[int] = []
+
+    async def worker(index: int, http: httpx.AsyncClient, deadline: float):
+        username, headers = users[index % len(users)]
+        client = Client(http, username, headers, random.Random(args.seed + index), item_ids, created)
+        while time.perf_counter() < deadline:
+            name = client.rng.choices(operations, op_weights)[0]
+            if name == "delete" and not client.created:
+                name = "create"
+            method, _ = OPERATIONS[name]
+            start = time.perf_counter()
+            try:
+                status = (await method(client)).status_code
+            except httpx.HTTPError:
+                # Connection-level failure
+                status = 0
+            samples.setdefault(name, []).append((time.perf_counter() - start, status))
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as http:
+        start = time.perf_counter()
+        deadline = start + seconds
+        await asyncio.gather(*(worker(i, http, deadline) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+def db_usage(before: Dict[str, Dict[str, float]], after: Dict[str, Dict[str, float]], route: str) -> dict:
+    delta = {
+        key: after.get(route, {}).get(key, 0) - before.get(route, {}).get(key, 0)
+        for key in ("requests", "queries", "db_seconds")
+    }
+    if not delta["requests"]:
+        return {"queries_per_request": None, "db_ms_per_request": None}
+    return {
+        "queries_per_request": round(delta["queries"] / delta["requests"], 2),
+        "db_ms_per_request": round(delta["db_seconds"] / delta["requests"] * 1000, 3),
+    }
+
+def run_scenario(base_url: str, users, item_ids: List[int], name: str, args) -> dict:
+    weights = SCENARIOS[name]
+    if args.warmup:
+        asyncio.run(drive(base_url, users, item_ids, weights, args, args.warmup))
+    before = db_stats_by_route(base_url)
+    samples, elapsed = asyncio.run(drive(base_url, users, item_ids, weights, args, args.duration))
+    after = db_stats_by_route(base_url)
+
+    def summarize_samples(op_samples: list) -> dict:
+        failures = Counter(str(status) for _, status in op_samples if not 0 < status < 400)
+        return {
+            **summarize([latency for latency, _ in op_samples], elapsed, sum(failures.values())),
+            "errors_by_status": dict(failures),
+        }
+
+    everything = [sample for op_samples in samples.values() for sample in op_samples]
+    operations = {
+        op: {
+            **summarize_samples(op_samples),
+            # Operations sharing a route (list_items/scan/create) share these figures
+            **db_usage(before, after, OPERATIONS[op][1]),
+        }
+        for op, op_samples in samples.items() if op_samples
+    }
+    return {**summarize_samples(everything), "operations": operations}
+
+def compare(base_path: str, new_path: str) -> None:
+    """Print RPS, p95 and queries/request of two saved runs side by side"""
+    base, new = (json.loads(Path(path).read_text()) for path in (base_path, new_path))
+    print(f"{base.get('revision')} -> {new.get('revision')}")
+    print(f"{'scenario/operation':32} {'rps':>17} {'p95 ms':>19} {'queries/req':>15}")
+
+    def change(old, current) -> str:
+        if old is None and current is None:
+            return ""
+        if old is None or current is None:
+            return f"{str(old):>7} -> {str(current):<7}"
+        pct = f"{(current - old) / old * 100:+.0f}%" if old else ""
+        return f"{old:>7} -> {current:<7} {pct}"
+
+    for scenario, result in new["results"].items():
+        old_result = base["results"].get(scenario)
+        if old_result is None:
+            continue
+        rows = [(scenario, old_result, result)] + [
+            (f"  {op}", old_result["operations"].get(op), stats)
+            for op, stats in result["operations"].items()
+        ]
+        for label, old, current in rows:
+            if old is None:
+                continue
+            print(f"{label:32} {change(old['rps'], current['rps']):>17} "
+                  f"{change(old['p95_ms'], current['p95_ms']):>19} "
+                  f"{change(old.get('queries_per_request'), current.get('queries_per_request')):>15}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", type=Path, default=BACKEND_DIR, help="backEnd directory to benchmark")
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20, help="seconds measured per scenario")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before each scenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mysql", action="store_true", help="run against a throwaway MySQL container")
+    parser.add_argument("--bcrypt-rounds", type=int, help="override BCRYPT_ROUNDS on the server")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two saved results")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    env = {"BCRYPT_ROUNDS": str(args.bcrypt_rounds)} if args.bcrypt_rounds else {}
+    results = {}
+    with ExitStack() as stack:
+        if args.mysql:
+            env["DATABASE_URL"] = stack.enter_context(mysql_container())
+        backend = make_url(env.get("DATABASE_URL") or os.environ.get("DATABASE_URL", "sqlite://")).get_backend_name()
+        base_url = stack.enter_context(running_server(args.app_dir, env=env))
+        with httpx.Client(base_url=base_url, timeout=120) as client:
+            item_ids = seed_items_bulk(client, register_and_login(client), args.items)
+        # SQLite fails concurrent read-then-write transactions with "database is locked"
+        users = seed_users(base_url, args.users, concurrency=1 if backend == "sqlite" else 16)
+        for name in args.scenario:
+            results[name] = run_scenario(base_url, users, item_ids, name, args)
+
+    write_results(args.output, "load", {
+        "database": backend,
+        "users": args.users,
+        "items": args.items,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "seed": args.seed,
+        "results": results,
+    }, app_dir=args.app_dir)
+
+if __name__ == "__main__":
+    main()
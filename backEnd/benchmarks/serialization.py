@@ -0,0 +1,102 @@
+"""
+Response serialisation micro-benchmark for a large item list.
+
+Encodes the same ``--rows`` items the ways a handler can return them and
+reports total time and cost per row:
+
+- ``validate_json``: the old path. FastAPI's own ``serialize_response``
+  validates the ``to_dict()`` output against ``List[ItemResponse]`` and dumps
+  it, then JSONResponse encodes it with stdlib json.
+- ``validate_orjson``: the same validation, encoded by ORJSONResponse (what the
+  default response class gives handlers that still return plain dicts).
+- ``from_attributes``: pydantic builds the models straight from ORM rows and
+  dumps JSON in one pass, without ``to_dict()``.
+- ``trusted_orjson``: ``to_dict()`` output encoded once by ``trusted_json``.
+
+    python -m benchmarks.serialization --rows 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Callable, List
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+
+from app.api.responses import trusted_json
+from app.models.item import Item
+from app.schemas.item import ItemResponse
+from benchmarks.common import write_results
+
+ITEM_LIST = TypeAdapter(List[ItemResponse])
+RESPONSE_FIELD = create_model_field("Response_items", List[ItemResponse], mode="serialization")
+
+def make_items(count: int) -> List[Item]:
+    return [
+        Item(id=i, name=f"item-{i:07d}", description=f"benchmark item {i} with a longer description")
+        for i in range(1, count + 1)
+    ]
+
+def fastapi_serialize(items: List[Item]):
+    rows = [item.to_dict() for item in items]
+    return asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=rows))
+
+def validate_json(items: List[Item]) -> bytes:
+    return JSONResponse(fastapi_serialize(items)).body
+
+def validate_orjson(items: List[Item]) -> bytes:
+    return ORJSONResponse(fastapi_serialize(items)).body
+
+def from_attributes(items: List[Item]) -> bytes:
+    return ITEM_LIST.dump_json(ITEM_LIST.validate_python(items, from_attributes=True))
+
+def trusted_orjson(items: List[Item]) -> bytes:
+    return trusted_json([item.to_dict() for item in items]).body
+
+STRATEGIES = {
+    "validate_json": validate_json,
+    "validate_orjson": validate_orjson,
+    "from_attributes": from_attributes,
+    "trusted_orjson": trusted_orjson,
+}
+
+def measure(encode: Callable[[List[Item]], bytes], items: List[Item], repeat: int) -> dict:
+    encode(items)  # warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode(items)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "best_ms": round(best * 1000, 2),
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 2),
+        "per_row_us": round(best / len(items) * 1e6, 3),
+        "bytes": len(body),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    items = make_items(args.rows)
+    expected = json.loads(validate_json(items))
+    results = {}
+    for name, encode in STRATEGIES.items():
+        assert json.loads(encode(items)) == expected, f"{name} changed the payload"
+        results[name] = measure(encode, items, args.repeat)
+
+    write_results(args.output, "serialization", {"rows": args.rows, "results": results})
+
+if __name__ == "__main__":
+    main()
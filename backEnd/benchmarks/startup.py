@@ -0,0 +1,88 @@
+"""
+Worker cold-start benchmark.
+
+Starts ``uvicorn main:app`` repeatedly against an already initialised database
+and measures the time from process spawn until the first HTTP response, with
+schema synchronisation on startup enabled and disabled. Also reports the time
+spent importing ``main`` alone.
+
+    python -m benchmarks.startup --runs 10 --target-ms 1500
+
+With ``--target-ms`` the script exits non-zero when the p95 cold start of the
+production configuration (schema sync off) exceeds the target, so it can gate
+a CI job. Compare trees with ``--app-dir`` as for the other benchmarks.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from benchmarks.common import BACKEND_DIR, free_port, summarize, wait_until_ready, write_results
+
+SCENARIOS = {
+    "schema_sync": {"DB_SCHEMA_SYNC_ON_STARTUP": "true"},
+    "no_schema_sync": {"DB_SCHEMA_SYNC_ON_STARTUP": "false"},
+}
+
+def cold_start(app_dir: Path, env: dict) -> float:
+    """Seconds from spawning uvicorn until it answers a request"""
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(proc, f"http://127.0.0.1:{port}", interval=0.005)
+        return time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+def import_time(app_dir: Path, env: dict) -> float:
+    output = subprocess.check_output(
+        [sys.executable, "-c", "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"],
+        cwd=app_dir,
+        env=env,
+        text=True,
+    )
+    return float(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", type=Path, default=BACKEND_DIR, help="backEnd directory to benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, help="fail if the no_schema_sync p95 exceeds this")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    env = {**os.environ}
+    env.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+    env.setdefault("DATABASE_URL", f"sqlite:///{Path('/tmp') / f'bench-{uuid.uuid4().hex}.db'}")
+    # Only the startup path is measured; keep background jobs from racing it
+    env.setdefault("TOKEN_CLEANUP_ENABLED", "false")
+
+    # The first boot creates the schema so every measured run sees an existing database
+    cold_start(args.app_dir, env)
+
+    results = {}
+    for name, overrides in SCENARIOS.items():
+        scenario_env = {**env, **overrides}
+        latencies = [cold_start(args.app_dir, scenario_env) for _ in range(args.runs)]
+        summary = summarize(latencies, sum(latencies))
+        results[name] = {key: summary[key] for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms")}
+    imports = sorted(import_time(args.app_dir, env) for _ in range(args.runs))
+    results["import_main_ms"] = round(imports[len(imports) // 2] * 1000, 1)
+
+    write_results(args.output, "startup", {"runs": args.runs, "results": results}, args.app_dir)
+
+    if args.target_ms and results["no_schema_sync"]["p95_ms"] > args.target_ms:
+        sys.exit(f"p95 cold start {results['no_schema_sync']['p95_ms']} ms exceeds target {args.target_ms} ms")
+
+if __name__ == "__main__":
+    main()
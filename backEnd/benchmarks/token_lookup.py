@@ -0,0 +1,124 @@
+"""
+Token lookup micro-benchmark: unique index on the raw 500-char JWT versus a
+CHAR(64) SHA-256 digest.
+
+Builds both layouts side by side, inserts the same tokens into each and
+reports insert time, index size and point-lookup latency. Defaults to a
+temporary SQLite file; pass --database-url to measure MySQL/InnoDB.
+
+    python -m benchmarks.token_lookup --rows 200000 --lookups 20000
+"""
+import argparse
+import base64
+import hashlib
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+from sqlalchemy import CHAR, Column, MetaData, String, Table, create_engine, select, text
+from sqlalchemy.engine import Engine
+
+from benchmarks.common import write_results
+
+# Every HS256 JWT issued by the app starts with this header segment
+JWT_HEADER = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').decode().rstrip("=")
+
+def fake_jwt() -> str:
+    payload = base64.urlsafe_b64encode(os.urandom(150)).decode().rstrip("=")
+    signature = base64.urlsafe_b64encode(os.urandom(32)).decode().rstrip("=")
+    return f"{JWT_HEADER}.{payload}.{signature}"
+
+def build_tables(metadata: MetaData) -> Dict[str, Table]:
+    return {
+        "raw": Table(
+            "bench_tokens_raw", metadata,
+            Column("id", String(100), primary_key=True),
+            Column("token", String(500), unique=True, index=True),
+        ),
+        "hashed": Table(
+            "bench_tokens_hashed", metadata,
+            Column("id", String(100), primary_key=True),
+            Column("token_hash", CHAR(64), unique=True, index=True),
+        ),
+    }
+
+def index_size(engine: Engine, table: Table) -> int:
+    """Bytes used by the table's secondary lookup index"""
+    index_name = next(iter(table.indexes)).name
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            return conn.execute(text("SELECT SUM(pgsize) FROM dbstat WHERE name = :n"), {"n": index_name}).scalar() or 0
+        if engine.dialect.name == "mysql":
+            conn.execute(text(f"ANALYZE TABLE {table.name}"))
+            return conn.execute(text(
+                "SELECT stat_value * @@innodb_page_size FROM mysql.innodb_index_stats "
+                "WHERE database_name = DATABASE() AND table_name = :t AND index_name = :i AND stat_name = 'size'"
+            ), {"t": table.name, "i": index_name}).scalar() or 0
+    return 0
+
+def run(engine: Engine, tokens: List[str], lookups: int, batch: int = 1000) -> dict:
+    metadata = MetaData()
+    tables = build_tables(metadata)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    keys = {
+        "raw": lambda token: token,
+        "hashed": lambda token: hashlib.sha256(token.encode()).hexdigest(),
+    }
+    sample = random.sample(tokens, min(lookups, len(tokens)))
+    results = {}
+    try:
+        for name, table in tables.items():
+            column = table.c.token if name == "raw" else table.c.token_hash
+            start = time.perf_counter()
+            with engine.begin() as conn:
+                for offset in range(0, len(tokens), batch):
+                    conn.execute(table.insert(), [
+                        {"id": f"{offset + i}", column.key: keys[name](token)}
+                        for i, token in enumerate(tokens[offset:offset + batch])
+                    ])
+            insert_s = time.perf_counter() - start
+
+            latencies = []
+            with engine.connect() as conn:
+                for token in sample:
+                    key = keys[name](token)
+                    t0 = time.perf_counter()
+                    conn.execute(select(table.c.id).where(column == key)).first()
+                    latencies.append(time.perf_counter() - t0)
+            latencies.sort()
+
+            results[name] = {
+                "insert_s": round(insert_s, 3),
+                "index_bytes": index_size(engine, table),
+                "lookup_mean_us": round(sum(latencies) / len(latencies) * 1e6, 1),
+                "lookup_p99_us": round(latencies[int(0.99 * (len(latencies) - 1))] * 1e6, 1),
+            }
+    finally:
+        metadata.drop_all(engine)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.database_url or f"sqlite:///{tmp}/tokens.db")
+        tokens = [fake_jwt() for _ in range(args.rows)]
+        results = run(engine, tokens, args.lookups)
+        engine.dispose()
+
+    write_results(args.output, "token_lookup", {
+        "dialect": engine.dialect.name,
+        "rows": args.rows,
+        "results": results,
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Worker-count scaling benchmark.
+
+Starts ``serve.py`` with 1, 2, 4 and one-per-CPU workers in turn and measures
+authenticated item and profile reads against each. Load comes from several
+client processes so the generator itself does not cap throughput:
+
+    python -m benchmarks.workers --requests 20000 --concurrency 128 --clients 4
+
+On a shared machine the clients compete with the server for CPU; for clean
+numbers run them elsewhere or leave cores free. SQLite serialises writes but
+this benchmark only reads; point DATABASE_URL at MySQL to include it.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import httpx
+
+from benchmarks.common import (
+    API_PREFIX, BACKEND_DIR, register_and_login, running_server, seed_items, summarize, write_results
+)
+
+def client_process(args: Tuple[str, dict, List[int], int, int]) -> Tuple[List[float], int]:
+    base_url, headers, item_ids, concurrency, total = args
+
+    async def run():
+        latencies, errors = [], 0
+        remaining = total
+
+        async def worker(client: httpx.AsyncClient):
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                path = random.choice([f"{API_PREFIX}/items/{random.choice(item_ids)}", f"{API_PREFIX}/users/me"])
+                start = time.perf_counter()
+                resp = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                if resp.status_code != 200:
+                    errors += 1
+
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        return latencies, errors
+
+    return asyncio.run(run())
+
+def measure(base_url: str, headers: dict, item_ids: List[int], args) -> dict:
+    per_client = max(1, args.concurrency // args.clients)
+    jobs = [(base_url, headers, item_ids, per_client, args.requests // args.clients)] * args.clients
+    with multiprocessing.Pool(args.clients) as pool:
+        start = time.perf_counter()
+        outcomes = pool.map(client_process, jobs)
+        elapsed = time.perf_counter() - start
+    latencies = [latency for client_latencies, _ in outcomes for latency in client_latencies]
+    return summarize(latencies, elapsed, sum(errors for _, errors in outcomes))
+
+def default_workers() -> int:
+    # Same rule as serve.py, which cannot be imported here without the app's settings
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", type=Path, default=BACKEND_DIR, help="backEnd directory to benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts (default: 1 2 4 and CPU count)")
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--preload", action="store_true")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    worker_counts = args.workers or sorted({1, 2, 4, default_workers()})
+    command = [sys.executable, "serve.py", "--host", "127.0.0.1"]
+    if args.preload:
+        command.append("--preload")
+
+    results = {}
+    for workers in worker_counts:
+        with running_server(args.app_dir, command=command, extra_args=["--workers", str(workers)]) as base_url:
+            with httpx.Client(base_url=base_url, timeout=60) as client:
+                headers = register_and_login(client)
+                item_ids = seed_items(client, headers, args.items)
+            results[str(workers)] = measure(base_url, headers, item_ids, args)
+
+    write_results(args.output, "workers", {
+        "concurrency": args.concurrency,
+        "clients": args.clients,
+        "preload": args.preload,
+        "results": results,
+    }, app_dir=args.app_dir)
+
+if __name__ == "__main__":
+    main()
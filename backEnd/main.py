@@ -1,14 +1,24 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.endpoints import items, users, auth
+from app.api.endpoints import items, users, auth, admin, metrics
 from app.models import User, Item, Token  # Import all models
-from app.db.base_class import Base
-from app.db.session import engine, SessionLocal
+from app.db.session import engine, async_engine, replica_router
+from app.db.replicas import ReplicaRoutingMiddleware
+from app.db.migrations import sync_schema
+from app.core.security import password_hasher
+from app.core.tasks import start_scheduler, shutdown_scheduler
+from app.core.metrics import MetricsMiddleware, monitor_event_loop
+from app.core.profiling import ProfilingMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.search import item_search
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    version=settings.VERSION
+    version=settings.VERSION,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -18,33 +28,65 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "X-Last-Write"],
 )
 
+app.add_middleware(ReplicaRoutingMiddleware, router=replica_router)
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+# Added before MetricsMiddleware so it runs inside it and shares its per-request DB stats
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Create database tables on startup
 @app.on_event("startup")
 async def init_db():
-    try:
-        # Create all tables
-        print("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        
-        # Initialize database session
-        db = SessionLocal()
+    if settings.DB_SCHEMA_SYNC_ON_STARTUP:
         try:
-            # Verify specific tables
-            print("Verifying individual tables...")
-            User.create_table_if_not_exists()
-            Item.create_table_if_not_exists()
-            Token.create_table_if_not_exists()
-            
+            print("Synchronizing database schema...")
+            sync_schema(engine)
             print("Database initialization completed successfully")
-        finally:
-            db.close()
+        except Exception as e:
+            print(f"Error during database initialization: {e}")
+            raise e
+
+    start_scheduler()
+
+    # Load the in-process search index now rather than in the first search request
+    try:
+        await item_search.start()
     except Exception as e:
-        print(f"Error during database initialization: {e}")
-        raise e
+        print(f"Item search index build failed, retrying on first search: {e}")
+
+    if replica_router.replicas:
+        app.state.replica_monitor = asyncio.create_task(
+            replica_router.monitor(async_engine, settings.DB_REPLICA_CHECK_SECONDS)
+        )
+
+    if settings.METRICS_ENABLED:
+        app.state.loop_monitor = asyncio.create_task(monitor_event_loop())
+
+@app.on_event("shutdown")
+async def close_db():
+    if getattr(app.state, "loop_monitor", None):
+        app.state.loop_monitor.cancel()
+    if getattr(app.state, "replica_monitor", None):
+        app.state.replica_monitor.cancel()
+    shutdown_scheduler()
+    await async_engine.dispose()
+    await replica_router.dispose()
+    password_hasher.shutdown()
 
 # Include API routers
 app.include_router(auth.router, prefix=settings.API_V1_STR)
 app.include_router(users.router, prefix=settings.API_V1_STR)
-app.include_router(items.router, prefix=settings.API_V1_STR)
\ No newline at end of file
+app.include_router(items.router, prefix=settings.API_V1_STR)
+app.include_router(admin.router, prefix=settings.API_V1_STR)
+
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+Production server entry point.
+
+    python serve.py                  # one worker per CPU, settings from .env
+    python serve.py --workers 4 --preload
+
+Runs gunicorn with uvicorn workers where gunicorn is available (Linux/macOS)
+and falls back to uvicorn's own process manager elsewhere; preloading needs
+gunicorn because uvicorn spawns rather than forks its workers. SIGTERM stops
+accepting connections and lets in-flight requests finish for up to
+SERVER_GRACEFUL_TIMEOUT seconds before workers run their shutdown hooks.
+
+The schema is synchronised once here, before any worker starts, so workers
+never race each other creating tables. Each worker has its own connection
+pool of DB_POOL_SIZE + DB_MAX_OVERFLOW connections; size the database's
+connection limit for all of them.
+"""
+import argparse
+import atexit
+import os
+import shutil
+import tempfile
+from app.core.config import settings
+
+def default_workers() -> int:
+    """CPUs this process may run on, which respects container CPU sets"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def prepare_metrics_dir() -> None:
+    """Give all workers a shared Prometheus directory so /metrics sums them"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return
+    path = tempfile.mkdtemp(prefix="prometheus-")
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+
+def sync_schema_once() -> None:
+    from app.db.migrations import sync_schema
+    from app.db.session import engine
+    import app.models  # noqa: F401  registers every table on Base.metadata
+
+    sync_schema(engine)
+    engine.dispose()
+    # Workers inherit this through fork, or through the environment when spawned
+    settings.DB_SCHEMA_SYNC_ON_STARTUP = False
+    os.environ["DB_SCHEMA_SYNC_ON_STARTUP"] = "false"
+
+def run_gunicorn(workers: int, preload: bool) -> None:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {
+            "loop": settings.SERVER_LOOP,
+            "http": settings.SERVER_HTTP,
+            "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT,
+        }
+
+    def post_fork(server, worker):
+        # Never reuse connections a preloaded master may have opened
+        from app.db.session import async_engine, engine, replica_router
+        engine.dispose(close=False)
+        async_engine.sync_engine.dispose(close=False)
+        for replica in replica_router.replicas:
+            replica.engine.sync_engine.dispose(close=False)
+
+    def child_exit(server, worker):
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            from prometheus_client import multiprocess
+            multiprocess.mark_process_dead(worker.pid)
+
+    class Server(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{settings.SERVER_HOST}:{settings.SERVER_PORT}",
+                "workers": workers,
+                "worker_class": Worker,
+                "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+                "backlog": settings.SERVER_BACKLOG,
+                # gunicorn kills workers still running this long after SIGTERM;
+                # leave uvicorn time to run the shutdown hooks after draining
+                "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT + 5,
+                "preload_app": preload,
+                "post_fork": post_fork,
+                "child_exit": child_exit,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+    Server().run()
+
+def run_uvicorn(workers: int) -> None:
+    import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=workers,
+        loop=settings.SERVER_LOOP,
+        http=settings.SERVER_HTTP,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS,
+                        help="0 starts one worker per CPU")
+    parser.add_argument("--preload", action=argparse.BooleanOptionalAction, default=settings.SERVER_PRELOAD)
+    args = parser.parse_args()
+
+    settings.SERVER_HOST = args.host
+    settings.SERVER_PORT = args.port
+    workers = args.workers or default_workers()
+
+    if settings.METRICS_ENABLED and workers > 1:
+        prepare_metrics_dir()
+    if settings.DB_SCHEMA_SYNC_ON_STARTUP:
+        sync_schema_once()
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        if args.preload:
+            print("--preload needs gunicorn; starting workers without it")
+        run_uvicorn(workers)
+    else:
+        run_gunicorn(workers, args.preload)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Shared fixtures. The app reads its settings at import time, so the test
+environment is set up here before anything under ``app`` is imported: a
+throwaway SQLite database, cheap bcrypt and no background jobs or version
+caching that would make one test's writes leak into the next.
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="crud-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_db_dir, 'test.db')}",
+    "SECRET_KEY": "test-secret-key-test-secret-key-test",
+    "BCRYPT_ROUNDS": "4",
+    "TOKEN_CLEANUP_ENABLED": "false",
+    "STATS_RECONCILE_INTERVAL_SECONDS": "0",
+    "TABLE_VERSION_CACHE_SECONDS": "0",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.core.cache import item_cache
+from app.core.rate_limit import get_rate_limit_store
+from app.core.search import item_search
+from app.core.token_cache import revocation_cache
+from app.db.base_class import Base
+from app.db.session import engine
+
+PASSWORD = "passw0rd1"
+
+@pytest.fixture(scope="session")
+def app_client():
+    with TestClient(main.app) as client:
+        yield client
+
+@pytest.fixture
+def client(app_client):
+    """The app with empty tables and cold caches"""
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    revocation_cache.clear()
+    get_rate_limit_store.cache_clear()
+    app_client.portal.call(item_cache.backend.clear)
+    app_client.portal.call(item_search.rebuild)
+    return app_client
+
+@pytest.fixture
+def login(client):
+    """Register ``username`` if needed and return Authorization headers for a fresh token"""
+    def login(username: str = "alice") -> dict:
+        client.post("/api/v1/users/register", json={
+            "username": username, "email": f"{username}@example.com", "password": PASSWORD
+        })
+        response = client.post("/api/v1/users/login", json={"login": username, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return login
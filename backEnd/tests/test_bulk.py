@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import text
+from app.db.session import async_engine, engine
+
+@pytest.fixture
+def boom(client):
+    """Make the database reject any item named 'boom', as a constraint would"""
+    with engine.begin() as conn:
+        for event in ("INSERT", "UPDATE"):
+            conn.execute(text(
+                f"CREATE TRIGGER reject_boom_{event.lower()} BEFORE {event} ON items "
+                "WHEN NEW.name = 'boom' BEGIN SELECT RAISE(ABORT, 'boom rejected'); END"
+            ))
+    yield
+    with engine.begin() as conn:
+        for event in ("insert", "update"):
+            conn.execute(text(f"DROP TRIGGER reject_boom_{event}"))
+
+def bulk(client, headers, method, payload):
+    return client.request(method, "/api/v1/items/bulk", headers=headers, json=payload)
+
+def names_by_id(client, headers):
+    return {item["id"]: item["name"] for item in client.get("/api/v1/items/", headers=headers).json()}
+
+def test_create_best_effort_reports_each_row(client, login, boom):
+    headers = login()
+    response = bulk(client, headers, "POST", {
+        "mode": "best_effort",
+        "items": [{"name": "one"}, {"name": "boom"}, {"name": "three"}],
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    results = body["results"]
+    assert [result["status"] for result in results] == ["created", "failed", "created"]
+    assert "boom rejected" in results[1]["error"]
+    # Ids were attributed to the right input rows
+    assert names_by_id(client, headers) == {results[0]["id"]: "one", results[2]["id"]: "three"}
+
+def test_create_atomic_rolls_back(client, login, boom):
+    headers = login()
+    response = bulk(client, headers, "POST", {"items": [{"name": "one"}, {"name": "boom"}]})
+    assert response.status_code == 400
+    assert [result["status"] for result in response.json()["detail"]["results"]] == ["created", "failed"]
+    assert names_by_id(client, headers) == {}
+
+def test_create_ids_without_returning(client, login, monkeypatch):
+    # The MySQL path: no executemany RETURNING
+    monkeypatch.setattr(
+        async_engine.sync_engine.dialect, "insert_executemany_returning_sort_by_parameter_order", False
+    )
+    headers = login()
+    names = [f"item {i}" for i in range(5)]
+    results = bulk(client, headers, "POST", {"items": [{"name": name} for name in names]}).json()["results"]
+    assert names_by_id(client, headers) == {result["id"]: name for result, name in zip(results, names)}
+
+def test_update_best_effort(client, login, boom):
+    headers = login()
+    ids = [r["id"] for r in bulk(client, headers, "POST", {
+        "items": [{"name": "a"}, {"name": "b"}]
+    }).json()["results"]]
+    response = bulk(client, headers, "PATCH", {
+        "mode": "best_effort",
+        "items": [
+            {"id": ids[0], "name": "a2"},
+            {"id": ids[1], "name": "boom"},
+            {"id": 999999, "name": "missing"},
+            {"id": ids[1], "description": None},
+        ],
+    })
+    assert [result["status"] for result in response.json()["results"]] == [
+        "updated", "failed", "not_found", "updated"
+    ]
+    assert names_by_id(client, headers) == {ids[0]: "a2", ids[1]: "b"}
+
+def test_update_rejects_null_name(client, login):
+    headers = login()
+    item_id = bulk(client, headers, "POST", {"items": [{"name": "a"}]}).json()["results"][0]["id"]
+    response = bulk(client, headers, "PATCH", {"items": [{"id": item_id, "name": None}]})
+    assert response.status_code == 422
+
+def test_delete_reports_missing(client, login):
+    headers = login()
+    item_id = bulk(client, headers, "POST", {"items": [{"name": "a"}]}).json()["results"][0]["id"]
+    response = bulk(client, headers, "DELETE", {"mode": "best_effort", "ids": [item_id, 999999]})
+    assert [result["status"] for result in response.json()["results"]] == ["deleted", "not_found"]
+    assert bulk(client, headers, "DELETE", {"ids": [item_id]}).status_code == 400
+    assert names_by_id(client, headers) == {}
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from app.api.changes import _replay, stream_changes
+from app.core import changes
+from app.core.changes import ChangeHub, Subscription
+from app.core.config import settings
+from app.db.session import engine
+from app.models.item_change import ItemChange
+
+ITEMS = "/api/v1/items"
+
+def log(*seqs: int) -> None:
+    """Write change log rows with the given sequence numbers"""
+    with engine.begin() as conn:
+        conn.execute(ItemChange.__table__.insert(), [
+            {"seq": seq, "item_id": seq, "op": "update", "data": {"id": seq}} for seq in seqs
+        ])
+
+@pytest.fixture
+def hub(client):
+    """A hub with no poller task; tests poll it themselves"""
+    return ChangeHub(poll_seconds=60)
+
+@pytest.fixture
+def subscription(hub):
+    subscription = Subscription()
+    hub._subscribers.add(subscription)
+    return subscription
+
+def poll(client, hub) -> None:
+    client.portal.call(hub._poll)
+
+def received(subscription) -> list:
+    return [subscription.queue.get_nowait()["seq"] for _ in range(subscription.queue.qsize())]
+
+def test_poll_publishes_in_order(client, hub, subscription):
+    log(1, 2, 3)
+    poll(client, hub)
+    assert received(subscription) == [1, 2, 3]
+    assert hub.last_seq == 3
+
+def test_poll_waits_for_gap_to_fill(client, hub, subscription):
+    log(1, 3)
+    poll(client, hub)
+    assert received(subscription) == [1]
+    # The transaction holding 2 commits late
+    log(2)
+    poll(client, hub)
+    assert received(subscription) == [2, 3]
+
+def test_poll_skips_gap_after_wait(client, hub, subscription, monkeypatch):
+    log(1, 3)
+    poll(client, hub)
+    assert received(subscription) == [1]
+    monkeypatch.setattr(changes, "GAP_WAIT_SECONDS", 0)
+    poll(client, hub)
+    assert received(subscription) == [3]
+
+def test_full_queue_drops_subscriber(client, hub, subscription, monkeypatch):
+    monkeypatch.setattr(settings, "ITEM_CHANGES_QUEUE_SIZE", 2)
+    slow = Subscription()
+    hub._subscribers.add(slow)
+    log(1, 2, 3)
+    poll(client, hub)
+    assert slow.dropped
+    assert slow not in hub._subscribers
+    assert received(subscription) == [1, 2, 3]
+
+def test_replay(client, monkeypatch):
+    log(1, 2, 3, 4)
+    assert [change["seq"] for change in client.portal.call(_replay, 1, 3)] == [2, 3]
+    assert client.portal.call(_replay, 4, 4) == []
+    # Too far behind to replay
+    monkeypatch.setattr(settings, "ITEM_CHANGES_REPLAY_LIMIT", 2)
+    assert client.portal.call(_replay, 0, 4) is None
+
+def test_replay_after_prune(client):
+    log(5, 6)
+    # 2-4 were pruned from the log
+    assert client.portal.call(_replay, 1, 6) is None
+    assert [change["seq"] for change in client.portal.call(_replay, 4, 6)] == [5, 6]
+
+def events(client, after, count):
+    async def read():
+        stream = stream_changes(after)
+        try:
+            return [await stream.__anext__() for _ in range(count)]
+        finally:
+            await stream.aclose()
+    return client.portal.call(read)
+
+def parse(event: str) -> dict:
+    fields = dict(line.split(": ", 1) for line in event.strip().splitlines())
+    return {"id": int(fields["id"]), "event": fields["event"], "data": json.loads(fields["data"])}
+
+def test_stream_without_cursor_starts_with_reset(client, login):
+    headers = login()
+    client.post(f"{ITEMS}/", json={"name": "a"}, headers=headers)
+    retry, reset = events(client, None, 2)
+    assert retry.startswith("retry:")
+    assert parse(reset)["event"] == "reset"
+    assert parse(reset)["data"]["seq"] == parse(reset)["id"] >= 1
+
+def test_stream_replays_missed_changes(client, login):
+    headers = login()
+    item_id = client.post(f"{ITEMS}/", json={"name": "a"}, headers=headers).json()["id"]
+    client.put(f"{ITEMS}/{item_id}", json={"name": "b"}, headers=headers)
+    client.delete(f"{ITEMS}/{item_id}", headers=headers)
+    first = parse(events(client, None, 2)[1])["id"]
+    replayed = [parse(event) for event in events(client, first - 3, 4)[1:]]
+    assert [event["event"] for event in replayed] == ["create", "update", "delete"]
+    assert [event["id"] for event in replayed] == [first - 2, first - 1, first]
+    assert replayed[1]["data"]["item"]["name"] == "b"
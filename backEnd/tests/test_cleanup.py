@@ -0,0 +1,79 @@
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from app.core import tasks
+from app.db.session import SessionLocal
+from app.models.item_change import ItemChange
+from app.models.scheduler_lock import SchedulerLock
+from app.models.token import Token
+
+def add_tokens(db, count, expires_in, revoked=False):
+    now = datetime.utcnow()
+    db.add_all([
+        Token(
+            id=str(uuid.uuid4()),
+            token_hash=uuid.uuid4().hex * 2,
+            user_id="user",
+            expires_at=now + expires_in,
+            is_revoked=revoked
+        )
+        for _ in range(count)
+    ])
+    db.commit()
+
+def test_expired_backlog_does_not_starve_revoked(client):
+    with SessionLocal() as db:
+        add_tokens(db, 5, timedelta(minutes=-1))
+        add_tokens(db, 2, timedelta(minutes=10), revoked=True)
+        add_tokens(db, 1, timedelta(minutes=10))
+
+        counts = Token.cleanup_tokens(db, batch_size=1, max_batches=2)
+        assert counts == {"expired": 2, "revoked": 2}
+        assert db.scalar(select(func.count()).select_from(Token)) == 4
+
+        assert Token.cleanup_tokens(db, batch_size=10) == {"expired": 3, "revoked": 0}
+        assert db.scalar(select(func.count()).select_from(Token)) == 1
+
+def test_cleanup_can_leave_expired_tokens(client):
+    with SessionLocal() as db:
+        add_tokens(db, 1, timedelta(minutes=-1))
+        add_tokens(db, 1, timedelta(minutes=10), revoked=True)
+        assert Token.cleanup_tokens(db, expired=False) == {"revoked": 1}
+
+def test_prune_item_changes_in_bounded_batches(client):
+    old = datetime.utcnow() - timedelta(days=2)
+    with SessionLocal() as db:
+        db.add_all([ItemChange(item_id=i, op="delete", created_at=old) for i in range(5)])
+        db.add(ItemChange(item_id=9, op="delete"))
+        db.commit()
+        cutoff = datetime.utcnow() - timedelta(days=1)
+        assert ItemChange.prune(db, cutoff, batch_size=2, max_batches=2) == 4
+        assert ItemChange.prune(db, cutoff, batch_size=2) == 1
+        assert db.scalar(select(func.count()).select_from(ItemChange)) == 1
+
+def test_lease_is_exclusive_until_released(client):
+    with SessionLocal() as db:
+        assert SchedulerLock.acquire(db, "job", "worker-a", 60)
+        assert SchedulerLock.acquire(db, "job", "worker-a", 60)
+        assert not SchedulerLock.acquire(db, "job", "worker-b", 60)
+        SchedulerLock.release_all(db, "worker-a")
+        assert SchedulerLock.acquire(db, "job", "worker-b", 60)
+
+def test_lapsed_lease_is_taken_over(client):
+    with SessionLocal() as db:
+        assert SchedulerLock.acquire(db, "job", "worker-a", -1)
+        assert SchedulerLock.acquire(db, "job", "worker-b", 60)
+
+def test_shutdown_releases_every_lease(client):
+    with SessionLocal() as db:
+        for name in (tasks.TOKEN_CLEANUP_LOCK, tasks.ITEM_CHANGES_PRUNE_LOCK, tasks.STATS_RECONCILE_LOCK):
+            assert SchedulerLock.acquire(db, name, tasks.WORKER_ID, 60)
+        SchedulerLock.acquire(db, "other", "another-worker", 60)
+
+    tasks.start_scheduler()
+    tasks.shutdown_scheduler()
+    try:
+        with SessionLocal() as db:
+            assert db.scalars(select(SchedulerLock.owner)).all() == ["another-worker"]
+    finally:
+        tasks.start_scheduler()
@@ -0,0 +1,118 @@
+import asyncio
+import itertools
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.coalesce import SingleFlight
+
+_names = itertools.count()
+
+@pytest.fixture
+def flights():
+    """A SingleFlight with its own metric label, so counts start at zero"""
+    def flights(max_wait: float = 1.0, enabled: bool = True) -> SingleFlight:
+        return SingleFlight(f"test-{next(_names)}", max_wait, enabled=enabled)
+    return flights
+
+def outcomes(flight: SingleFlight) -> dict:
+    return {
+        outcome: REGISTRY.get_sample_value(
+            "coalesced_requests_total", {"flight": flight.name, "outcome": outcome}
+        ) or 0
+        for outcome in ("leader", "shared", "timeout")
+    }
+
+class Fetch:
+    """Counts calls and blocks each one until ``release`` is set"""
+
+    def __init__(self, result="rows", error=None):
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+def test_concurrent_callers_share_one_fetch(flights):
+    flight = flights()
+    async def run():
+        fetch = Fetch()
+        tasks = [asyncio.create_task(flight.do("k", fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        fetch.release.set()
+        return fetch.calls, await asyncio.gather(*tasks)
+    calls, results = asyncio.run(run())
+    assert calls == 1
+    assert results == ["rows"] * 5
+    assert outcomes(flight) == {"leader": 1, "shared": 4, "timeout": 0}
+    assert flight._flights == {}
+
+def test_different_keys_fetch_separately(flights):
+    flight = flights()
+    fetch = Fetch()
+    fetch.release.set()
+    async def run():
+        return await asyncio.gather(flight.do("a", fetch), flight.do("b", fetch))
+    assert asyncio.run(run()) == ["rows", "rows"]
+    assert fetch.calls == 2
+
+def test_leader_exception_is_shared(flights):
+    flight = flights()
+    async def run():
+        fetch = Fetch(error=LookupError("gone"))
+        tasks = [asyncio.create_task(flight.do("k", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        fetch.release.set()
+        return fetch.calls, await asyncio.gather(*tasks, return_exceptions=True)
+    calls, results = asyncio.run(run())
+    assert calls == 1
+    assert all(isinstance(result, LookupError) for result in results)
+    assert outcomes(flight)["shared"] == 2
+
+def test_follower_fetches_after_max_wait(flights):
+    flight = flights(max_wait=0.01)
+    async def run():
+        slow = Fetch(result="slow")
+        leader = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0)
+        fast = Fetch(result="fast")
+        fast.release.set()
+        follower = await flight.do("k", fast)
+        slow.release.set()
+        return await leader, follower
+    assert asyncio.run(run()) == ("slow", "fast")
+    assert outcomes(flight) == {"leader": 1, "shared": 0, "timeout": 1}
+
+def test_cancelled_leader_releases_followers(flights):
+    flight = flights()
+    async def run():
+        stuck = Fetch()
+        leader = asyncio.create_task(flight.do("k", stuck))
+        await asyncio.sleep(0)
+        own = Fetch(result="own")
+        own.release.set()
+        follower = asyncio.create_task(flight.do("k", own))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, own.calls
+    assert asyncio.run(run()) == ("own", 1)
+    assert outcomes(flight)["timeout"] == 1
+    assert flight._flights == {}
+
+def test_disabled(flights):
+    flight = flights(enabled=False)
+    async def run():
+        fetch = Fetch()
+        fetch.release.set()
+        await asyncio.gather(*(flight.do("k", fetch) for _ in range(3)))
+        return fetch.calls
+    assert asyncio.run(run()) == 3
+    assert outcomes(flight) == {"leader": 0, "shared": 0, "timeout": 0}
@@ -0,0 +1,135 @@
+import pytest
+
+from app.core.cache import item_cache
+from app.core.versions import BUMPED_TABLES, table_versions
+from app.db.session import AsyncSessionLocal
+
+ITEMS = "/api/v1/items"
+USERS = "/api/v1/users"
+MSGPACK = "application/msgpack"
+
+@pytest.fixture
+def item(client, login):
+    headers = login()
+    response = client.post(f"{ITEMS}/", json={"name": "widget"}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"], headers
+
+def revalidate(client, url, headers, **extra):
+    """GET ``url``, then repeat it with the returned ETag"""
+    headers = {**headers, **extra}
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200, first.text
+    etag = first.headers["etag"]
+    return first, client.get(url, headers={**headers, "If-None-Match": etag})
+
+def test_list_not_modified(client, item):
+    _, headers = item
+    first, second = revalidate(client, f"{ITEMS}/", headers)
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers["cache-control"] == "private, no-cache"
+    assert second.headers["vary"] == "Accept"
+    assert "last-modified" in second.headers
+
+def test_if_modified_since(client, item):
+    _, headers = item
+    first = client.get(f"{ITEMS}/", headers=headers)
+    response = client.get(f"{ITEMS}/", headers={**headers, "If-Modified-Since": first.headers["last-modified"]})
+    assert response.status_code == 304
+    response = client.get(f"{ITEMS}/", headers={**headers, "If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+    assert response.status_code == 200
+
+def test_detail_not_modified_skips_lookup(client, item, monkeypatch):
+    item_id, headers = item
+    first = client.get(f"{ITEMS}/{item_id}", headers=headers)
+    assert first.status_code == 200
+
+    async def no_lookup(*args, **kwargs):
+        raise AssertionError("item looked up for a 304")
+    monkeypatch.setattr(item_cache, "get", no_lookup)
+    response = client.get(f"{ITEMS}/{item_id}", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert response.status_code == 304
+    assert response.headers["etag"] == first.headers["etag"]
+
+def test_user_detail_not_modified(client, login):
+    headers = login()
+    user_id = client.get(f"{USERS}/me", headers=headers).json()["id"]
+    first, second = revalidate(client, f"{USERS}/{user_id}", headers)
+    assert first.json()["id"] == user_id
+    assert second.status_code == 304
+
+def test_write_changes_etag(client, item):
+    item_id, headers = item
+    first = client.get(f"{ITEMS}/", headers=headers)
+    response = client.put(f"{ITEMS}/{item_id}", json={"name": "gadget"}, headers=headers)
+    assert response.status_code == 200, response.text
+    response = client.get(f"{ITEMS}/", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert response.status_code == 200
+    assert response.headers["etag"] != first.headers["etag"]
+    assert response.json()[0]["name"] == "gadget"
+
+def test_formats_have_their_own_etag(client, item):
+    _, headers = item
+    json_etag = client.get(f"{ITEMS}/", headers=headers).headers["etag"]
+    first, second = revalidate(client, f"{ITEMS}/", headers, Accept=MSGPACK)
+    assert first.headers["content-type"].startswith(MSGPACK)
+    assert first.headers["etag"] != json_etag
+    assert second.status_code == 304
+    # The JSON validator does not revalidate the msgpack representation
+    response = client.get(f"{ITEMS}/", headers={**headers, "Accept": MSGPACK, "If-None-Match": json_etag})
+    assert response.status_code == 200
+
+@pytest.fixture
+def cached_versions(monkeypatch):
+    """Cache table versions like production does (the suite turns the cache off)"""
+    monkeypatch.setattr(table_versions, "ttl", 60)
+    table_versions._cache.clear()
+    yield table_versions
+    table_versions._cache.clear()
+
+def test_read_between_bump_and_commit_is_not_kept(client, cached_versions):
+    async def scenario():
+        async with AsyncSessionLocal() as writer:
+            before = await cached_versions.get(writer, "items")
+            await cached_versions.bump(writer, "items")
+            # A concurrent request reads, and may cache, the version from before the write
+            async with AsyncSessionLocal() as reader:
+                assert await cached_versions.get(reader, "items") == before
+            await writer.commit()
+        async with AsyncSessionLocal() as reader:
+            return before, await cached_versions.get(reader, "items")
+    before, after = client.portal.call(scenario)
+    assert after[0] == before[0] + 1
+
+def test_rolled_back_bump_keeps_cache(client, cached_versions):
+    async def scenario():
+        async with AsyncSessionLocal() as writer:
+            await cached_versions.get(writer, "items")
+            await cached_versions.bump(writer, "items")
+            await writer.rollback()
+            return len(cached_versions._cache), writer.sync_session.info.get(BUMPED_TABLES)
+    assert client.portal.call(scenario) == (1, None)
+
+def test_read_overlapping_invalidation_is_not_cached(client, cached_versions):
+    async def scenario():
+        async with AsyncSessionLocal() as reader:
+            execute = reader.execute
+            async def racing_execute(*args, **kwargs):
+                result = await execute(*args, **kwargs)
+                # A write commits while this read is in flight
+                cached_versions.invalidate("items")
+                return result
+            reader.execute = racing_execute
+            await cached_versions.get(reader, "items")
+    client.portal.call(scenario)
+    assert cached_versions._cache == {}
+
+def test_write_visible_to_next_read_with_cache(client, item, cached_versions):
+    item_id, headers = item
+    first = client.get(f"{ITEMS}/{item_id}", headers=headers)
+    client.put(f"{ITEMS}/{item_id}", json={"name": "renamed"}, headers=headers)
+    response = client.get(f"{ITEMS}/{item_id}", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert response.status_code == 200
+    assert response.json()["name"] == "renamed"
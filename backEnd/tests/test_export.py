@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+import pytest
+from app.core.compression import choose_encoding
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("GZIP; q=0.5, identity", "gzip"),
+    ("*", "gzip"),
+    ("*, gzip;q=0", None),
+    ("deflate", None),
+    ("", None),
+])
+def test_choose_gzip(header, expected):
+    assert choose_encoding(header, ("gzip",)) == expected
+
+@pytest.fixture
+def items(client, login):
+    headers = login()
+    client.post("/api/v1/items/bulk", headers=headers, json={
+        "items": [{"name": f"item {i}", "description": "x" * i} for i in range(3)]
+    })
+    return headers
+
+def test_ndjson_export(client, items):
+    response = client.get("/api/v1/items/export", headers={**items, "Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["name"] for row in rows] == ["item 0", "item 1", "item 2"]
+
+def test_csv_export_gzip(client, items):
+    response = client.get(
+        "/api/v1/items/export", params={"format": "csv"}, headers={**items, "Accept-Encoding": "gzip"}
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    # httpx decodes the body transparently
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "name", "description"]
+    assert len(rows) == 4
+
+def test_gzip_refused_with_zero_q(client, items):
+    response = client.get("/api/v1/items/export", headers={**items, "Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in response.headers
+    assert len(response.content.splitlines()) == 3
@@ -0,0 +1,89 @@
+import msgpack
+import pyarrow
+import pyarrow.ipc
+import pytest
+
+from app.api.formats import ARROW, MSGPACK
+
+ITEMS = "/api/v1/items"
+USERS = "/api/v1/users"
+
+def decode(response):
+    if response.headers["content-type"].startswith(MSGPACK):
+        return msgpack.unpackb(response.content)
+    return pyarrow.ipc.open_stream(response.content).read_all()
+
+def columns(response) -> dict:
+    body = decode(response)
+    return body if isinstance(body, dict) else body.to_pydict()
+
+@pytest.fixture
+def items(client, login):
+    headers = login()
+    for name, description in [("a", "first"), ("b", None), ("c", "third")]:
+        response = client.post(f"{ITEMS}/", json={"name": name, "description": description}, headers=headers)
+        assert response.status_code == 200, response.text
+    return headers
+
+@pytest.mark.parametrize("media_type", [MSGPACK, ARROW])
+def test_item_pages_are_column_wise(client, items, media_type):
+    response = client.get(f"{ITEMS}/", params={"limit": 2}, headers={**items, "Accept": media_type})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith(media_type)
+    assert response.headers["vary"] == "Accept"
+    first = columns(response)
+    assert list(first) == ["id", "name", "description"]
+    assert first["name"] == ["a", "b"]
+    assert first["description"] == ["first", None]
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(f"{ITEMS}/", params={"limit": 2, "cursor": cursor}, headers={**items, "Accept": media_type})
+    assert columns(response)["name"] == ["c"]
+    assert "X-Next-Cursor" not in response.headers
+
+@pytest.mark.parametrize("media_type", [MSGPACK, ARROW])
+def test_user_pages_are_column_wise(client, login, media_type):
+    headers = login("alice")
+    login("bob")
+    response = client.get(f"{USERS}/", params={"limit": 1, "sort": "username"}, headers={**headers, "Accept": media_type})
+    assert response.status_code == 200, response.text
+    page = columns(response)
+    assert list(page) == ["id", "username", "email", "is_active"]
+    assert (page["username"], page["is_active"]) == (["alice"], [True])
+    assert "hashed_password" not in page
+    response = client.get(
+        f"{USERS}/", params={"limit": 1, "sort": "username", "cursor": response.headers["X-Next-Cursor"]},
+        headers={**headers, "Accept": media_type}
+    )
+    assert columns(response)["username"] == ["bob"]
+
+def test_empty_page_keeps_schema(client, login):
+    headers = login()
+    response = client.get(f"{ITEMS}/", headers={**headers, "Accept": MSGPACK})
+    assert decode(response) == {"id": [], "name": [], "description": []}
+    table = decode(client.get(f"{ITEMS}/", headers={**headers, "Accept": ARROW}))
+    assert table.num_rows == 0
+    assert table.schema == pyarrow.schema([
+        ("id", pyarrow.int64()), ("name", pyarrow.string()), ("description", pyarrow.string())
+    ])
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, "application/json"),
+    ("*/*", "application/json"),
+    ("application/*", "application/json"),
+    (f"application/json;q=0.5, {MSGPACK}", MSGPACK),
+    (f"{ARROW}, {MSGPACK};q=0.9, */*;q=0.1", ARROW),
+    ("text/html, application/xhtml+xml, */*;q=0.8", "application/json"),
+])
+def test_negotiation(client, items, accept, expected):
+    headers = {**items, "Accept": accept} if accept else items
+    response = client.get(f"{ITEMS}/", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith(expected)
+
+@pytest.mark.parametrize("accept", ["text/html", "text/csv", "application/json;q=0, */*;q=0"])
+def test_unsupported_accept_is_406(client, items, accept):
+    for url in [f"{ITEMS}/", f"{USERS}/"]:
+        response = client.get(url, headers={**items, "Accept": accept})
+        assert response.status_code == 406
+        assert MSGPACK in response.json()["detail"]
@@ -0,0 +1,39 @@
+from prometheus_client import REGISTRY
+
+from benchmarks import common
+from benchmarks.common import db_stats_by_route
+
+ITEMS = "/api/v1/items"
+ROUTE = "/api/v1/items/{item_id}"
+
+def sample(name: str, route: str = ROUTE) -> float:
+    return REGISTRY.get_sample_value(name, {"route": route}) or 0.0
+
+def test_db_usage_is_recorded_per_route(client, login):
+    headers = login()
+    item_id = client.post(f"{ITEMS}/", json={"name": "widget"}, headers=headers).json()["id"]
+    requests = sample("db_queries_per_request_count")
+    queries = sample("db_queries_per_request_sum")
+    db_seconds = sample("db_time_per_request_seconds_sum")
+
+    for _ in range(2):
+        assert client.get(f"{ITEMS}/{item_id}", headers=headers).status_code == 200
+
+    # Labelled by the route template, not the requested path
+    assert sample("db_queries_per_request_count") == requests + 2
+    assert sample("db_time_per_request_seconds_count") == sample("db_queries_per_request_count")
+    # At least the token and user lookups run on every request
+    assert sample("db_queries_per_request_sum") >= queries + 4
+    assert sample("db_time_per_request_seconds_sum") > db_seconds
+    assert sample("db_queries_per_request_count", f"{ITEMS}/{item_id}") == 0.0
+
+def test_benchmarks_read_db_stats_from_metrics(client, login, monkeypatch):
+    headers = login()
+    item_id = client.post(f"{ITEMS}/", json={"name": "widget"}, headers=headers).json()["id"]
+    client.get(f"{ITEMS}/{item_id}", headers=headers)
+    monkeypatch.setattr(common.httpx, "get", lambda url, timeout: client.get(url))
+
+    stats = db_stats_by_route("http://testserver")[ROUTE]
+    assert stats["requests"] == sample("db_queries_per_request_count")
+    assert stats["queries"] == sample("db_queries_per_request_sum")
+    assert stats["db_seconds"] == sample("db_time_per_request_seconds_sum") > 0
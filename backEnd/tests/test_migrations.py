@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import Boolean, Column, DateTime, Index, MetaData, String, Table, inspect, select
+
+from app.core.security import hash_token
+from app.db import migrations
+from app.db.migrations import migrate_token_hashes, sync_schema
+from app.db.session import engine
+from app.models.token import Token
+
+USERS = "/api/v1/users"
+
+def legacy_tokens_table() -> Table:
+    """``tokens`` as created before token_hash: the raw JWT under a unique index"""
+    table = Table(
+        "tokens", MetaData(),
+        Column("id", String(100), primary_key=True, index=True),
+        Column("token", String(500)),
+        Column("user_id", String(100), index=True),
+        Column("created_at", DateTime),
+        Column("expires_at", DateTime),
+        Column("is_revoked", Boolean),
+    )
+    Index("ix_tokens_token", table.c.token, unique=True)
+    return table
+
+@pytest.fixture
+def legacy_tokens(client, login, monkeypatch):
+    """Signed-in users whose tokens sit in a pre-migration tokens table"""
+    headers = [login("alice"), login("bob"), login("alice")]
+    raw = {hash_token(h["Authorization"].split()[1]): h["Authorization"].split()[1] for h in headers}
+    with engine.connect() as conn:
+        rows = [row._asdict() for row in conn.execute(select(Token.__table__))]
+
+    legacy = legacy_tokens_table()
+    with engine.begin() as conn:
+        Token.__table__.drop(bind=conn)
+        legacy.create(bind=conn)
+        conn.execute(legacy.insert(), [
+            {**{k: v for k, v in row.items() if k != "token_hash"}, "token": raw[row["token_hash"]]}
+            for row in rows
+        ])
+    # Several batches
+    monkeypatch.setattr(migrations, "BACKFILL_BATCH_SIZE", 2)
+    yield headers
+    with engine.begin() as conn:
+        legacy.drop(bind=conn)
+        Token.__table__.create(bind=conn)
+
+def token_indexes() -> dict:
+    return {index["name"]: bool(index["unique"]) for index in inspect(engine).get_indexes("tokens")}
+
+def test_token_hash_migration(client, legacy_tokens):
+    assert migrate_token_hashes(engine) == 3
+    # Running again finds nothing left to do
+    assert migrate_token_hashes(engine) == 0
+    sync_schema(engine)
+    sync_schema(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(select(Token.token, Token.token_hash)).all()
+    assert len(rows) == 3
+    assert all(token is None and len(token_hash) == 64 for token, token_hash in rows)
+    indexes = token_indexes()
+    assert "ix_tokens_token" not in indexes
+    assert indexes["ix_tokens_token_hash"] is True
+
+    # Tokens issued before the migration still authenticate
+    for headers in legacy_tokens:
+        response = client.get(f"{USERS}/me", headers=headers)
+        assert response.status_code == 200, response.text
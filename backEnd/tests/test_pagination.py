@@ -0,0 +1,92 @@
+import pytest
+from fastapi import HTTPException
+from app.api.pagination import decode_cursor, encode_cursor, prefix_pattern
+
+def create_items(client, headers, names):
+    response = client.post("/api/v1/items/bulk", headers=headers, json={
+        "items": [{"name": name, "description": None} for name in names]
+    })
+    assert response.status_code == 200, response.text
+    return [result["id"] for result in response.json()["results"]]
+
+def collect(client, headers, url, **params):
+    """Follow X-Next-Cursor to the end, returning the pages"""
+    pages = []
+    while True:
+        response = client.get(url, headers=headers, params=params)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            assert "Link" not in response.headers
+            return pages
+        assert f"cursor={cursor}" in response.headers["Link"]
+        params["cursor"] = cursor
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("name", "desc", ["b", 2])
+    assert decode_cursor(cursor, "name", "desc") == ["b", 2]
+    with pytest.raises(HTTPException):
+        decode_cursor(cursor, "id", "desc")
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor", "name", "desc")
+
+def test_prefix_pattern_escapes_wildcards():
+    assert prefix_pattern("50%_a\\") == "50\\%\\_a\\\\%"
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_items_pages_by_id(client, login, order):
+    headers = login()
+    ids = create_items(client, headers, [f"item {i}" for i in range(7)])
+
+    pages = collect(client, headers, "/api/v1/items/", limit=3, order=order)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    seen = [item["id"] for page in pages for item in page]
+    assert seen == sorted(ids, reverse=order == "desc")
+
+def test_items_sorted_by_name_with_prefix(client, login):
+    headers = login()
+    create_items(client, headers, ["beta", "alpha", "b_x", "bz", "alpha"])
+
+    pages = collect(client, headers, "/api/v1/items/", limit=2, sort="name", name_prefix="b")
+    assert [item["name"] for page in pages for item in page] == ["b_x", "beta", "bz"]
+
+    # Equal names continue on the id tie-breaker across pages
+    pages = collect(client, headers, "/api/v1/items/", limit=1, sort="name", name_prefix="alpha")
+    names = [item["name"] for page in pages for item in page]
+    assert names == ["alpha", "alpha"]
+
+def test_items_cursor_must_match_sort(client, login):
+    headers = login()
+    create_items(client, headers, ["a", "b"])
+    cursor = client.get("/api/v1/items/", headers=headers, params={"limit": 1}).headers["X-Next-Cursor"]
+    response = client.get("/api/v1/items/", headers=headers, params={"limit": 1, "cursor": cursor, "order": "desc"})
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("url, sort, keys", [
+    ("/api/v1/items/", "id", [{"a": 1}]),
+    ("/api/v1/items/", "id", [None]),
+    ("/api/v1/items/", "id", [True]),
+    ("/api/v1/items/", "id", ["1"]),
+    ("/api/v1/items/", "name", [3, 1]),
+    ("/api/v1/items/", "name", ["a"]),
+    ("/api/v1/users/", "id", [{"a": 1}]),
+    ("/api/v1/users/", "username", ["a", None]),
+])
+def test_cursor_with_mistyped_keys(client, login, url, sort, keys):
+    headers = login()
+    cursor = encode_cursor(sort, "asc", keys)
+    response = client.get(url, headers=headers, params={"sort": sort, "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+def test_items_limit_capped(client, login):
+    headers = login()
+    response = client.get("/api/v1/items/", headers=headers, params={"limit": 10 ** 6})
+    assert response.status_code == 422
+
+def test_users_pages(client, login):
+    for name in ["carol", "dave", "erin"]:
+        headers = login(name)
+    pages = collect(client, headers, "/api/v1/users/", limit=2, sort="username", order="desc")
+    assert [user["username"] for page in pages for user in page] == ["erin", "dave", "carol"]
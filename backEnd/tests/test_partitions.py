@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.db.migrations import sync_schema
+from app.db.partitions import MAXVALUE_PARTITION, TokenPartitions, get_partition_backend, sqlite_catalogue
+from app.db.session import engine
+from app.models.token import Token
+
+NOW = datetime(2026, 10, 18, 12, 0)
+
+@pytest.fixture
+def partitions(client):
+    yield TokenPartitions("day", ahead=2)
+    sqlite_catalogue.drop(bind=engine, checkfirst=True)
+
+def add_tokens(*expiries: datetime) -> None:
+    with engine.begin() as conn:
+        conn.execute(Token.__table__.insert(), [
+            {"id": str(uuid.uuid4()), "token_hash": uuid.uuid4().hex * 2, "user_id": "u", "expires_at": expires_at}
+            for expires_at in expiries
+        ])
+
+def layout():
+    with engine.connect() as conn:
+        return [p.name for p in get_partition_backend(engine).list(conn)]
+
+def token_count() -> int:
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(Token))
+
+def test_setup_creates_partitions_once(partitions):
+    assert not partitions.active(engine)
+    assert partitions.setup(engine, now=NOW)
+    assert partitions.active(engine)
+    # The previous and current day, two ahead and the catch-all
+    assert layout() == ["p20261017", "p20261018", "p20261019", "p20261020", MAXVALUE_PARTITION]
+    assert not partitions.setup(engine, now=NOW)
+
+def test_maintain_rolls_partitions_forward(partitions):
+    partitions.setup(engine, now=NOW)
+    add_tokens(NOW - timedelta(days=1), NOW, NOW + timedelta(days=1), NOW + timedelta(days=2))
+
+    # Yesterday's partition has already expired
+    assert partitions.maintain(engine, now=NOW) == {"partitions_created": 0, "partitions_dropped": 1}
+    assert token_count() == 3
+    counts = partitions.maintain(engine, now=NOW + timedelta(days=2))
+    assert counts == {"partitions_created": 2, "partitions_dropped": 2}
+    assert layout() == ["p20261020", "p20261021", "p20261022", MAXVALUE_PARTITION]
+    # Only the token expiring inside the kept partitions survives
+    assert token_count() == 1
+
+def test_maintain_needs_partitioned_table(partitions):
+    with pytest.raises(RuntimeError):
+        partitions.maintain(engine, now=NOW)
+
+def test_table_storage_refuses_partitioned_table(partitions, monkeypatch):
+    partitions.setup(engine, now=NOW)
+    monkeypatch.setattr(settings, "TOKEN_STORAGE", "table")
+    with pytest.raises(RuntimeError, match="partitioned"):
+        sync_schema(engine)
+
+def test_partitioned_model_matches_mysql_layout():
+    script = (
+        "import app.models\n"
+        "from sqlalchemy.dialects import mysql\n"
+        "from sqlalchemy.schema import CreateTable\n"
+        "from app.models.token import Token\n"
+        "print(CreateTable(Token.__table__).compile(dialect=mysql.dialect()))\n"
+        "print([(index.name, index.unique) for index in Token.__table__.indexes if index.name == 'ix_tokens_token_hash'])\n"
+        "print([column.name for column in Token.__mapper__.primary_key])\n"
+    )
+    env = {**os.environ, "TOKEN_STORAGE": "partitioned"}
+    output = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ).stdout
+    assert "PRIMARY KEY (id, expires_at)" in output
+    assert "expires_at DATETIME NOT NULL" in output
+    assert "FOREIGN KEY" not in output
+    assert "[('ix_tokens_token_hash', False)]" in output
+    assert "['id']" in output
@@ -0,0 +1,34 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from app.core.security import PasswordHasherPool, password_hasher
+
+def test_pool_restarts_after_shutdown():
+    pool = PasswordHasherPool(workers=1, queue_limit=0)
+    assert asyncio.run(pool.run(lambda: 1)) == 1
+    pool.shutdown()
+    assert asyncio.run(pool.run(lambda: 2)) == 2
+    pool.shutdown()
+
+def test_pool_rejects_beyond_capacity():
+    pool = PasswordHasherPool(workers=1, queue_limit=0)
+    release = threading.Event()
+
+    async def scenario():
+        busy = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as rejected:
+            await pool.run(lambda: None)
+        release.set()
+        await busy
+        return rejected.value.status_code
+
+    assert asyncio.run(scenario()) == 429
+    pool.shutdown()
+
+def test_login_after_app_shutdown_hook(client, login):
+    login()
+    # What the shutdown hook does; a later lifespan in the same process must still hash
+    password_hasher.shutdown()
+    login()
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import settings
+from app.db.pool import POOL_STATS, instrument_pool, pool_options, pool_status
+from app.db.session import async_engine, engine
+
+def test_engines_use_stock_pools():
+    assert type(engine.pool) is QueuePool
+    assert type(async_engine.sync_engine.pool) is AsyncAdaptedQueuePool
+
+def test_pool_events_count_checkouts_and_saturation(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    test_engine = create_engine(url, **pool_options(url, "test-pool", 1))
+    POOL_STATS.pop("test-pool", None)
+    instrument_pool(test_engine, "test-pool")
+
+    with test_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    # Listeners carry over to the pool dispose() creates
+    test_engine.dispose()
+    with test_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        held = pool_status(test_engine, "test-pool")
+        assert held["checked_out"] == 1
+
+    status = pool_status(test_engine, "test-pool")
+    assert status["checkouts"] == 2
+    assert status["connects"] == 2
+    # A one-connection pool without overflow is saturated by every checkout
+    assert status["saturated_checkouts"] == 2
+    assert status["peak_checked_out"] == 1
+    assert status["hold_ms_max"] >= status["hold_ms_mean"] > 0
+    test_engine.dispose()
+
+def test_checkout_wait_is_timed(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 0.5)
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    test_engine = create_engine(url, **pool_options(url, "wait-pool", 1))
+    POOL_STATS.pop("wait-pool", None)
+    instrument_pool(test_engine, "wait-pool")
+
+    held = test_engine.connect()
+    # The only connection comes back while the next checkout waits for it
+    threading.Timer(0.1, held.close).start()
+    with test_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with pytest.raises(exc.TimeoutError):
+            test_engine.connect()
+
+    status = pool_status(test_engine, "wait-pool")
+    assert status["checkout_timeouts"] == 1
+    # Waited about 100ms for the release, then the full 500ms pool timeout
+    assert status["wait_ms_max"] >= 450
+    assert status["wait_ms_max"] >= status["wait_ms_p99"] >= 90
+    assert status["wait_ms_mean"] > 0
+    test_engine.dispose()
+
+def test_request_checkouts_are_timed(client, login):
+    waits = POOL_STATS["async"].waits
+    login()
+    assert POOL_STATS["async"].waits > waits
+    assert pool_status(async_engine.sync_engine, "async")["wait_ms_max"] > 0
@@ -0,0 +1,86 @@
+import asyncio
+import cProfile
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core import profiling
+from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware, profile_store
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SLOW_THRESHOLD_MS", 50)
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "PROFILING_TOKENS", ["let-me-profile"])
+    profile_store.clear()
+
+    app = FastAPI()
+
+    @app.get("/fast")
+    async def fast():
+        return {}
+
+    @app.get("/slow")
+    async def slow_endpoint(delay: float = 0.1):
+        await asyncio.sleep(delay)
+        return {}
+
+    app.add_middleware(ProfilingMiddleware)
+    return app
+
+@pytest.fixture
+def profiles_started(monkeypatch):
+    started = []
+
+    class CountingProfile(cProfile.Profile):
+        def enable(self, *args, **kwargs):
+            started.append(self)
+            super().enable(*args, **kwargs)
+
+    monkeypatch.setattr(profiling.cProfile, "Profile", CountingProfile)
+    return started
+
+def captures():
+    return [profile_store.get(summary["id"]) for summary in reversed(profile_store.list())]
+
+def test_fast_requests_are_not_profiled(app, profiles_started):
+    with TestClient(app) as client:
+        for _ in range(5):
+            client.get("/fast")
+    assert profiles_started == []
+    assert captures() == []
+
+def test_slow_request_is_sampled_then_next_one_profiled(app, profiles_started):
+    with TestClient(app) as client:
+        client.get("/slow")
+        assert profiles_started == []
+        [slow] = captures()
+        assert slow["trigger"] == "slow"
+        assert slow["profile"] is None
+        assert "slow_endpoint" in slow["stack"]
+
+        client.get("/slow", params={"delay": 0})
+        assert len(profiles_started) == 1
+        follow_up = captures()[-1]
+        assert follow_up["trigger"] == "after_slow"
+        assert "function calls" in follow_up["profile"]
+
+        # The follow-up disarmed the path
+        client.get("/slow", params={"delay": 0})
+        assert len(profiles_started) == 1
+        assert len(captures()) == 2
+
+def test_header_token_profiles(app, profiles_started):
+    with TestClient(app) as client:
+        client.get("/fast", headers={"X-Profile": "wrong"})
+        assert profiles_started == []
+        client.get("/fast", headers={"X-Profile": "let-me-profile"})
+    assert len(profiles_started) == 1
+    assert captures()[0]["trigger"] == "header"
+
+def test_sample_rate_profiles(app, profiles_started, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 1.0)
+    with TestClient(app) as client:
+        client.get("/fast")
+    assert len(profiles_started) == 1
+    assert captures()[0]["trigger"] == "sampled"
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.rate_limit import MemoryRateLimitStore, parse_rule, rules_for
+
+USERS = "/api/v1/users"
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Replace RATE_LIMITS for one test"""
+    def limits(**rules):
+        monkeypatch.setattr(settings, "RATE_LIMITS", rules)
+        rules_for.cache_clear()
+    yield limits
+    rules_for.cache_clear()
+
+def test_parse_rule():
+    rule = parse_rule("ip:30/minute")
+    assert (rule.key, rule.capacity, rule.rate) == ("ip", 30, 0.5)
+    with pytest.raises(ValueError):
+        parse_rule("ip:30/fortnight")
+
+def test_bucket_bursts_then_refills():
+    store = MemoryRateLimitStore(maxsize=10)
+    async def takes():
+        burst = [await store.take("k", 2, 50.0) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        return burst, await store.take("k", 2, 50.0)
+    burst, refilled = asyncio.run(takes())
+    assert burst[:2] == [0, 0] and burst[2] > 0
+    assert refilled == 0
+
+def test_store_drops_least_recently_used():
+    store = MemoryRateLimitStore(maxsize=1)
+    async def takes():
+        await store.take("a", 1, 0.001)
+        await store.take("b", 1, 0.001)
+        return await store.take("a", 1, 0.001)
+    assert asyncio.run(takes()) == 0
+
+def test_login_limited_per_login_name(client, login, limits):
+    login("alice")
+    limits(login=["login:2/minute"])
+    for _ in range(2):
+        response = client.post(f"{USERS}/login", json={"login": "Alice", "password": "wrongpass1"})
+        assert response.status_code == 401
+    response = client.post(f"{USERS}/login", json={"login": "alice", "password": "wrongpass1"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    # Another login name has its own bucket
+    response = client.post(f"{USERS}/login", json={"login": "bob", "password": "wrongpass1"})
+    assert response.status_code == 401
+
+def test_disabled(client, login, limits, monkeypatch):
+    login("alice")
+    limits(login=["ip:1/minute"])
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    for _ in range(3):
+        response = client.post(f"{USERS}/login", json={"login": "alice", "password": "wrongpass1"})
+        assert response.status_code == 401
+
+def test_user_bucket_survives_rename(client, login, limits):
+    headers = login("alice")
+    limits(account=["user:2/minute"])
+    response = client.put(f"{USERS}/update", json={"username": "alicia"}, headers=headers)
+    assert response.status_code == 200, response.text
+    response = client.put(f"{USERS}/update", json={"username": "alison"}, headers=headers)
+    assert response.status_code == 200, response.text
+    response = client.put(f"{USERS}/update", json={"username": "alice"}, headers=headers)
+    assert response.status_code == 429
+    # Other users are counted separately
+    response = client.put(f"{USERS}/update", json={"email": "bob2@example.com"}, headers=login("bob"))
+    assert response.status_code == 200, response.text
+
+def test_user_rules_need_valid_token(client, limits):
+    limits(account=["user:1/minute"])
+    for _ in range(2):
+        response = client.put(f"{USERS}/update", json={"username": "xyz"},
+                              headers={"Authorization": "Bearer nonsense"})
+        assert response.status_code == 401
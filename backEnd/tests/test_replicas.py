@@ -0,0 +1,133 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.cache import item_cache
+from app.db.base_class import Base
+from app.db.replicas import HEARTBEAT_NAME, LAST_WRITE_COOKIE, LAST_WRITE_HEADER, Replica, ReplicaRouter
+from app.db.session import async_engine, engine, get_async_database_url, replica_router
+from app.models.item import Item
+from app.models.replica_heartbeat import ReplicaHeartbeat
+
+ITEMS = "/api/v1/items"
+
+@pytest.fixture
+def replica(client, tmp_path, monkeypatch):
+    """A SQLite stand-in replica in rotation, copied from the primary by ``replica.sync()``"""
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    copy = create_engine(url)
+    Base.metadata.create_all(bind=copy)
+    replica = Replica("stand-in", create_async_engine(get_async_database_url(url)), "replica-test")
+    replica.healthy, replica.lag = True, 0.0
+    replica.copy = copy
+
+    def sync():
+        with engine.connect() as source, copy.begin() as target:
+            for table in reversed(Base.metadata.sorted_tables):
+                target.execute(table.delete())
+            for table in Base.metadata.sorted_tables:
+                rows = [row._asdict() for row in source.execute(select(table))]
+                if rows:
+                    target.execute(table.insert(), rows)
+    replica.sync = sync
+
+    monkeypatch.setattr(replica_router, "replicas", [replica])
+    client.cookies.clear()
+    yield replica
+    client.cookies.clear()
+    client.portal.call(replica.engine.dispose)
+    copy.dispose()
+
+def rename_on_replica(replica, item_id: int, name: str) -> None:
+    with replica.copy.begin() as conn:
+        conn.execute(update(Item).where(Item.id == item_id).values(name=name))
+
+def names(db_engine) -> list:
+    with db_engine.connect() as conn:
+        return conn.scalars(select(Item.name)).all()
+
+def create_item(client, headers, name: str) -> int:
+    response = client.post(f"{ITEMS}/", json={"name": name}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+def test_reads_go_to_replica(client, login, replica):
+    headers = login()
+    item_id = create_item(client, headers, "original")
+    replica.sync()
+    rename_on_replica(replica, item_id, "replica copy")
+    client.cookies.clear()
+
+    assert client.get(f"{ITEMS}/{item_id}", headers=headers).json()["name"] == "replica copy"
+    assert [item["name"] for item in client.get(f"{ITEMS}/", headers=headers).json()] == ["replica copy"]
+
+def test_writes_go_to_primary(client, login, replica):
+    headers = login()
+    replica.sync()
+    response = client.post(f"{ITEMS}/", json={"name": "new"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert names(engine) == ["new"]
+    assert names(replica.copy) == []
+    assert float(response.headers[LAST_WRITE_HEADER]) == pytest.approx(time.time(), abs=5)
+    assert LAST_WRITE_COOKIE in client.cookies
+
+def test_reads_follow_own_writes(client, login, replica):
+    headers = login()
+    item_id = create_item(client, headers, "original")
+    replica.sync()
+    rename_on_replica(replica, item_id, "stale")
+    replica.lag = 1.0
+
+    # The write's cookie keeps this client on the primary
+    assert client.get(f"{ITEMS}/{item_id}", headers=headers).json()["name"] == "original"
+    client.cookies.clear()
+    marker = {LAST_WRITE_HEADER: str(time.time())}
+    assert client.get(f"{ITEMS}/{item_id}", headers={**headers, **marker}).json()["name"] == "original"
+    # Once the replica's lag is shorter than the time since the write, it serves the read
+    client.portal.call(item_cache.backend.clear)
+    marker = {LAST_WRITE_HEADER: str(time.time() - 2)}
+    assert client.get(f"{ITEMS}/{item_id}", headers={**headers, **marker}).json()["name"] == "stale"
+    assert client.get(f"{ITEMS}/{item_id}", headers=headers).json()["name"] == "stale"
+
+def write_heartbeat(db_engine, beat_at: float) -> None:
+    with db_engine.begin() as conn:
+        conn.execute(ReplicaHeartbeat.__table__.delete())
+        conn.execute(ReplicaHeartbeat.__table__.insert(), {"name": HEARTBEAT_NAME, "beat_at": beat_at})
+
+def test_lagging_replica_leaves_rotation(client, replica):
+    router = ReplicaRouter([replica], max_lag=5)
+    beat = time.time() - 10
+    write_heartbeat(engine, beat)
+
+    client.portal.call(router.check, async_engine)
+    assert not replica.healthy
+    assert replica.lag == pytest.approx(10, abs=1)
+    assert router.choose() is None
+
+    # The replica applies the heartbeat
+    write_heartbeat(replica.copy, beat)
+    client.portal.call(router.check, async_engine)
+    assert replica.healthy
+    assert replica.lag == 0
+    assert router.choose() is replica
+
+def test_sqlite_primary_gets_no_heartbeat_writes(client, replica):
+    router = ReplicaRouter([replica], max_lag=5)
+    client.portal.call(router.check, async_engine)
+    with engine.connect() as conn:
+        assert conn.scalar(select(ReplicaHeartbeat.beat_at)) is None
+    # Without heartbeats a stand-in counts as current
+    assert replica.healthy and replica.lag == 0
+
+def test_unreachable_replica_leaves_rotation(client, replica, tmp_path):
+    missing = Replica("missing", create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/none/db.sqlite"), "missing")
+    missing.healthy = True
+    router = ReplicaRouter([replica, missing], max_lag=5)
+    client.portal.call(router.check, async_engine)
+    assert not missing.healthy
+    assert missing.error
+    assert [r["name"] for r in router.status() if r["healthy"]] == ["stand-in"]
+    assert all(router.choose() is replica for _ in range(10))
+    client.portal.call(missing.engine.dispose)
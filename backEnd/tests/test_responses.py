@@ -0,0 +1,31 @@
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from app.api.responses import encode_json, encoded_body, encoded_json, trusted_json
+
+def injected_response() -> Response:
+    """What FastAPI injects as a handler's ``response`` parameter"""
+    response = Response()
+    del response.headers["content-length"]
+    response.set_cookie("last_write", "1")
+    response.set_cookie("session", "abc")
+    response.headers["X-Next-Cursor"] = "cursor"
+    return response
+
+def cookies(response: Response) -> list:
+    return [value for name, value in response.raw_headers if name == b"set-cookie"]
+
+def test_repeated_headers_survive():
+    for built in (
+        trusted_json({"a": 1}, injected_response()),
+        encoded_json(encode_json({"a": 1}), injected_response()),
+        encoded_body(b"\x80", "application/msgpack", injected_response()),
+    ):
+        assert len(cookies(built)) == 2
+        assert built.headers["x-next-cursor"] == "cursor"
+        assert built.headers["content-length"] == str(len(built.body))
+
+def test_encode_json_matches_orjson_response():
+    content = [{"id": 1, "name": "é", "description": None}, {2: "non-string key"}]
+    assert encode_json(content) == ORJSONResponse(content).body
+    assert orjson.loads(encode_json(content))[1] == {"2": "non-string key"}
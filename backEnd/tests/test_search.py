@@ -0,0 +1,105 @@
+from sqlalchemy.dialects import mysql
+
+from app.core.search import FullTextSearch, InvertedIndexSearch, highlight, item_search, tokenize
+
+ITEMS = "/api/v1/items"
+
+def create_items(client, headers, *items):
+    ids = []
+    for name, description in items:
+        response = client.post(f"{ITEMS}/", json={"name": name, "description": description}, headers=headers)
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+def search(client, headers, q, **params):
+    response = client.get(f"{ITEMS}/search", params={"q": q, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response
+
+def found(client, headers, q):
+    return [hit["id"] for hit in search(client, headers, q).json()]
+
+def test_tokenize_and_highlight():
+    assert tokenize("Red-Widget, red!") == ["red", "widget", "red"]
+    assert highlight("A <red> Redder red", ["red"]) == "A &lt;<mark>red</mark>&gt; Redder <mark>red</mark>"
+    assert highlight("nothing here", ["red"]) is None
+
+def test_ranking(client, login):
+    headers = login()
+    in_description, in_name, twice, unrelated = create_items(
+        client, headers,
+        ("plain box", "a lamp for the desk"),
+        ("lamp", "for the desk"),
+        ("lamp", "a lamp shade for the lamp"),
+        ("chair", "wooden"),
+    )
+    hits = search(client, headers, "lamp").json()
+    # Name matches weigh more than description matches
+    assert [hit["id"] for hit in hits] == [twice, in_name, in_description]
+    scores = [hit["score"] for hit in hits]
+    assert scores == sorted(scores, reverse=True) and scores[-1] > 0
+    assert hits[1]["highlights"] == {"name": "<mark>lamp</mark>"}
+    assert found(client, headers, "LAMP desk")[0] in (in_name, in_description)
+    assert found(client, headers, "sofa") == []
+
+def test_writes_update_the_index(client, login):
+    headers = login()
+    first, second = create_items(client, headers, ("red lamp", None), ("red chair", None))
+    assert sorted(found(client, headers, "red")) == [first, second]
+
+    client.put(f"{ITEMS}/{first}", json={"name": "blue lamp"}, headers=headers)
+    assert found(client, headers, "red") == [second]
+    assert found(client, headers, "blue") == [first]
+
+    client.delete(f"{ITEMS}/{second}", headers=headers)
+    assert found(client, headers, "red") == []
+
+def test_bulk_writes_update_the_index(client, login):
+    headers = login()
+    response = client.post(f"{ITEMS}/bulk", json={"items": [{"name": "green cup"}, {"name": "green mug"}]}, headers=headers)
+    cup, mug = [result["id"] for result in response.json()["results"]]
+    assert sorted(found(client, headers, "green")) == [cup, mug]
+
+    client.patch(f"{ITEMS}/bulk", json={"items": [{"id": cup, "name": "yellow cup"}]}, headers=headers)
+    assert found(client, headers, "green") == [mug]
+    assert found(client, headers, "yellow") == [cup]
+
+    client.request("DELETE", f"{ITEMS}/bulk", json={"ids": [mug]}, headers=headers)
+    assert found(client, headers, "green") == []
+
+def test_paging_across_equal_scores(client, login):
+    headers = login()
+    ids = create_items(client, headers, *[("same words", "same words")] * 5, ("same", None))
+    seen, params = [], {"limit": 2}
+    while True:
+        response = search(client, headers, "same words", **params)
+        page = response.json()
+        seen += [hit["id"] for hit in page]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params["cursor"] = cursor
+    # Equal scores come in id order, each exactly once
+    assert seen == ids[:5] + [ids[5]]
+
+def test_invalid_search_cursor(client, login):
+    headers = login()
+    for cursor in ["garbage", "eyJzIjoicmFuayIsIm8iOiJkZXNjIiwiayI6WzAuNSwxXX0"]:
+        response = client.get(f"{ITEMS}/search", params={"q": "x", "cursor": cursor}, headers=headers)
+        assert response.status_code == 400
+
+def test_startup_built_the_index(client):
+    # The startup hook (and the client fixture) load the index before any search
+    assert isinstance(item_search, InvertedIndexSearch)
+    assert item_search._data is not None
+
+def test_fulltext_pages_on_integer_ranks():
+    sql = str(FullTextSearch().statement("lamp", 10, (1234, 7)).compile(
+        dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+    rank = "CAST(floor((MATCH (items.name, items.description) AGAINST ('lamp' IN NATURAL LANGUAGE MODE)) * 1000000) AS SIGNED INTEGER)"
+    assert f"({rank} < 1234 OR {rank} = 1234 AND items.id > 7)" in sql
+    assert f"ORDER BY {rank} DESC, items.id ASC" in sql
+    # The float score itself is never compared for equality
+    assert "MODE)) = " not in sql.replace(f"{rank} = ", "")
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from app.core.stats import PERIODS, _period_starts, reconcile_stats
+from app.db.session import SessionLocal, engine
+from app.models.item import Item
+
+ITEMS = "/api/v1/items"
+USERS = "/api/v1/users"
+
+def today(period: str = "day") -> str:
+    return PERIODS[period][2](datetime.utcnow())
+
+def reconcile() -> dict:
+    with SessionLocal() as db:
+        return reconcile_stats(db)
+
+def test_period_starts():
+    now = datetime(2026, 3, 15, 17, 30)
+    assert _period_starts("day", now, 2) == [datetime(2026, 3, 15), datetime(2026, 3, 14)]
+    # Weeks start on Monday
+    assert _period_starts("week", now, 2) == [datetime(2026, 3, 9), datetime(2026, 3, 2)]
+    assert _period_starts("month", now, 3) == [datetime(2026, 3, 1), datetime(2026, 2, 1), datetime(2026, 1, 1)]
+    assert PERIODS["week"][2](datetime(2027, 1, 1)) == "2026-W53"
+
+def test_item_counters_follow_writes(client, login):
+    headers = login()
+    item_id = client.post(f"{ITEMS}/", json={"name": "a"}, headers=headers).json()["id"]
+    response = client.post(f"{ITEMS}/bulk", json={"items": [{"name": "b"}, {"name": "c"}]}, headers=headers)
+    assert response.status_code == 200, response.text
+    client.delete(f"{ITEMS}/{item_id}", headers=headers)
+
+    stats = client.get(f"{ITEMS}/stats", params={"limit": 3}, headers=headers).json()
+    assert stats["total"] == 2
+    # Histograms count creations, newest period first
+    assert [bucket["count"] for bucket in stats["created"]] == [3, 0, 0]
+    assert stats["created"][0]["period"] == today()
+    month = client.get(f"{ITEMS}/stats", params={"period": "month", "limit": 1}, headers=headers).json()
+    assert month["created"] == [{"period": today("month"), "count": 3}]
+    assert reconcile() == {}
+
+def test_sign_ins_count_distinct_users(client, login):
+    headers = login("alice")
+    login("alice")
+    login("bob")
+    stats = client.get(f"{USERS}/stats", params={"period": "week", "limit": 2}, headers=headers).json()
+    assert (stats["total"], stats["active"]) == (2, 2)
+    assert stats["created"][0] == {"period": today("week"), "count": 2}
+    assert [bucket["count"] for bucket in stats["active_users"]] == [2, 0]
+    assert reconcile() == {}
+
+def test_reconcile_corrects_drift(client, login):
+    headers = login()
+    # Written behind the API's back
+    with engine.begin() as conn:
+        conn.execute(Item.__table__.insert(), [{"name": "x"}, {"name": "y"}])
+    assert client.get(f"{ITEMS}/stats", headers=headers).json()["total"] == 0
+
+    assert reconcile() == {"items": 2}
+    assert client.get(f"{ITEMS}/stats", headers=headers).json()["total"] == 2
+    assert reconcile() == {}
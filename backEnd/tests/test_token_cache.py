@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import inspect, update
+from app.core.config import settings
+from app.core.token_cache import revocation_cache
+from app.db.session import engine
+from app.models.token import Token
+
+@pytest.fixture(autouse=True)
+def stateless(monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_VERIFY_MODE", "stateless")
+
+def test_cache_hit_skips_token_lookup(client, login):
+    headers = login()
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+    assert len(revocation_cache) == 1
+
+    # Revoked behind the cache's back: the cached entry still answers until its TTL
+    with engine.begin() as conn:
+        conn.execute(update(Token).values(is_revoked=True))
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+
+    revocation_cache.clear()
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 401
+
+def test_logout_revokes_cached_token(client, login):
+    headers = login()
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+    assert client.post("/api/v1/users/logout", headers=headers).status_code == 200
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 401
+
+def test_refresh_revokes_old_token(client, login):
+    headers = login()
+    response = client.post("/api/v1/users/token/refresh", headers=headers)
+    assert response.status_code == 200
+    fresh = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 401
+    assert client.get("/api/v1/users/me", headers=fresh).status_code == 200
+
+def test_attached_user_is_fully_loaded(client, login):
+    headers = login()
+    client.get("/api/v1/users/me", headers=headers)
+    entry = next(iter(revocation_cache._entries.values()))
+
+    class FakeSession:
+        def add(self, obj):
+            pass
+
+    token, user = entry.attach(FakeSession())
+    # Relationships load on demand as with any row; no column may
+    for obj in (token, user):
+        state = inspect(obj)
+        assert not state.unloaded & set(state.mapper.column_attrs.keys())
+    assert user.password and user.password.startswith("$2")
+
+def test_update_through_cached_user(client, login):
+    headers = login()
+    client.get("/api/v1/users/me", headers=headers)
+    response = client.put("/api/v1/users/update", headers=headers, json={"password": "n3wpassword"})
+    assert response.status_code == 200, response.text
+    # The profile change evicted the cached user, and the token still works
+    assert client.get("/api/v1/users/me", headers=headers).json()["username"] == "alice"
+    login_response = client.post("/api/v1/users/login", json={"login": "alice", "password": "n3wpassword"})
+    assert login_response.status_code == 200
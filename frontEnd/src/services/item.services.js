@@ -1,14 +1,28 @@
 import { API_URL } from '../config/api.config';
 
+// Largest page the backend serves (PAGE_MAX_LIMIT)
+const PAGE_LIMIT = 500;
+
 export const apiService = {
+    // The list is paginated: follow X-Next-Cursor until the last page
     async fetchItems() {
         try {
-            const res = await fetch(`${API_URL}/items/`);
-            if (!res.ok) {
-                const error = await res.json();
-                throw new Error(error.detail || 'Failed to fetch items');
-            }
-            return res.json();
+            const items = [];
+            let cursor = null;
+            do {
+                const params = new URLSearchParams({ limit: PAGE_LIMIT });
+                if (cursor) {
+                    params.set('cursor', cursor);
+                }
+                const res = await fetch(`${API_URL}/items/?${params}`);
+                if (!res.ok) {
+                    const error = await res.json();
+                    throw new Error(error.detail || 'Failed to fetch items');
+                }
+                items.push(...await res.json());
+                cursor = res.headers.get('X-Next-Cursor');
+            } while (cursor);
+            return items;
         } catch (error) {
             console.error('Fetch error:', error);
             throw new Error('Network error: Unable to connect to the server');